@@ -37,9 +37,17 @@ import maya.OpenMaya as om
 import pymel.core as pm
 
 import os
-import json
-from math import ceil
+import wave
+import socket
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
 from datetime import datetime
+from timeit import default_timer
+
+import animationtimer_core as core
+from animationtimer_core import ATCaptureBuffer, ATTake, ATSession, ATConsensus, ATBulkEdit, ATTimingFile, ATTimingIndex
+from animationtimer_core import ATTemplateLibrary, ATTimingDiff
 
 
 __author__ = u"Yann Schmidt"
@@ -73,6 +81,9 @@ class AnimationTimerUI(QtGui.QMainWindow):
     MINIMUM_HEIGHT = 300
     MAXIMUM_WIDTH = 800
     MAXIMUM_HEIGHT = 700
+    FLUSH_INTERVAL = 16  # ms, ~60 refresh per second
+    CUE_LENGTH = 80  # ms, a visual cue stays on screen
+    CUE_COLOR = "#60A0E0"
 
     def __init__(self, parent=maya_main_window()):
         super(AnimationTimerUI, self).__init__(parent)
@@ -95,9 +106,57 @@ class AnimationTimerUI(QtGui.QMainWindow):
 
         self.timer = ATTimer(self)
 
+        # Hotkey of each track
+        self.tracks = list()
+        self.track_keys = dict()
+        self._read_tracks()
+
+        # Taps received from the network, and the delay to get them here
+        self.tap_input = ATTapInput(self.timer, self)
+        self.tap_input.tapped.connect(self.on_tapped)
+        self.tap_latency = core.ATLatency()
+
+        # Replay of a take through the capture path
+        self.replay_source = None
+        self.replay_row = 0
+        self.replay_latency = core.ATLatency()
+        self.replay_timer = QtCore.QTimer(self)
+        self.replay_timer.setInterval(1)
+        self.replay_timer.timeout.connect(self._replay_captures)
+
+        # Overdub: captures of a previous take cued while recording a new one
+        self.overdub_source = None
+        self.cue_thread = ATCueThread(self)
+        self.cue_thread.cued.connect(self.on_cue)
+        self.cue_delay = core.ATLatency()
+        self.cue_sounds = dict()
+        self.cue_timer = QtCore.QTimer(self)
+        self.cue_timer.setSingleShot(True)
+        self.cue_timer.setInterval(AnimationTimerUI.CUE_LENGTH)
+        self.cue_timer.timeout.connect(self._end_cue)
+
+        # Live broadcast, sent and received
+        self.publisher = None
+        self.mirror = ATLiveMirror(self)
+        self.mirror.received.connect(self.on_live_event)
+
+        # Captures are buffered while recording and flushed at display rate
+        self.capture_buffer = ATCaptureBuffer()
+        self.flush_timer = QtCore.QTimer(self)
+        self.flush_timer.setInterval(AnimationTimerUI.FLUSH_INTERVAL)
+        self.flush_timer.timeout.connect(self._flush_captures)
+
         # Windows attached
         self.preference_window = AnimationTimerPreferences(self)
         self.options_window = AnimationTimerOptions(self)
+        self.search_window = ATSearchWindow(self)
+        self.onset_window = ATOnsetWindow(self)
+        self.quantize_window = ATQuantizeWindow(self)
+        self.smooth_window = ATSmoothWindow(self)
+        self.template_window = ATTemplateWindow(self)
+        self.diff_window = ATDiffWindow(self)
+        self.click_track_window = ATClickTrackWindow(self)
+        self.edit_window = ATEditWindow(self)
 
         # Node
         self.node = ATNode(self)
@@ -133,9 +192,19 @@ class AnimationTimerUI(QtGui.QMainWindow):
 
         # Action : Open Timing
         self.action_open_timing = QtGui.QAction(u"Open Timing", self)
-        self.action_open_timing.setStatusTip(u"Open existing Timing (.timing | .json)")
+        self.action_open_timing.setStatusTip(u"Open existing Timing (.timing | .json | .timingb | .csv)")
         self.action_open_timing.setAutoRepeat(False)
 
+        # Action : Find Timing
+        self.action_find_timing = QtGui.QAction(u"Find Timing", self)
+        self.action_find_timing.setStatusTip(u"Search timings in the search directories")
+        self.action_find_timing.setAutoRepeat(False)
+
+        # Action : Compare Timings
+        self.action_compare_timings = QtGui.QAction(u"Compare Timings...", self)
+        self.action_compare_timings.setStatusTip(u"Compare two timings of a shot beat by beat and merge them")
+        self.action_compare_timings.setAutoRepeat(False)
+
         # Action : Recent Timing (empty at first)
         self.submenu_recent_timing = QtGui.QMenu(u'Recent Timings', self)
 
@@ -158,11 +227,89 @@ class AnimationTimerUI(QtGui.QMainWindow):
 
         # ---
 
+        # Action : Undo / Redo
+        self.action_undo = QtGui.QAction(u"Undo", self)
+        self.action_undo.setStatusTip(u"Undo the last change of the captures")
+        self.action_undo.setShortcut(QtGui.QKeySequence.Undo)
+
+        self.action_redo = QtGui.QAction(u"Redo", self)
+        self.action_redo.setStatusTip(u"Redo the last change undone")
+        self.action_redo.setShortcut(QtGui.QKeySequence.Redo)
+
         # Action : Discard current changes
         self.action_discard_current_changes = QtGui.QAction(u"Discard changes", self)
         self.action_discard_current_changes.setStatusTip(u"Discard all changes made since you opened/created this timing.")
         self.action_discard_current_changes.setAutoRepeat(False)
 
+        # Action : Delete current Take
+        self.action_delete_take = QtGui.QAction(u"Delete Take", self)
+        self.action_delete_take.setStatusTip(u"Delete the take currently displayed.")
+        self.action_delete_take.setAutoRepeat(False)
+
+        # Action : Consensus from Takes
+        self.action_consensus = QtGui.QAction(u"Consensus from Takes", self)
+        self.action_consensus.setStatusTip(u"Merge all takes into a new take using the median time of each beat.")
+        self.action_consensus.setAutoRepeat(False)
+
+        # Action : Edit Captures
+        self.action_delete_captures = QtGui.QAction(u"Delete Captures", self)
+        self.action_delete_captures.setStatusTip(u"Delete the selected captures.")
+        self.action_delete_captures.setAutoRepeat(False)
+
+        self.action_nudge_left = QtGui.QAction(u"Nudge 1 Frame Earlier", self)
+        self.action_nudge_left.setStatusTip(u"Move the selected captures one frame earlier.")
+        self.action_nudge_left.setShortcut(QtGui.QKeySequence(u"Alt+Left"))
+
+        self.action_nudge_right = QtGui.QAction(u"Nudge 1 Frame Later", self)
+        self.action_nudge_right.setStatusTip(u"Move the selected captures one frame later.")
+        self.action_nudge_right.setShortcut(QtGui.QKeySequence(u"Alt+Right"))
+
+        self.action_edit_captures = QtGui.QAction(u"Nudge, Scale, Fit...", self)
+        self.action_edit_captures.setStatusTip(u"Nudge, scale or fit the selected captures to a duration.")
+        self.action_edit_captures.setAutoRepeat(False)
+
+        # Action : Quantize
+        self.action_quantize = QtGui.QAction(u"Quantize", self)
+        self.action_quantize.setStatusTip(u"Snap captures to the frames or to a tempo grid.")
+        self.action_quantize.setAutoRepeat(False)
+
+        # Action : Smooth
+        self.action_smooth = QtGui.QAction(u"Smooth...", self)
+        self.action_smooth.setStatusTip(u"Smooth the jitter of tapped captures and find the outliers.")
+        self.action_smooth.setAutoRepeat(False)
+
+        # Action : Templates
+        self.action_templates = QtGui.QAction(u"Templates...", self)
+        self.action_templates.setStatusTip(u"Save timing patterns as templates, find the ones like the captures "
+                                           u"and insert them.")
+        self.action_templates.setAutoRepeat(False)
+
+        # Action : Replay Take
+        self.action_replay_take = QtGui.QAction(u"Replay Take...", self)
+        self.action_replay_take.setStatusTip(u"Record the current take again through the capture path, "
+                                             u"at its speed or faster, and time it.")
+        self.action_replay_take.setAutoRepeat(False)
+
+        # Action : Overdub
+        self.action_overdub = QtGui.QAction(u"Overdub Take...", self)
+        self.action_overdub.setStatusTip(u"Record a new take while the captures of a previous one are cued.")
+        self.action_overdub.setAutoRepeat(False)
+
+        self.action_audible_cues = QtGui.QAction(u"Audible Cues", self)
+        self.action_audible_cues.setStatusTip(u"Click on each cue of an overdub, besides flashing the timer.")
+        self.action_audible_cues.setCheckable(True)
+
+        # Action : Click Track
+        self.action_click_track = QtGui.QAction(u"Click Track...", self)
+        self.action_click_track.setStatusTip(u"Render a click track of the take or of a tempo and play it "
+                                             u"with the timeline.")
+        self.action_click_track.setAutoRepeat(False)
+
+        # Action : Beats from Sound
+        self.action_beats_from_sound = QtGui.QAction(u"Beats from Sound", self)
+        self.action_beats_from_sound.setStatusTip(u"Detect the beats of a sound of the scene and add them as a new take.")
+        self.action_beats_from_sound.setAutoRepeat(False)
+
         # Action : Reset Offsets
         self.action_reset_offsets = QtGui.QAction(u"Reset Offsets", self)
         self.action_reset_offsets.setStatusTip(u"Reset offsets both from time and frames.")
@@ -196,6 +343,25 @@ class AnimationTimerUI(QtGui.QMainWindow):
         self.action_column_note.setStatusTip(u"Toggle the visibility of the Note column")
         self.action_column_note.setCheckable(True)
 
+        # Action : Show / Hide Waveform
+        self.action_show_waveform = QtGui.QAction(u"Show Waveform", self)
+        self.action_show_waveform.setStatusTip(u"Toggle the waveform of the timeline sound under the captures")
+        self.action_show_waveform.setCheckable(True)
+
+        # Action : External Tap Input
+        self.action_tap_input = QtGui.QAction(u"External Tap Input", self)
+        self.action_tap_input.setStatusTip(u"Receive taps from a pedal or a pad over the network (UDP / OSC)")
+        self.action_tap_input.setCheckable(True)
+
+        # Action : Live Broadcast
+        self.action_broadcast = QtGui.QAction(u"Broadcast Captures", self)
+        self.action_broadcast.setStatusTip(u"Send start, stop and captures live to other Animation Timers")
+        self.action_broadcast.setCheckable(True)
+
+        self.action_mirror = QtGui.QAction(u"Mirror a Broadcast", self)
+        self.action_mirror.setStatusTip(u"Record the captures broadcast by another Animation Timer")
+        self.action_mirror.setCheckable(True)
+
         # Action : Always on Top
         self.action_always_on_top = QtGui.QAction(u"Always on Top", self)
         self.action_always_on_top.setCheckable(True)
@@ -231,6 +397,8 @@ class AnimationTimerUI(QtGui.QMainWindow):
         self.menubar_file.setTearOffEnabled(True)
         self.menubar_file.addAction(self.action_new_timing)
         self.menubar_file.addAction(self.action_open_timing)
+        self.menubar_file.addAction(self.action_find_timing)
+        self.menubar_file.addAction(self.action_compare_timings)
         self.menubar_file.addSeparator()
         self.menubar_file.addMenu(self.submenu_recent_timing)
         self.menubar_file.addSeparator()
@@ -242,7 +410,25 @@ class AnimationTimerUI(QtGui.QMainWindow):
         # Edit menu
         self.menubar_edit = menubar.addMenu(u"Edit")
         self.menubar_edit.setTearOffEnabled(True)
+        self.menubar_edit.addAction(self.action_undo)
+        self.menubar_edit.addAction(self.action_redo)
+        self.menubar_edit.addSeparator()
         self.menubar_edit.addAction(self.action_discard_current_changes)
+        self.menubar_edit.addAction(self.action_delete_take)
+        self.menubar_edit.addAction(self.action_consensus)
+        self.menubar_edit.addAction(self.action_quantize)
+        self.menubar_edit.addAction(self.action_smooth)
+        self.menubar_edit.addAction(self.action_templates)
+        self.submenu_captures = self.menubar_edit.addMenu(u"Captures")
+        self.submenu_captures.addAction(self.action_delete_captures)
+        self.submenu_captures.addAction(self.action_nudge_left)
+        self.submenu_captures.addAction(self.action_nudge_right)
+        self.submenu_captures.addAction(self.action_edit_captures)
+        self.menubar_edit.addAction(self.action_replay_take)
+        self.menubar_edit.addAction(self.action_overdub)
+        self.menubar_edit.addAction(self.action_audible_cues)
+        self.menubar_edit.addAction(self.action_beats_from_sound)
+        self.menubar_edit.addAction(self.action_click_track)
         self.menubar_edit.addAction(self.action_reset_offsets)
         self.menubar_edit.addSeparator()
         self.menubar_edit.addAction(self.action_preferences_window)
@@ -257,6 +443,11 @@ class AnimationTimerUI(QtGui.QMainWindow):
         self.menubar_window.addSeparator()
         self.menubar_window.addAction(self.action_column_interval)
         self.menubar_window.addAction(self.action_column_note)
+        self.menubar_window.addAction(self.action_show_waveform)
+        self.menubar_window.addSeparator()
+        self.menubar_window.addAction(self.action_tap_input)
+        self.menubar_window.addAction(self.action_broadcast)
+        self.menubar_window.addAction(self.action_mirror)
         self.menubar_window.addSeparator()
         self.menubar_window.addAction(self.action_always_on_top)
 
@@ -285,6 +476,7 @@ class AnimationTimerUI(QtGui.QMainWindow):
                                        """)
 
         self.timer_help = QtGui.QLabel(u"min : sec : millisec")
+        self.timer_help.setProperty("hours", False)
         self.timer_help.setStyleSheet("""
                                       margin-top:15px;
                                       color:#757575;
@@ -316,8 +508,42 @@ class AnimationTimerUI(QtGui.QMainWindow):
                                               padding:0;
                                               """)
 
+        # Tap stats of the take
+        self.stats_label = QtGui.QLabel()
+        self.stats_label.setToolTip(u"Current tempo, interval mean and deviation, drift from the first bar")
+        self.stats_label.setStyleSheet("""
+                                       color:#757575;
+                                       font-size:10px;
+                                       padding-left:8px;
+                                       """)
+
+        # Takes
+        self.take_label = QtGui.QLabel(u"Take")
+        self.take_label.setStyleSheet("""
+                                      color:#757575;
+                                      font-style:italic;
+                                      """)
+
+        self.take_combobox = QtGui.QComboBox()
+        self.take_combobox.setFixedWidth(120)
+        self.take_combobox.setFocusPolicy(QtCore.Qt.NoFocus)
+
+        # Notes filter
+        self.note_filter_edit = QtGui.QLineEdit()
+        self.note_filter_edit.setPlaceholderText(u"Filter notes, #tags")
+        self.note_filter_edit.setToolTip(u"Show only the captures whose note has all these words, typed or not")
+        self.note_filter_edit.setFixedWidth(160)
+        self.note_filter_edit.setFocusPolicy(QtCore.Qt.ClickFocus)
+
+        self.note_filter_label = QtGui.QLabel()
+        self.note_filter_label.setStyleSheet("""
+                                             color:#757575;
+                                             font-style:italic;
+                                             """)
+
         # Central Area
         self.central_list = ATCenterList(self)
+        self.waveform_strip = ATWaveformStrip(self)
 
         # File Info
         self.file_info_label = QtGui.QLabel(u"Untitled")
@@ -384,6 +610,16 @@ class AnimationTimerUI(QtGui.QMainWindow):
         timer_bar_layout.addWidget(self.timer_help, 1, 1, 1, 1, QtCore.Qt.AlignCenter)
         timer_bar_layout.addWidget(self.frame_counter_label, 0, 2, 0, 1, QtCore.Qt.AlignRight)
         timer_bar_layout.addWidget(self.frame_counter_help, 1, 2, 1, 1, QtCore.Qt.AlignRight)
+        timer_bar_layout.addWidget(self.stats_label, 0, 3, 2, 1, QtCore.Qt.AlignRight | QtCore.Qt.AlignVCenter)
+
+        # Take Bar Layout
+        take_bar_layout = QtGui.QHBoxLayout()
+        take_bar_layout.setContentsMargins(10, 0, 10, 0)
+        take_bar_layout.addWidget(self.note_filter_edit)
+        take_bar_layout.addWidget(self.note_filter_label)
+        take_bar_layout.addStretch(1)
+        take_bar_layout.addWidget(self.take_label)
+        take_bar_layout.addWidget(self.take_combobox)
 
         # Control Bar Layout
         left_controls_layout = QtGui.QHBoxLayout()
@@ -407,7 +643,9 @@ class AnimationTimerUI(QtGui.QMainWindow):
         main_layout = QtGui.QVBoxLayout()
         main_layout.setContentsMargins(0, 6, 0, 10)
         main_layout.addLayout(timer_bar_layout)
+        main_layout.addLayout(take_bar_layout)
         main_layout.addWidget(self.central_list)
+        main_layout.addWidget(self.waveform_strip)
         main_layout.addLayout(control_bar_layout)
         main_layout.addWidget(self.file_info_label)
 
@@ -420,16 +658,37 @@ class AnimationTimerUI(QtGui.QMainWindow):
         """
         self.action_new_timing.triggered.connect(self.on_new_file_action_triggered)
         self.action_open_timing.triggered.connect(self.on_open_file_action_triggered)
+        self.action_find_timing.triggered.connect(self.open_search_window)
+        self.action_compare_timings.triggered.connect(self.open_diff_window)
         self.action_save_timing.triggered.connect(self.on_save_timing_action_triggered)
         self.action_save_timing_as.triggered.connect(self.on_save_timing_as_action_triggered)
         self.action_exit_app.triggered.connect(self.on_exit_app_action_triggered)
+        self.action_undo.triggered.connect(self.on_undo_triggered)
+        self.action_redo.triggered.connect(self.on_redo_triggered)
         self.action_discard_current_changes.triggered.connect(self.on_discard_changes_triggered)
+        self.action_delete_take.triggered.connect(self.on_delete_take_triggered)
+        self.action_consensus.triggered.connect(self.on_consensus_triggered)
+        self.action_quantize.triggered.connect(self.open_quantize_window)
+        self.action_smooth.triggered.connect(self.open_smooth_window)
+        self.action_templates.triggered.connect(self.open_template_window)
+        self.action_replay_take.triggered.connect(self.on_replay_take_triggered)
+        self.action_overdub.triggered.connect(self.on_overdub_triggered)
+        self.action_delete_captures.triggered.connect(self.on_delete_captures_triggered)
+        self.action_nudge_left.triggered.connect(lambda: self.on_nudge_triggered(-1))
+        self.action_nudge_right.triggered.connect(lambda: self.on_nudge_triggered(1))
+        self.action_edit_captures.triggered.connect(self.open_edit_window)
+        self.action_beats_from_sound.triggered.connect(self.open_onset_window)
+        self.action_click_track.triggered.connect(self.open_click_track_window)
         self.action_reset_offsets.triggered.connect(self.on_reset_offsets_triggered)
         self.action_preferences_window.triggered.connect(self.open_preference_window)
         self.action_timing_on_timeline.triggered.connect(self.on_show_on_timeline_triggered)
         self.action_reset_window_size.triggered.connect(self.on_action_reset_window_size_triggered)
         self.action_column_interval.triggered.connect(self.central_list.col_interval_toggle_visibility)
         self.action_column_note.triggered.connect(self.central_list.col_note_toggle_visibility)
+        self.action_show_waveform.triggered.connect(self.on_show_waveform_triggered)
+        self.action_tap_input.triggered.connect(self.on_tap_input_triggered)
+        self.action_broadcast.triggered.connect(self.on_broadcast_triggered)
+        self.action_mirror.triggered.connect(self.on_mirror_triggered)
         self.action_always_on_top.triggered.connect(self.on_window_always_on_top_triggered)
         self.action_open_docs.triggered.connect(AnimationTimer.on_open_docs_triggered)
         self.action_feedback_email.triggered.connect(AnimationTimer.on_send_feedback_triggered)
@@ -440,6 +699,25 @@ class AnimationTimerUI(QtGui.QMainWindow):
         self.stop_btn.clicked.connect(self.on_stop_btn_clicked)
         self.reset_btn.clicked.connect(self.on_reset_btn_clicked)
         self.options_btn.clicked.connect(self.on_options_btn_clicked)
+        self.take_combobox.activated.connect(self.on_take_selected)
+        self.note_filter_edit.textChanged.connect(self.central_list.filter_notes)
+        self.note_filter_edit.returnPressed.connect(self.central_list.setFocus)
+        for signal in (self.central_list.filter_model.rowsInserted, self.central_list.filter_model.rowsRemoved,
+                       self.central_list.filter_model.modelReset, self.central_list.filter_model.layoutChanged):
+            signal.connect(self.on_note_filter_changed)
+        self.central_list.takesChanged.connect(self.on_takes_changed)
+        self.central_list.rowAdded.connect(self.waveform_strip.update)
+        self.central_list.rowsCleared.connect(self.waveform_strip.update)
+        self.central_list.takesChanged.connect(self.waveform_strip.update)
+        self.central_list.timesChanged.connect(self.on_times_changed)
+
+        undo_stack = self.central_list.undo_stack
+        undo_stack.canUndoChanged.connect(self.action_undo.setEnabled)
+        undo_stack.canRedoChanged.connect(self.action_redo.setEnabled)
+        undo_stack.undoTextChanged.connect(lambda text: self.action_undo.setText(u"Undo %s" % text if text else u"Undo"))
+        undo_stack.redoTextChanged.connect(lambda text: self.action_redo.setText(u"Redo %s" % text if text else u"Redo"))
+        self.central_list.selectionModel().selectionChanged.connect(self.waveform_strip.update)
+        self.central_list.selectionModel().selectionChanged.connect(self.on_selection_changed)
 
     # ---
 
@@ -452,8 +730,16 @@ class AnimationTimerUI(QtGui.QMainWindow):
         self.reset_btn.setEnabled(False)
         self.action_reset_offsets.setEnabled(False)
         self.action_discard_current_changes.setEnabled(False)
+        self.action_undo.setEnabled(False)
+        self.action_redo.setEnabled(False)
+        self.on_selection_changed()
 
         self.on_window_always_on_top_triggered()
+        self.on_takes_changed()
+        self.on_show_waveform_triggered()
+        self.on_tap_input_triggered()
+        self.on_broadcast_triggered()
+        self.on_mirror_triggered()
 
         if self.node.exists():
             self.action_timing_on_timeline.setChecked(True)
@@ -476,31 +762,118 @@ class AnimationTimerUI(QtGui.QMainWindow):
         )
 
     def open_preference_window(self):
-        self.preference_window.exec_()
+        if self.preference_window.exec_():
+            self._read_tracks()
+            self.on_tap_input_triggered()
+            self.on_broadcast_triggered()
+            self.on_mirror_triggered()
+
+    def open_search_window(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.search_window.show()
+        self.search_window.raise_()
+
+    def open_diff_window(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.diff_window.show()
+        self.diff_window.raise_()
+
+    def open_quantize_window(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.quantize_window.show()
+        self.quantize_window.raise_()
+
+    def open_smooth_window(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.smooth_window.show()
+        self.smooth_window.raise_()
+
+    def open_template_window(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.template_window.show()
+        self.template_window.raise_()
+
+    def open_click_track_window(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.click_track_window.show()
+        self.click_track_window.raise_()
+
+    def open_edit_window(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.edit_window.show()
+        self.edit_window.raise_()
+
+    def open_onset_window(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.onset_window.show()
+        self.onset_window.raise_()
 
     # ---
     # Slots
 
     def on_start_btn_clicked(self):
         if self.timer.isActive():
-            self._capture()
+            self._capture(self.track_keys.get(QtCore.Qt.Key_Space, 0))
         else:
-            self.central_list.clear()
-            self.timer.start()
-            self.start_btn.setText("Capture")
-
-        self.stop_btn.setEnabled(True)
-        self.reset_btn.setEnabled(True)
+            self._start([name for name, _ in self.tracks] if len(self.tracks) > 1 else [])
 
     def on_stop_btn_clicked(self):
+        if self.publisher is not None and self.timer.isActive():
+            self.publisher.stop(self.timer.elapsed)
+
+        self.cue_thread.stop()
         self.timer.stop()
+        self.flush_timer.stop()
+        self._flush_captures()
+        self.central_list.end_record()
+
+        if self.replay_source is not None:
+            self._end_replay()
+        if self.overdub_source is not None:
+            self._end_overdub()
         self.start_btn.setText(u"Start")
         self.stop_btn.setDisabled(True)
+        self.take_combobox.setEnabled(True)
+
+        if len(self.tap_latency):
+            AnimationTimer.info(u"Animation Timer: external taps, delay to capture: %s" % self.tap_latency.summary())
+            self.tap_latency.reset()
 
     def on_reset_btn_clicked(self):
         if self.timer.isActive():
+            if self.publisher is not None:
+                self.publisher.stop(self.timer.elapsed)
             self.timer.stop()
 
+        if self.replay_source is not None:
+            self.replay_timer.stop()
+            self.replay_source = None
+            self.timer.clock = ATElapsedClock()
+
+        if self.overdub_source is not None:
+            self.cue_thread.stop()
+            self.overdub_source = None
+            self._end_cue()
+
+        self.flush_timer.stop()
+        self.capture_buffer.clear()
+
         self._reset_timer()
         self._reset_frame_counter()
 
@@ -514,19 +887,71 @@ class AnimationTimerUI(QtGui.QMainWindow):
     def on_options_btn_clicked(self):
 
         fps = self.fps_label.text()
-        if int(fps) in AnimationTimerOptions.fps_preset_list:
+        if AnimationTimerOptions.is_preset(fps):
             self.options_window.on_fps_preset_selected()
-            i = self.options_window.fps_combobox.findText(str(fps))
+            i = self.options_window.fps_combobox.findText(fps)
             self.options_window.fps_combobox.setCurrentIndex(i)
         else:
             self.options_window.on_fps_custom_selected()
-            self.options_window.fps_custom_spinbox.setValue(int(fps))
+            self.options_window.fps_custom_spinbox.setValue(float(core.ATTimebase.get(fps)))
 
         if self.options_window.isVisible():
             self.options_window.hide()
         else:
             self.options_window.show()
 
+    def on_take_selected(self, index):
+        self.central_list.select_take(index)
+
+    def on_note_filter_changed(self, *args):
+        shown = self.central_list.filter_model.rowCount()
+        total = self.central_list.rowCount()
+        self.note_filter_label.setText(u"%d / %d" % (shown, total) if shown != total else u"")
+
+    def on_takes_changed(self):
+        """
+        Rebuild the take switcher and the timeline keys for the current take.
+        """
+        self.take_combobox.clear()
+        self.take_combobox.addItems([take.name for take in self.central_list.session])
+        self.take_combobox.setCurrentIndex(self.central_list.session.index)
+
+        take = self.central_list.session.current
+        self.stats_label.setText(take.stats[0].summary() if take is not None and take.stats else u"")
+
+        self.action_delete_take.setEnabled(not self.central_list.session.is_empty())
+        self.action_consensus.setEnabled(len([take for take in self.central_list.session
+                                              if len(take) and take.origin is None]) > 1)
+        self.action_quantize.setEnabled(not self.central_list.session.is_empty())
+        self.action_smooth.setEnabled(not self.central_list.session.is_empty())
+        self.action_replay_take.setEnabled(bool(self.central_list.session.current and
+                                                len(self.central_list.session.current)))
+        self.action_overdub.setEnabled(any(len(take) for take in self.central_list.session))
+
+        if self.action_timing_on_timeline.isChecked():
+            self.node.create()
+
+    def on_selection_changed(self, *args):
+        selected = bool(self.central_list.selectionModel().hasSelection())
+
+        for action in (self.action_delete_captures, self.action_nudge_left, self.action_nudge_right):
+            action.setEnabled(selected)
+
+        if self.edit_window.isVisible():
+            self.edit_window.on_selection_changed()
+
+    def on_times_changed(self):
+        """
+        Captures moved: follow them on the timeline and the waveform.
+        """
+        if self.action_timing_on_timeline.isChecked():
+            self.node.create()
+
+        self.waveform_strip.update()
+
+        take = self.central_list.session.current
+        self.stats_label.setText(take.stats[0].summary() if take is not None and take.stats else u"")
+
     # Other Actions
 
     def on_new_file_action_triggered(self, force=False):
@@ -557,12 +982,18 @@ class AnimationTimerUI(QtGui.QMainWindow):
         if bool_str(settings.value("Preferences/reset_offsets_on_new_file", True)):
             self.on_reset_offsets_triggered()
 
-        self.fps_label.setNum(int(AnimationTimerOptions.default_fps))
+        fps = core.ATTimebase.get(AnimationTimerOptions.default_fps)
+        self.fps_label.setText(str(fps))
+        self.central_list.set_timebase(fps, self.timer.offset)
         self.file_info_label.setText(u"Untitled")
 
         # Set new file
         self.file = None
 
+        # Nothing to undo in a new timing
+        self.central_list.undo_stack.clear()
+        self.central_list.set_clean()
+
     def on_open_file_action_triggered(self):
         """
         Open a saved file.
@@ -575,7 +1006,7 @@ class AnimationTimerUI(QtGui.QMainWindow):
             self,
             'Open Timing',
             AnimationTimer.switch_filedialog_dir(),
-            'Timing / Json Files (*.timing *.json)',
+            'Timing Files (*.timing *.json *.timingb *.csv)',
             '',
             QtGui.QFileDialog.DontUseNativeDialog
         )
@@ -654,12 +1085,78 @@ class AnimationTimerUI(QtGui.QMainWindow):
         self.close()
 
     def on_discard_changes_triggered(self):
+        # Security
+        self.on_stop_btn_clicked()
+
         if self.central_list.changed:
             if self.file is None:
                 self.on_new_file_action_triggered(force=True)
-            else:
+            elif not self.central_list.revert():
                 self.file.load()
 
+    def on_delete_captures_triggered(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.central_list.delete_rows(self.central_list.selected_rows())
+
+    def on_nudge_triggered(self, frames):
+        # Security
+        self.on_stop_btn_clicked()
+
+        rows = self.central_list.selected_rows()
+        if rows:
+            times = ATBulkEdit.nudge(self.central_list.session.current, rows, frames=frames)
+            self.central_list.set_times(rows, times, u"Nudge")
+
+    def on_undo_triggered(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.central_list.undo_stack.undo()
+
+    def on_redo_triggered(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.central_list.undo_stack.redo()
+
+    def on_delete_take_triggered(self):
+        # Security
+        self.on_stop_btn_clicked()
+
+        self.central_list.remove_take()
+
+    def on_consensus_triggered(self):
+        """
+        Compute the consensus of the tapped takes and load it as a new take.
+        Outlier scores are kept on each take and shown in the Time column.
+        :return: void
+        """
+        # Security
+        self.on_stop_btn_clicked()
+
+        consensus = ATConsensus(self.central_list.session)
+        if len(consensus.takes) < 2:
+            return AnimationTimer.warning(u"Animation Timer: At least 2 takes are needed for a consensus.")
+
+        for take, scores in zip(consensus.takes, consensus.scores):
+            take.scores = scores
+
+        fps = self.fps_label.text()
+        offset = self.timer.offset
+
+        data = list()
+        for ms, spread, count in zip(consensus.times(), consensus.spread, consensus.count):
+            data.append({
+                'time': core.format_time(ms + offset),
+                'frame': int(AnimationTimer.calculate_frames(ms + offset, fps)),
+                'interval': u'',
+                'note': u'+/- %d ms (%d takes)' % (round(spread), count),
+            })
+
+        self.central_list.add_take(u"Consensus", data, ATTake.CONSENSUS)
+
     def on_reset_offsets_triggered(self):
         # Clear offsets in option window then accept.
         self.options_window.on_clear_offset_time_clicked()
@@ -684,6 +1181,186 @@ class AnimationTimerUI(QtGui.QMainWindow):
     def on_action_reset_window_size_triggered(self):
         self.resize(AnimationTimerUI.WIDTH, AnimationTimerUI.HEIGHT)
 
+    def on_show_waveform_triggered(self):
+        show = self.action_show_waveform.isChecked()
+
+        if show and self.waveform_strip.waveform is None and not self.waveform_strip.loader.isRunning():
+            if not self.waveform_strip.load_scene_sound():
+                AnimationTimer.warning(u"Animation Timer: No sound in the scene.")
+
+        self.waveform_strip.setVisible(show)
+
+    def on_tap_input_triggered(self):
+        self.tap_input.stop()
+
+        if not self.action_tap_input.isChecked():
+            return
+
+        settings = AnimationTimer.load_settings_file()
+        port = int(settings.value("Preferences/tap_port", core.TAP_PORT))
+        host = '0.0.0.0' if bool_str(settings.value("Preferences/tap_network", False)) else '127.0.0.1'
+
+        try:
+            self.tap_input.start_server(port, host)
+        except socket.error as e:
+            AnimationTimer.error(u"Animation Timer: cannot receive taps on port %d: %s" % (port, e))
+            self.action_tap_input.setChecked(False)
+            return
+
+        AnimationTimer.info(u"Animation Timer: receiving taps on port %d." % port)
+
+    def on_tapped(self, command, channel, ms):
+        """
+        A tap arrived from the network. It is captured at the time it
+        was received, like a key press.
+        """
+        if command == 'stop':
+            if self.timer.isActive():
+                self.on_stop_btn_clicked()
+        elif not self.timer.isActive():
+            # A tap starts the recording, as Space does
+            self.on_start_btn_clicked()
+        elif command == 'tap' and ms is not None:
+            self._capture(channel, ms)
+
+            elapsed = self.timer.elapsed
+            if elapsed is not None:
+                self.tap_latency.add(elapsed - ms)
+
+    def on_replay_take_triggered(self):
+        source = self.central_list.session.current
+        if source is None or not len(source):
+            return
+
+        # Security
+        self.on_stop_btn_clicked()
+
+        speeds = [u"1x", u"2x", u"4x", u"10x"]
+        speed, ok = QtGui.QInputDialog.getItem(self, u"Replay Take", u"Replay %s at" % source.name, speeds, 0, False)
+        if not ok:
+            return
+
+        self.replay_source = source
+        self.replay_row = 0
+        self.replay_latency.reset()
+
+        # The whole recording runs faster, display included
+        self.timer.clock = core.ATClock(float(speed[:-1]))
+        self._start(list(source.tracks))
+        self.replay_timer.start()
+
+    def on_overdub_triggered(self):
+        takes = [take for take in self.central_list.session if len(take)]
+        if not takes:
+            return
+
+        # Security
+        self.on_stop_btn_clicked()
+
+        names = [take.name for take in takes]
+        current = self.central_list.session.current
+        name, ok = QtGui.QInputDialog.getItem(self, u"Overdub Take", u"Cue the captures of", names,
+                                              takes.index(current) if current in takes else 0, False)
+        if not ok:
+            return
+
+        self.overdub_source = takes[names.index(name)]
+        self.cue_delay.reset()
+
+        # The new take and the cues share the clock of the timer
+        self.on_start_btn_clicked()
+        self.cue_thread.start_cues(self.overdub_source, self.timer.clock)
+
+    def on_cue(self, index, late):
+        """
+        Show, and play when asked, a cue of the take overdubbed.
+        """
+        source = self.overdub_source
+        now = self.timer.elapsed
+        if source is None or now is None:
+            return
+
+        self.cue_delay.add(now - source.times[index])
+
+        channel = source.channel(index)
+        color = ATCaptureModel.track_color(channel) if source.tracks else AnimationTimerUI.CUE_COLOR
+        self.timer_label.setStyleSheet("margin-top: -10px; color: %s;" % color)
+        self.cue_timer.start()
+
+        if self.action_audible_cues.isChecked():
+            if QtGui.QSound.isAvailable():
+                QtGui.QSound.play(self._cue_sound(channel))
+            else:
+                QtGui.QApplication.beep()
+
+    def on_broadcast_triggered(self):
+        if self.publisher is not None:
+            self.publisher.close()
+            self.publisher = None
+
+        if not self.action_broadcast.isChecked():
+            return
+
+        host, port = AnimationTimer.broadcast_address()
+
+        try:
+            self.publisher = core.ATLivePublisher(host, port).open()
+        except socket.error as e:
+            AnimationTimer.error(u"Animation Timer: cannot broadcast to %s:%d: %s" % (host, port, e))
+            self.action_broadcast.setChecked(False)
+            return
+
+        # Do not mirror our own broadcast
+        self.mirror.ignore = self.publisher.publisher
+        if self.mirror.subscriber is not None:
+            self.mirror.subscriber.ignore = self.mirror.ignore
+
+    def on_mirror_triggered(self):
+        self.mirror.stop()
+
+        if not self.action_mirror.isChecked():
+            return
+
+        host, port = AnimationTimer.broadcast_address()
+
+        try:
+            self.mirror.start_subscriber(host, port)
+        except socket.error as e:
+            AnimationTimer.error(u"Animation Timer: cannot receive the broadcast of %s:%d: %s" % (host, port, e))
+            self.action_mirror.setChecked(False)
+
+    def on_live_event(self, kind, values):
+        """
+        Follow the recording broadcast by another Animation Timer.
+        Captures keep the times they were taken at over there.
+        """
+        if kind == core.ATLiveMessage.START:
+            self.on_stop_btn_clicked()
+
+            try:
+                fps = core.ATTimebase.get(values['fps'])
+            except (ValueError, ZeroDivisionError):
+                fps = core.ATTimebase.get(self.fps_label.text())
+            self._set_timebase(fps, values['offset'])
+
+            self._start(values['tracks'])
+            AnimationTimer.info(u"Animation Timer: mirroring %s." % values['name'])
+
+        elif kind == core.ATLiveMessage.CAPTURES:
+            if not self.timer.isActive():
+                # Joined during the recording
+                self._start([])
+
+            for ms, channel in values:
+                self._capture(channel, ms)
+
+        elif kind == core.ATLiveMessage.STOP:
+            self.on_stop_btn_clicked()
+
+            if self.mirror.subscriber is not None and self.mirror.subscriber.lost:
+                AnimationTimer.warning(u"Animation Timer: %d broadcast capture(s) lost." % self.mirror.subscriber.lost)
+                self.mirror.subscriber.lost = 0
+
     def on_window_always_on_top_triggered(self):
         flags = self.windowFlags()
         if self.action_always_on_top.isChecked():
@@ -703,33 +1380,191 @@ class AnimationTimerUI(QtGui.QMainWindow):
 
     # --
 
+    def set_timer_display(self, ms):
+        """
+        Show a time on the timer. Hours are only shown from one hour.
+        :param ms: int
+        :return: void
+        """
+        self.timer_label.setText(core.format_time(ms))
+
+        if (ms >= core.HOUR) != self.timer_help.property("hours"):
+            self.timer_help.setProperty("hours", ms >= core.HOUR)
+            if ms >= core.HOUR:
+                self.timer_help.setText(u"hour : min : sec : millisec")
+            else:
+                self.timer_help.setText(u"min : sec : millisec")
+
     def _reset_timer(self):
-        if self.timer.offset:
-            self.timer.time = QtCore.QTime(0, 0, 0).addMSecs(self.timer.offset)
-            self.timer_label.setText(self.timer.time.toString("mm:ss:zzz"))
-        else:
-            self.timer_label.setText("00:00:000")
-            self.timer.time = QtCore.QTime()
+        self.timer.ms = self.timer.offset
+        self.set_timer_display(self.timer.offset)
 
     def _reset_frame_counter(self):
         if self.timer.offset:
-            self.frame_counter_label.setNum(AnimationTimer.calculate_frames(self.timer.offset, int(self.fps_label.text())))
+            self.frame_counter_label.setNum(AnimationTimer.calculate_frames(self.timer.offset, self.fps_label.text()))
         else:
             self.frame_counter_label.setNum(0)
 
-    def _capture(self):
+    def _start(self, tracks):
+        """
+        Start a recording.
+        :param tracks: list of str names, empty for a single track
+        :return: void
+        """
+        self.central_list.begin_record(tracks)
+        self.capture_buffer.clear()
+        self.tap_latency.reset()
+        self.timer.start()
+        self.flush_timer.start()
+        self.start_btn.setText("Capture")
+        self.take_combobox.setEnabled(False)
+
+        self.stop_btn.setEnabled(True)
+        self.reset_btn.setEnabled(True)
+
+        if self.publisher is not None:
+            self.publisher.start(self.fps_label.text(), self.timer.offset, self.central_list.session.current.name,
+                                 tracks)
+
+    def _replay_captures(self):
+        """
+        Capture what is due of the take replayed, as key presses would.
+        """
+        source = self.replay_source
+        now = self.timer.elapsed
+
+        if source is None or now is None:
+            self.replay_timer.stop()
+            return
+
+        while self.replay_row < len(source) and source.times[self.replay_row] <= now:
+            self._capture(source.channel(self.replay_row))
+            self.replay_row += 1
+
+        if self.replay_row >= len(source):
+            self.on_stop_btn_clicked()
+
+    def _end_replay(self):
+        """
+        Compare the replayed take with its source and report.
+        """
+        self.replay_timer.stop()
+
+        source, self.replay_source = self.replay_source, None
+        speed = self.timer.clock.speed
+        self.timer.clock = ATElapsedClock()
+
+        take = self.central_list.session.current
+        error = core.ATLatency()
+        for row in range(min(len(take), len(source))):
+            error.add(take.times[row] - source.times[row])
+
+        AnimationTimer.info(u"Animation Timer: replay of %s at %gx, %d/%d captures. Timing error: %s. "
+                            u"Capture to table: %s." % (source.name, speed, len(take), len(source),
+                                                        error.summary(), self.replay_latency.summary()))
+
+    def _end_overdub(self):
+        """
+        Report how accurately the cues of the overdub were given.
+        """
+        source, self.overdub_source = self.overdub_source, None
+        self._end_cue()
+
+        AnimationTimer.info(u"Animation Timer: overdub of %s, %d/%d cues. Cue jitter: %s. Cue to screen: %s." %
+                            (source.name, len(self.cue_thread.scheduler.jitter), len(source),
+                             self.cue_thread.scheduler.jitter.summary(), self.cue_delay.summary()))
+
+    def _end_cue(self):
+        self.timer_label.setStyleSheet("margin-top: -10px;")
+
+    def _cue_sound(self, channel):
+        """
+        Click of a track, as in the click track, rendered once.
+        :return: str path of a WAV file
+        """
+        kind = core.ATClickTrack.BEAT + channel % (len(core.ATClickTrack.FREQUENCIES) - 1)
+
+        if kind not in self.cue_sounds:
+            path = os.path.join(tempfile.gettempdir(), "animationtimer_cue%d.wav" % kind)
+            click = core.ATClickTrack()
+            click.add_times([0], [kind])
+            click.write(path)
+            self.cue_sounds[kind] = path
+
+        return self.cue_sounds[kind]
+
+    def _set_timebase(self, fps, offset):
+        """
+        Change fps and offset as the Options do.
+        """
+        self.fps_label.setText(str(fps))
+        self.timer.offset = int(offset)
+        self.set_timer_display(self.timer.offset)
+        self._reset_frame_counter()
+
+        self.central_list.set_timebase(fps, self.timer.offset)
+        self.action_reset_offsets.setEnabled(self.timer.offset > 0)
+
+    def _capture(self, channel=0, ms=None):
+        """
+        Capture the time at an instant 't'.
+        Only the elapsed time is stored here, the table is updated by _flush_captures.
+        :param channel: int track of the capture
+        :param ms: int elapsed time if already taken, now by default
+        :return: void
+        """
+        if ms is None:
+            ms = self.timer.elapsed
+
+        if not self.capture_buffer.append(ms, channel):
+            # Buffer full: make room before storing the capture
+            self._flush_captures()
+            self.capture_buffer.append(ms, channel)
+
+        if self.publisher is not None:
+            self.publisher.capture(ms, channel)
+
+    def _flush_captures(self):
         """
-        Capture current time, frame count and notes at an instant 't'.
+        Move pending captures from the buffer to the table (and timeline)
+        in one batch.
         :return: void
         """
-        time = self.timer.time.toString("mm:ss:zzz")
-        frame = self.frame_counter_label.text()
-        note = u''
+        captures = self.capture_buffer.drain()
+        if not captures:
+            return
 
-        self.central_list.add_row(time, frame, note)
+        take = self.central_list.session.current
+        first = len(take)
+
+        if self.replay_source is not None and self.timer.elapsed is not None:
+            now = self.timer.elapsed
+            for ms, _ in captures:
+                self.replay_latency.add(now - ms)
+
+        self.central_list.add_rows([(ms, u'', channel) for ms, channel in captures])
+
+        for ms, channel in captures:
+            take.tap_stats(channel).add(ms)
+        self.stats_label.setText(take.tap_stats(captures[-1][1]).summary())
 
         if self.action_timing_on_timeline.isChecked():
-            self.node.add(frame)
+            for row in range(first, len(take)):
+                self.node.add(take.frames[row], take.channel(row))
+
+    def _read_tracks(self):
+        """
+        Tracks and their hotkeys, from the preferences.
+        Space captures on the first track unless it is given to another one.
+        :return: void
+        """
+        self.tracks = AnimationTimer.tracks()
+        self.track_keys = dict()
+
+        for channel, (name, key) in enumerate(self.tracks):
+            sequence = QtGui.QKeySequence(key)
+            if key and sequence.count():
+                self.track_keys[sequence[0]] = channel
 
     def _center_window(self):
         """
@@ -760,6 +1595,11 @@ class AnimationTimerUI(QtGui.QMainWindow):
         self.resize(w, h)
 
         self.action_always_on_top.setChecked(bool_str(settings.value("always_on_top", True)))
+        self.action_show_waveform.setChecked(bool_str(settings.value("waveform", False)))
+        self.action_tap_input.setChecked(bool_str(settings.value("tap_input", False)))
+        self.action_broadcast.setChecked(bool_str(settings.value("broadcast", False)))
+        self.action_mirror.setChecked(bool_str(settings.value("mirror", False)))
+        self.action_audible_cues.setChecked(bool_str(settings.value("audible_cues", False)))
 
         settings.endGroup()
 
@@ -780,6 +1620,11 @@ class AnimationTimerUI(QtGui.QMainWindow):
 
         settings.setValue("pos", self.pos())
         settings.setValue("always_on_top", self.action_always_on_top.isChecked())
+        settings.setValue("waveform", self.action_show_waveform.isChecked())
+        settings.setValue("tap_input", self.action_tap_input.isChecked())
+        settings.setValue("broadcast", self.action_broadcast.isChecked())
+        settings.setValue("mirror", self.action_mirror.isChecked())
+        settings.setValue("audible_cues", self.action_audible_cues.isChecked())
         settings.setValue("width", self.width())
         settings.setValue("height", self.height())
 
@@ -797,6 +1642,9 @@ class AnimationTimerUI(QtGui.QMainWindow):
 
     def closeEvent(self, event):
         self._write_window_settings()
+        self.tap_input.stop()
+        self.mirror.stop()
+        self.cue_thread.stop()
         # super(AnimationTimerUI, self).closeEvent(event)
 
     def moveEvent(self, event):
@@ -844,11 +1692,10 @@ class AnimationTimer(object):
     def calculate_frame_length(cls, fps):
         """
         Calculate the length in millisec for 1 frame.
-        - fps : int.
+        - fps : frame rate, see ATTimebase.get
         @return int: millisec
         """
-        frame_length = ceil(1000 / fps)
-        return int(frame_length)
+        return core.calculate_frame_length(fps)
 
     @classmethod
     def calculate_frames(cls, ms, fps):
@@ -856,23 +1703,25 @@ class AnimationTimer(object):
         Calculate the current frame based on the elasped time and current
         fps.
         ms : int millisec
-        fps: int value
-        @return float frames
+        fps: frame rate, see ATTimebase.get
+        @return int frames
         """
-        frames = fps * ms / 1000
-        return frames
+        return core.calculate_frames(ms, fps)
 
     @classmethod
     def calculate_time(cls, frame, fps, fmt="mm:ss:zzz"):
         """
         Calculte the time based on the frame and the current fps number
         :param frame: int
-        :param fps: int
+        :param fps: frame rate, see ATTimebase.get
         :return: str
         """
 
         ms = AnimationTimer.calculate_time_ms(frame, fps)
 
+        if fmt == "mm:ss:zzz":
+            return core.format_time(ms)
+
         time = QtCore.QTime()
         time.setHMS(0,
                     time.addMSecs(ms).minute(),
@@ -881,19 +1730,27 @@ class AnimationTimer(object):
 
         return time.toString(fmt)
 
+    @classmethod
+    def parse_time(cls, text, fmt="mm:ss:zzz"):
+        """
+        Convert a time string back to milliseconds.
+        :param text: str
+        :return: int
+        """
+        if fmt == "mm:ss:zzz":
+            return core.parse_time(text)
+
+        return QtCore.QTime(0, 0, 0).msecsTo(QtCore.QTime.fromString(text, fmt))
+
     @classmethod
     def calculate_time_ms(cls, frame, fps):
         """
         Calculte the time based on the frame and the current fps number
         :param frame: int
-        :param fps: int
+        :param fps: frame rate, see ATTimebase.get
         :return milliseconds: int
         """
-
-        ms = ceil(float(frame) / float(fps) * 1000)
-        ms = int(ms)
-
-        return ms
+        return core.calculate_time_ms(frame, fps)
 
     # ---
 
@@ -937,7 +1794,7 @@ class AnimationTimer(object):
         dialog.setDirectory(AnimationTimer.switch_filedialog_dir())
         dialog.setFileMode(QtGui.QFileDialog.AnyFile)
         dialog.setNameFilter(
-            'Timing File (*.timing);;Json File (*.json)')
+            'Timing File (*.timing);;Json File (*.json);;Binary Timing File (*.timingb);;CSV File (*.csv)')
         dialog.setWindowTitle("Save Timing as ...")
         dialog.setOption(QtGui.QFileDialog.DontUseNativeDialog)
 
@@ -972,11 +1829,69 @@ class AnimationTimer(object):
         else:
             return directory
 
-    # ---
-
     @classmethod
-    def info(cls, msg):
-        return om.MGlobal.displayInfo(msg)
+    def search_directories(cls):
+        """
+        Directories scanned by Find Timing.
+        Default to the default directory and the current project.
+        :return: list of str
+        """
+        settings = AnimationTimer.load_settings_file()
+        directories = settings.value("Preferences/search_directories")
+
+        if directories:
+            directories = [d for d in directories.split(';') if d]
+        else:
+            directories = [settings.value("Preferences/default_directory", QtCore.QDir.homePath()),
+                           pm.workspace.getPath()]
+
+        return [os.path.normpath(d) for d in directories if d and os.path.isdir(d)]
+
+    @classmethod
+    def tracks(cls):
+        """
+        Tracks set in the preferences.
+        :return: list of tuple (name, key)
+        """
+        settings = AnimationTimer.load_settings_file()
+        return core.parse_tracks(settings.value("Preferences/tracks", u''))
+
+    @classmethod
+    def broadcast_address(cls):
+        """
+        Where live captures are sent and received, "host:port".
+        :return: tuple (host, port)
+        """
+        settings = AnimationTimer.load_settings_file()
+        address = settings.value("Preferences/broadcast_address", u'') or u''
+
+        host, _, port = address.strip().partition(':')
+        try:
+            port = int(port) if port else core.ATLivePublisher.PORT
+        except ValueError:
+            port = core.ATLivePublisher.PORT
+
+        return str(host or core.ATLivePublisher.GROUP), port
+
+    @classmethod
+    def sound_nodes(cls):
+        """
+        Sound nodes of the scene having a file, the one used by the
+        timeline first.
+        :return: list of tuple (name, path, offset frame)
+        """
+        slider = pm.language.mel.eval('$temp1=$gPlayBackSlider')
+        current = pm.timeControl(slider, q=True, sound=True)
+
+        nodes = sorted(pm.ls(type='audio'), key=lambda node: node.name() != current)
+
+        return [(node.name(), node.filename.get(), node.offset.get()) for node in nodes if node.filename.get()]
+
+    # ---
+
+    @classmethod
+    def info(cls, msg):
+        return om.MGlobal.displayInfo(msg)
 
     @classmethod
     def warning(cls, msg):
@@ -993,17 +1908,20 @@ class ATTimer(QtCore.QTimer):
     Holds 2 timers.
     ---
     QTimer for display purpose.
-    QElapsedTimer for calculations.
+    A clock for calculations, ATElapsedClock unless another one is given
+    (see core.ATClock), to replay or test faster than real time.
     """
-    def __init__(self, parent):
+    MAXIMUM = 359999999  # ms, 99:59:59:999
+
+    def __init__(self, parent, clock=None):
         super(ATTimer, self).__init__(parent)
         self.parent = parent
 
-        self.time = QtCore.QTime()
+        self.ms = 0      # Time displayed, offset included
         self.offset = 0  # ms
 
         self.setSingleShot(False)
-        self.elapsed_timer = QtCore.QElapsedTimer()
+        self.clock = clock if clock is not None else ATElapsedClock()
 
         # Connections
         self.timeout.connect(self.on_timer_changed)
@@ -1013,21 +1931,29 @@ class ATTimer(QtCore.QTimer):
         Start the 2 timers simultaneously.
         """
         super(ATTimer, self).start(1)
-        self.elapsed_timer.start()
+        self.clock.start()
 
     def stop(self):
         """
         Stop the 2 timers simultaneously.
         """
         super(ATTimer, self).stop()
-        self.elapsed_timer.invalidate()
+        self.clock.stop()
 
     # ---
 
     @property
     def elapsed(self):
         if self.isActive():
-            return self.elapsed_timer.elapsed()
+            return self.clock.elapsed()
+
+    def stamp(self):
+        """
+        Elapsed time, safe to read from another thread: only the clock
+        is used.
+        :return: int ms or None if stopped
+        """
+        return self.clock.elapsed()
 
     # ---
 
@@ -1042,341 +1968,1096 @@ class ATTimer(QtCore.QTimer):
             ms += self.offset
 
         # Timer
-        self.time = QtCore.QTime()  # Reset
-        self.time.setHMS(0,
-                         self.time.addMSecs(ms).minute(),
-                         self.time.addMSecs(ms).second(),
-                         self.time.addMSecs(ms).msec())
+        self.ms = ms
 
-        if self.time > QtCore.QTime(0, 59, 59, 999):
+        if ms > ATTimer.MAXIMUM:
             self.stop()
 
         # Frame calculations
-        frames = AnimationTimer.calculate_frames(int(ms), int(self.parent.fps_label.text()))
+        frames = AnimationTimer.calculate_frames(int(ms), self.parent.fps_label.text())
 
         # Update displays
-        self.parent.timer_label.setText(self.time.toString("mm:ss:zzz"))
+        self.parent.set_timer_display(ms)
         self.parent.frame_counter_label.setNum(int(frames))
 
 
-class ATCenterList(QtGui.QTableWidget):
+class ATElapsedClock(core.ATClock):
     """
-    Center List object.
+    Real time clock of the timer, on QElapsedTimer.
     """
 
-    COLS_NAMES = ['Time', 'Frame', 'Interval', 'Note']
-    MAX_COLS = 4
+    def __init__(self):
+        super(ATElapsedClock, self).__init__()
+        self.elapsed_timer = QtCore.QElapsedTimer()
 
-    rowAdded = QtCore.Signal()
-    rowsCleared = QtCore.Signal()
-    contentChanged = QtCore.Signal(bool)
+    def start(self):
+        self.elapsed_timer.start()
 
-    def __init__(self, parent):
-        super(ATCenterList, self).__init__(parent)
-        self.parent = parent
+    def stop(self):
+        self.elapsed_timer.invalidate()
 
-        self.setSelectionMode(QtGui.QAbstractItemView.ExtendedSelection)
-        self.horizontalHeader().setResizeMode(QtGui.QHeaderView.Stretch)
-        self.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
-        self.setShowGrid(False)
-        self.setGridStyle(QtCore.Qt.DashLine)
+    def is_running(self):
+        return self.elapsed_timer.isValid()
 
-        self.changed = False
+    def elapsed(self):
+        if self.elapsed_timer.isValid():
+            return self.elapsed_timer.elapsed()
 
-        # Handle Shortcuts
-        self.setFocusPolicy(QtCore.Qt.StrongFocus)
 
-        # Connexions
-        self.rowAdded.connect(self.on_content_changed)
-        self.rowsCleared.connect(self.on_content_changed)
-        self.verticalHeader().sectionClicked.connect(self.on_vertical_header_clicked)
+class ATTapInput(QtCore.QThread):
+    """
+    Receive taps from the network in the background.
+    ---
+    Taps are timestamped on the capture clock by this thread as soon as
+    they arrive, then sent to the interface.
+    """
+
+    tapped = QtCore.Signal(str, int, object)
 
-    def add_row(self, time, frame, note):
+    def __init__(self, timer, parent=None):
+        super(ATTapInput, self).__init__(parent)
+
+        self.timer = timer
+        self.server = None
+        self._stop = False
+
+    def start_server(self, port, host='127.0.0.1'):
         """
-        Append a new row to the table.
+        :raise socket.error: if the port cannot be used.
         """
-        # If nothing yet... Initialize !
-        if not self.rowCount():
-            self._init()
+        self.stop()
 
-        # Create a new empty row
-        self.insertRow(self.rowCount())
+        self.server = core.ATTapServer(port, host).open()
+        self._stop = False  # Here, not in run: a stop before the thread runs must not be lost
+        self.start()
 
-        # Create cells
-        time_cell = QtGui.QTableWidgetItem(str(time))
-        time_cell.setFlags(time_cell.flags() ^ QtCore.Qt.ItemIsEditable)
-        time_cell.setTextAlignment(QtCore.Qt.AlignCenter)
+    def run(self):
+        self.server.serve(self.tapped.emit, self.timer.stamp, lambda: self._stop)
+
+    def stop(self):
+        self._stop = True
+        self.wait()
 
-        frame_cell = QtGui.QTableWidgetItem(str(frame))
-        frame_cell.setFlags(frame_cell.flags() ^ QtCore.Qt.ItemIsEditable)
-        frame_cell.setTextAlignment(QtCore.Qt.AlignCenter)
+        if self.server is not None:
+            self.server.close()
+            self.server = None
 
-        interval_cell = QtGui.QTableWidgetItem(u'-')
-        interval_cell.setFlags(interval_cell.flags() ^ QtCore.Qt.ItemIsEditable)
-        interval_cell.setTextAlignment(QtCore.Qt.AlignCenter)
 
-        # Calc interval
-        if self.rowCount() > 1:
-            interval = int(frame) - int(self.item(self.rowCount() - 2, 1).text())
-            interval_cell.setText(str(interval))
+class ATLiveMirror(QtCore.QThread):
+    """
+    Receive the live broadcast of another Animation Timer in the background.
+    """
 
-        note_cell = QtGui.QTableWidgetItem(str(note))
-        note_cell.setToolTip(u"Double click to edit")
-        note_cell.setTextAlignment(QtCore.Qt.AlignVCenter)
+    received = QtCore.Signal(int, object)
 
-        # Set items
-        self.setItem(self.rowCount() - 1, 0, time_cell)
-        self.setItem(self.rowCount() - 1, 1, frame_cell)
-        self.setItem(self.rowCount() - 1, 2, interval_cell)
-        self.setItem(self.rowCount() - 1, 3, note_cell)
+    def __init__(self, parent=None):
+        super(ATLiveMirror, self).__init__(parent)
 
-        # Emit a signal
-        self.rowAdded.emit()
+        self.subscriber = None
+        self.ignore = None  # Our own broadcast
+        self._stop = False
 
-    def export_data(self):
+    def start_subscriber(self, host, port):
         """
-        Export all data in the table as a dict.
-        Can be used for saving data in a file.
-        :return: dict
+        :raise socket.error: if the port cannot be used.
         """
-        l = list()
+        self.stop()
 
-        for row in range(0, self.rowCount()):
+        self.subscriber = core.ATLiveSubscriber(host, port, self.ignore).open()
+        self._stop = False  # Here, not in run: a stop before the thread runs must not be lost
+        self.start()
 
-            temp = dict()
-            temp['time'] = self.item(row, 0).text()
-            temp['frame'] = self.item(row, 1).text()
-            temp['interval'] = self.item(row, 2).text()
-            temp['note'] = self.item(row, 3).text()
+    def run(self):
+        self.subscriber.serve(self.received.emit, lambda: self._stop)
 
-            l.append(temp)
+    def stop(self):
+        self._stop = True
+        self.wait()
 
-        return l
+        if self.subscriber is not None:
+            self.subscriber.close()
+            self.subscriber = None
 
-    def import_data(self, data):
-        """
-        Import data to the central widget list.
-        :param data: list of dict.
-        :return: void
-        """
-        for row in data:
-            self.add_row(row['time'], row['frame'], row['note'])
 
-    def clear(self, *args, **kwargs):
-        super(ATCenterList, self).clear(*args, **kwargs)
+class ATCueThread(QtCore.QThread):
+    """
+    Cue the captures of a take in the background while recording.
+    ---
+    Cues are timed by this thread on the capture clock, so a busy
+    interface delays how they are shown, not when they are given.
+    """
 
-        # Remove Columns
-        while self.columnCount() > 0:
-            self.removeColumn(0)
+    cued = QtCore.Signal(int, int)
 
-        # Remove Rows
-        while self.rowCount() > 0:
-            self.removeRow(0)
+    def __init__(self, parent=None):
+        super(ATCueThread, self).__init__(parent)
 
-        self.rowsCleared.emit()
+        self.scheduler = core.ATCueScheduler([], None)
+        self._stop = False
 
-    # ---
+    def start_cues(self, take, clock):
+        self.stop()
 
-    def _init(self):
-        # Add 4 columns if nothing
-        if self.columnCount() is 0:
-            for c in range(0, ATCenterList.MAX_COLS):
-                self.insertColumn(0)
+        self.scheduler = core.ATCueScheduler.from_take(take, clock)
+        self._stop = False  # Here, not in run: a stop before the thread runs must not be lost
+        self.start()
 
-        # Set columns' labels
-        self.setHorizontalHeaderLabels(ATCenterList.COLS_NAMES)
+    def run(self):
+        self.scheduler.run(self.cued.emit, lambda: self._stop)
 
-        # Hide columns if needed.
-        self.col_interval_toggle_visibility()
-        self.col_note_toggle_visibility()
+    def stop(self):
+        self._stop = True
+        self.wait()
 
-    def col_interval_toggle_visibility(self):
-        if self.parent.action_column_interval.isChecked():
-            self.setColumnHidden(2, False)
-        else:
-            self.setColumnHidden(2, True)
 
-    def col_note_toggle_visibility(self):
-        if self.parent.action_column_note.isChecked():
-            self.setColumnHidden(3, False)
-        else:
-            self.setColumnHidden(3, True)
+class ATCaptureModel(QtCore.QAbstractTableModel):
+    """
+    Expose the captures of a take to the Center List.
+    Cells are built on demand, so only visible rows cost something.
+    """
 
-    # ---
-    # Events
+    COLS_NAMES = ['Time', 'Frame', 'Interval', 'Note', 'Track']
+    FILTER_ROLE = QtCore.Qt.UserRole + 1  # u"1" when the note matches filter_text
+    TRACK_COLORS = ["#C8C8C8", "#60A0E0", "#E08060", "#80C060", "#C080D0", "#E0C060", "#60C0B0", "#D06080"]
 
-    def keyPressEvent(self, event):
-        if event.key() == QtCore.Qt.Key_Space:
-            self.parent.on_start_btn_clicked()
-            event.accept()
-        elif event.key() == QtCore.Qt.Key_Escape:
-            self.parent.on_stop_btn_clicked()
-            event.accept()
-        elif event.key() == QtCore.Qt.Key_Delete or event.key() == QtCore.Qt.Key_Backspace:
-            self.parent.on_reset_btn_clicked()
-            event.accept()
-        else:
-            # Make sure usual keys get dealt with
-            super(ATCenterList, self).keyPressEvent(event)
+    noteEdited = QtCore.Signal(int, unicode)
 
-    def focusOutEvent(self, *args, **kwargs):
-        # When this widget loose the focus, stop the timer
-        setting = AnimationTimer.load_settings_file()
-        if setting.value("Preferences/stop_timer_on_out_focus", True):
-            self.parent.on_stop_btn_clicked()
+    def __init__(self, parent=None):
+        super(ATCaptureModel, self).__init__(parent)
 
-        super(ATCenterList, self).focusOutEvent(*args, **kwargs)
+        self.take = ATTake()
+        self.filter_text = u""
+
+    def set_take(self, take):
+        """
+        Show another take. The view is reset in one go.
+        """
+        self.beginResetModel()
+        self.take = take if take is not None else ATTake()
+        self.endResetModel()
+
+    def append(self, captures):
+        """
+        :param captures: list of tuple (ms, note)
+        """
+        first = len(self.take)
+
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(captures) - 1)
+        self.take.extend(captures)
+        self.endInsertRows()
 
     # ---
 
-    @QtCore.Slot()
-    def on_content_changed(self):
-        if self.parent.file is None:
-            if self.rowCount() > 0:
-                self.changed = True
-                self.parent.file_info_label.setText(u"Untitled*")
-            else:
-                self.changed = False
-                self.parent.file_info_label.setText(u"Untitled")
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(self.take)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+
+        return len(ATCaptureModel.COLS_NAMES)
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        col = index.column()
+
+        if role == ATCaptureModel.FILTER_ROLE:
+            # The index keeps the result of the last search: rows cost a lookup
+            rows = self.take.note_index.search(self.filter_text)
+            return u"1" if rows is None or row in rows else u"0"
+
+        elif role in (QtCore.Qt.DisplayRole, QtCore.Qt.EditRole):
+            if col == 0:
+                return self.take.text(row)
+            elif col == 1:
+                return str(self.take.frame(row))
+            elif col == 2:
+                interval = self.take.interval(row)
+                return u'-' if interval is None else str(interval)
+            elif col == 3:
+                return self.take.note(row)
+            elif col == 4:
+                return self.take.track(row)
+
+        elif role == QtCore.Qt.TextAlignmentRole:
+            if col == 3:
+                return QtCore.Qt.AlignVCenter
+            return QtCore.Qt.AlignCenter
+
+        elif role == QtCore.Qt.ToolTipRole:
+            if col == 3:
+                return u"Double click to edit"
+            elif col == 1:
+                return u"Frame %.2f - %s" % (self.take.exact_frame(row), self.take.timecode(row))
+            elif col == 0 and self.take.scores is not None:
+                score = self.take.scores[row]
+                if score is None:
+                    return u"Not aligned with the other takes"
+                return u"Outlier score: %.1f" % score
+
+        elif role == QtCore.Qt.ForegroundRole:
+            if col == 4:
+                return QtGui.QBrush(QtGui.QColor(ATCaptureModel.track_color(self.take.channel(row))))
+            if col == 0 and self.take.scores is not None:
+                score = self.take.scores[row]
+                if score is None or score > ATConsensus.OUTLIER_THRESHOLD:
+                    return QtGui.QBrush(QtGui.QColor("#D05050"))
+
+        return None
+
+    def setData(self, index, value, role=QtCore.Qt.EditRole):
+        if not index.isValid() or index.column() != 3 or role != QtCore.Qt.EditRole:
+            return False
+
+        # Applied by the Center List, so it can be undone
+        if value != self.take.note(index.row()):
+            self.noteEdited.emit(index.row(), value)
+
+        return True
+
+    def remove_rows(self, rows):
+        """
+        Delete captures, the view is told once.
+        :param rows: sorted list of int
+        :return: list of tuple (ms, note, channel) removed
+        """
+        contiguous = rows[-1] - rows[0] + 1 == len(rows)
+
+        if contiguous:
+            self.beginRemoveRows(QtCore.QModelIndex(), rows[0], rows[-1])
         else:
-            if self.export_data() == self.parent.file.data:
-                self.changed = False
-                self.parent.file_info_label.setText(self.parent.file.fileName())
-            else:
-                self.changed = True
-                self.parent.file_info_label.setText(self.parent.file.fileName() + u'*')
+            self.beginResetModel()
 
-        if self.changed:
-            self.parent.action_discard_current_changes.setEnabled(True)
+        captures = self.take.delete(rows)
+
+        if contiguous:
+            self.endRemoveRows()
+
+            # Only the interval of the row after the deleted ones changes
+            if rows[0] < len(self.take):
+                self.dataChanged.emit(self.index(rows[0], 2), self.index(rows[0], 2))
         else:
-            self.parent.action_discard_current_changes.setEnabled(False)
+            self.endResetModel()
 
-        self.contentChanged.emit(self.changed)
+        return captures
 
-    def on_vertical_header_clicked(self):
+    def insert_rows(self, rows, captures):
         """
-        By clicking on the row id, it start the playback from the current frame specified on this row.
-        Each click restart the playback from this frame number.
-        :param logicalIndex:
-        :return:
+        Put back deleted captures, the view is told once.
         """
-        pass
-        # Get the frame number for the row
-        data = int(self.item(self.currentRow(), 1).text())
+        contiguous = rows[-1] - rows[0] + 1 == len(rows)
 
-        # Playback
-        pm.currentTime(data)
-
-        if self.parent.sound_btn.isChecked():
-            pm.play(forward=True, playSound=True)
+        if contiguous:
+            self.beginInsertRows(QtCore.QModelIndex(), rows[0], rows[-1])
         else:
-            pm.play(forward=True, playSound=False)
+            self.beginResetModel()
 
+        self.take.insert(rows, captures)
 
-class ATFile(QtCore.QFile):
-    """
-    File object to manage timing file.
-    """
-    def __init__(self, name, parent=None):
-        super(ATFile, self).__init__(name, parent)
-        self.parent = parent
+        if contiguous:
+            self.endInsertRows()
 
-        self.fps = None
-        self.offset_time = 0
-        self.offset_frame = 0
-        self.data = None
+            if rows[-1] + 1 < len(self.take):
+                self.dataChanged.emit(self.index(rows[-1] + 1, 2), self.index(rows[-1] + 1, 2))
+        else:
+            self.endResetModel()
 
-    def __getitem__(self, item):
-        return self.data[item]
+    @staticmethod
+    def track_color(channel):
+        return ATCaptureModel.TRACK_COLORS[channel % len(ATCaptureModel.TRACK_COLORS)]
 
-    def save(self):
+    def set_note(self, row, text):
+        self.take.set_note(row, text)
+
+        index = self.index(row, 3)
+        self.dataChanged.emit(index, index)
+
+    def set_times(self, rows, times):
         """
-        Save the file to the disk
-        :return: void
+        Move captures, the view is told once for all of them.
         """
-        # Populate the file with latest data
-        self.populate()
-
-        # Add to recent timing or update if already exists
-        self.parent.recent_timings.add(self)
+        if not rows:
+            return
 
-        # Save it to a file
-        data = self._prepare_saving_data()
-        with open(self.fileName(), "w") as f:
-            json.dump(data, f, indent=4, separators=(',', ': '))
+        self.take.set_times(rows, times)
 
-        # Set file changed of False
-        self.parent.central_list.changed = False
-        self.parent.central_list.on_content_changed()
+        # The interval of the next row changes too
+        last = min(max(rows) + 1, len(self.take) - 1)
+        self.dataChanged.emit(self.index(min(rows), 0), self.index(last, self.columnCount() - 1))
 
-    def load(self):
+    def refresh(self):
         """
-        Load a file data into the app.
-        :return: void
+        Tell the view every cell changed, after a timebase change.
         """
+        if len(self.take):
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.take) - 1, self.columnCount() - 1))
 
-        # Get data from file
-        with open(self.fileName(), "r") as f:
-            try:
-                data = json.load(f)
-            except ValueError:
-                return AnimationTimer.error("This file could not be read. Is it a valid JSON file with contents ?")
+    def flags(self, index):
+        flags = QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsSelectable
 
-        # Security
-        state = self._on_load_check(data)
-        if state is False:
-            return
+        if index.column() == 3:
+            flags |= QtCore.Qt.ItemIsEditable
 
-        try:
-            # If no error, Reset interface
-            self.parent.on_reset_btn_clicked()
+        return flags
 
-            # Propagate data to file and app
-            self.propagate(data)
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+        if role != QtCore.Qt.DisplayRole:
+            return None
 
-            # Add to recent timing or update if already exists
-            self.parent.recent_timings.add(self)
-        except:
-            return AnimationTimer.error("Cannot load the file " + self.fileName() + ". It seems corrupted.")
+        if orientation == QtCore.Qt.Horizontal:
+            return ATCaptureModel.COLS_NAMES[section]
 
-        if self.parent.action_timing_on_timeline.isChecked() and self.data:
-            for row in self.data:
-                self.parent.node.add(row['frame'])
+        return str(section + 1)
 
-    # ---
 
-    def _prepare_saving_data(self):
-        now = datetime.now()
+class ATTakeCommand(QtGui.QUndoCommand):
+    """
+    Add or remove a whole take. The take itself is kept by the command,
+    its captures are never copied.
+    """
 
-        d = dict()
-        d['infos'] = {
-            'plugin_name': AnimationTimer.TITLE,
-            'plugin_version': AnimationTimer.VERSION,
-            'fps': self.fps,
-            'offset_time': self.offset_time,
-            'offset_frame': self.offset_frame,
-            'date': '{m}/{d}/{y} {h}:{min}:{s}'.format(
-                m=now.month,
-                d=now.day,
-                y=now.year,
-                h=now.hour,
-                min=now.minute,
-                s=now.second,
-            )
-        }
-        d['data'] = self.data
+    def __init__(self, center_list, take, index, add=True, text=u"", done=False):
+        super(ATTakeCommand, self).__init__(text)
 
-        return d
+        self.center_list = center_list
+        self.take = take
+        self.index = index
+        self.add = add
 
-    def _on_load_check(self, dic):
-        """
-        Verify data in the file before load.
-        Check for file info as : Title, Version and Date.
-        Check critical info as : FPS and Offsets
-        :param: dict
-        :return: bool
-        """
-        data = dic.get('infos', None)
+        self._skip = done  # Already applied when pushed, as a recording
+
+    def redo(self):
+        if self._skip:
+            self._skip = False
+            return
+
+        self._apply(self.add)
+
+    def undo(self):
+        self._apply(not self.add)
+
+    def _apply(self, add):
+        if add:
+            self.center_list._insert_take(self.index, self.take)
+        else:
+            self.center_list._remove_take(self.take)
+
+
+class ATClearCommand(QtGui.QUndoCommand):
+    """
+    Remove all the takes, as Reset does.
+    """
+
+    def __init__(self, center_list):
+        super(ATClearCommand, self).__init__(u"Reset")
+
+        self.center_list = center_list
+        self.state = center_list.session.state()
+
+    def redo(self):
+        self.center_list._clear()
+
+    def undo(self):
+        self.center_list._restore(self.state)
+
+
+class ATMoveCommand(QtGui.QUndoCommand):
+    """
+    Move captures of a take. Only the difference of each moved capture
+    is kept, see ATDelta.
+    """
+
+    def __init__(self, center_list, take, rows, times, text=u"Move Captures"):
+        super(ATMoveCommand, self).__init__(text)
+
+        self.center_list = center_list
+        self.take = take
+        self.delta = core.ATDelta(rows, [take.times[row] for row in rows], times)
+
+    def redo(self):
+        rows, times = self.delta.apply(self.take.times)
+        self.center_list._set_times(self.take, rows, times)
+
+    def undo(self):
+        rows, times = self.delta.apply(self.take.times, reverse=True)
+        self.center_list._set_times(self.take, rows, times)
+
+
+class ATDeleteCommand(QtGui.QUndoCommand):
+    """
+    Delete captures of a take. The deleted captures are kept to be put
+    back, the others are not copied.
+    """
+
+    def __init__(self, center_list, take, rows):
+        super(ATDeleteCommand, self).__init__(u"Delete Captures")
+
+        self.center_list = center_list
+        self.take = take
+        self.rows = array('l', rows)
+        self.captures = None
+
+    def redo(self):
+        self.captures = self.center_list._delete_rows(self.take, list(self.rows))
+
+    def undo(self):
+        self.center_list._insert_rows(self.take, list(self.rows), self.captures)
+
+
+class ATInsertCommand(QtGui.QUndoCommand):
+    """
+    Insert captures in a take, the opposite of ATDeleteCommand.
+    """
+
+    def __init__(self, center_list, take, rows, captures, text=u"Insert Captures"):
+        super(ATInsertCommand, self).__init__(text)
+
+        self.center_list = center_list
+        self.take = take
+        self.rows = array('l', rows)
+        self.captures = captures
+
+    def redo(self):
+        self.center_list._insert_rows(self.take, list(self.rows), self.captures)
+
+    def undo(self):
+        self.captures = self.center_list._delete_rows(self.take, list(self.rows))
+
+
+class ATNoteCommand(QtGui.QUndoCommand):
+    """
+    Edit the note of a capture.
+    """
+
+    def __init__(self, center_list, take, row, text):
+        super(ATNoteCommand, self).__init__(u"Edit Note")
+
+        self.center_list = center_list
+        self.take = take
+        self.row = row
+        self.old = take.note(row)
+        self.new = text
+
+    def redo(self):
+        self.center_list._set_note(self.take, self.row, self.new)
+
+    def undo(self):
+        self.center_list._set_note(self.take, self.row, self.old)
+
+
+class ATCenterList(QtGui.QTableView):
+    """
+    Center List object.
+    """
+
+    rowAdded = QtCore.Signal()
+    rowsCleared = QtCore.Signal()
+    contentChanged = QtCore.Signal(bool)
+    takesChanged = QtCore.Signal()
+    timesChanged = QtCore.Signal()
+
+    def __init__(self, parent):
+        super(ATCenterList, self).__init__(parent)
+        self.parent = parent
+
+        self.fps = core.ATTimebase.get(parent.fps_label.text())
+        self.offset = 0  # ms
+
+        self.session = ATSession(self.fps, self.offset)
+        self.session.new_take()
+
+        self.capture_model = ATCaptureModel(self)
+        self.capture_model.set_take(self.session.current)
+
+        # Rows are filtered on a role of the model: with no filter, the proxy
+        # accepts them without asking
+        self.filter_model = QtGui.QSortFilterProxyModel(self)
+        self.filter_model.setSourceModel(self.capture_model)
+        self.filter_model.setFilterRole(ATCaptureModel.FILTER_ROLE)
+        self.filter_model.setFilterKeyColumn(0)
+        self.filter_model.setDynamicSortFilter(True)
+        self.setModel(self.filter_model)
+
+        self.setSelectionMode(QtGui.QAbstractItemView.ExtendedSelection)
+        self.horizontalHeader().setResizeMode(QtGui.QHeaderView.Stretch)
+        self.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        self.setShowGrid(False)
+        self.setGridStyle(QtCore.Qt.DashLine)
+
+        self.changed = False
+        self.timebase_changed = False  # fps or offset changed since the last save
+
+        # History of the changes
+        self.undo_stack = QtGui.QUndoStack(self)
+        self._recording = None  # Take being recorded
+
+        # Hide columns if needed.
+        self.col_interval_toggle_visibility()
+        self.col_note_toggle_visibility()
+        self.col_track_toggle_visibility()
+
+        # Handle Shortcuts
+        self.setFocusPolicy(QtCore.Qt.StrongFocus)
+
+        # Connexions
+        self.rowAdded.connect(self.on_content_changed)
+        self.rowsCleared.connect(self.on_content_changed)
+        self.takesChanged.connect(self.on_content_changed)
+        self.timesChanged.connect(self.on_content_changed)
+        self.capture_model.dataChanged.connect(self.on_content_changed)
+        self.capture_model.noteEdited.connect(self.set_note)
+        self.capture_model.modelReset.connect(self.col_track_toggle_visibility)
+        self.undo_stack.cleanChanged.connect(self.on_content_changed)
+        self.verticalHeader().sectionClicked.connect(self.on_vertical_header_clicked)
+
+    def rowCount(self):
+        return self.capture_model.rowCount()
+
+    def add_row(self, ms, note):
+        """
+        Append a new row to the current take.
+        """
+        self.add_rows([(ms, note)])
+
+    def add_rows(self, captures):
+        """
+        Append several rows to the current take at once.
+        Signals are emitted only once for the whole batch.
+        :param captures: list of tuple (ms since Start, note)
+        :return: void
+        """
+        if not captures:
+            return
+
+        self.capture_model.append(captures)
+
+        # Emit a signal
+        self.rowAdded.emit()
+
+    def export_data(self):
+        """
+        Export all data of the current take as a list of dict.
+        Can be used for saving data in a file.
+        :return: list
+        """
+        l = list()
+
+        for row in range(0, self.rowCount()):
+
+            temp = dict()
+            temp['time'] = self.capture_model.index(row, 0).data()
+            temp['frame'] = self.capture_model.index(row, 1).data()
+            temp['interval'] = self.capture_model.index(row, 2).data()
+            temp['note'] = self.capture_model.index(row, 3).data()
+
+            if self.session.current.tracks:
+                temp['track'] = self.capture_model.index(row, 4).data()
+
+            l.append(temp)
+
+        return l
+
+    def export_takes(self):
+        """
+        Export all the takes of the session.
+        :return: dict
+        """
+        return self.session.to_dict()
+
+    def import_data(self, data, takes=None):
+        """
+        Import data to the central widget list.
+        :param data: list of dict. Used when no takes are provided.
+        :param takes: dict as exported by export_takes.
+        :return: void
+        """
+        if takes:
+            self.session = ATSession.from_dict(takes, self.fps, self.offset)
+        else:
+            self.session = ATSession(self.fps, self.offset)
+            self.session.new_take().extend(self._rows_to_captures(data))
+
+        if self.session.current is None:
+            self.session.new_take()
+
+        self.capture_model.set_take(self.session.current)
+
+        # A new timing, a new history
+        self._recording = None
+        self.undo_stack.clear()
+
+        self.takesChanged.emit()
+
+    def clear(self):
+        """
+        Remove all takes. It can be undone.
+        """
+        self._recording = None
+
+        if self.session.is_empty():
+            return self._clear()
+
+        self.undo_stack.push(ATClearCommand(self))
+
+    def set_clean(self):
+        """
+        The timing matches its file: saved or just loaded.
+        """
+        self.timebase_changed = False
+        self.undo_stack.setClean()
+        self.on_content_changed()
+
+    def revert(self):
+        """
+        Undo the changes made since the file was saved or loaded.
+        :return: bool False if the history cannot do it
+        """
+        clean = self.undo_stack.cleanIndex()
+
+        if clean < 0 or self.timebase_changed:
+            return False
+
+        self.undo_stack.setIndex(clean)
+        return True
+
+    # ---
+
+    def new_take(self, tracks=None):
+        """
+        Start a new take. The current one is reused if still empty.
+        :param tracks: list of str names, to record several tracks
+        :return: void
+        """
+        if self.session.current is None or len(self.session.current):
+            self.session.new_take()
+
+        self.session.current.tracks = list(tracks or [])
+        self.capture_model.set_take(self.session.current)
+
+        self.takesChanged.emit()
+
+    def begin_record(self, tracks=None):
+        """
+        Start the take filled by the timer.
+        :param tracks: list of str names, to record several tracks
+        """
+        self.new_take(tracks)
+        self._recording = self.session.current
+
+    def end_record(self):
+        """
+        The recording becomes one step of the history.
+        """
+        take, self._recording = self._recording, None
+
+        if take is not None and len(take) and take in self.session.takes:
+            self.undo_stack.push(ATTakeCommand(self, take, self.session.takes.index(take), True,
+                                               u"Record %s" % take.name, done=True))
+
+    def add_take(self, name, data, origin=None, tracks=None):
+        """
+        Add a take built from exported rows and make it the current one.
+        :param name: str
+        :param data: list of dict, same as import_data, with the 'channel' of multi-track rows
+        :param origin: ATTake.CONSENSUS, SOUND or MERGE for a take not tapped
+        :param tracks: list of str names of the tracks of a multi-track take
+        :return: void
+        """
+        take = self.session.new_take(name)
+        take.origin = origin
+        take.tracks = list(tracks or [])
+        take.extend(self._rows_to_captures(data))
+
+        self.capture_model.set_take(take)
+        self.takesChanged.emit()
+
+        self.undo_stack.push(ATTakeCommand(self, take, self.session.index, True, u"Add %s" % take.name, done=True))
+
+    def select_take(self, index):
+        if index < 0 or index == self.session.index:
+            return
+
+        self.session.select(index)
+        self.capture_model.set_take(self.session.current)
+
+        self.takesChanged.emit()
+
+    def remove_take(self, index=None):
+        index = self.session.index if index is None else index
+        take = self.session[index]
+
+        self.undo_stack.push(ATTakeCommand(self, take, index, False, u"Delete %s" % take.name))
+
+    def set_times(self, rows, times, text=u"Move Captures"):
+        """
+        Move captures of the current take in one model update and one
+        step of the history.
+        :param rows: list of int
+        :param times: list of int ms, offset excluded
+        :return: void
+        """
+        if rows:
+            self.undo_stack.push(ATMoveCommand(self, self.session.current, rows, times, text))
+
+    def set_note(self, row, text):
+        self.undo_stack.push(ATNoteCommand(self, self.session.current, row, text))
+
+    def delete_rows(self, rows):
+        """
+        Delete captures of the current take, as one step of the history.
+        :param rows: sorted list of int
+        :return: void
+        """
+        if rows:
+            self.undo_stack.push(ATDeleteCommand(self, self.session.current, rows))
+
+    def insert_captures(self, captures, text=u"Insert Captures"):
+        """
+        Insert captures at their time in the current take, as one step of
+        the history.
+        :param captures: list of tuple (ms, note, channel) in time order
+        :return: void
+        """
+        if not captures:
+            return
+
+        if self.session.current is None:
+            self.new_take()
+
+        take = self.session.current
+        rows = [bisect_right(take.times, capture[0]) + i for i, capture in enumerate(captures)]
+
+        self.undo_stack.push(ATInsertCommand(self, take, rows, captures, text))
+
+    def selected_rows(self):
+        """
+        :return: sorted list of int, rows of the take
+        """
+        return sorted(self.filter_model.mapToSource(index).row() for index in self.selectionModel().selectedRows())
+
+    def select_row(self, row):
+        """
+        Select a capture of the take, if the notes filter shows it.
+        """
+        index = self.filter_model.mapFromSource(self.capture_model.index(row, 0))
+        if index.isValid():
+            self.selectRow(index.row())
+
+    def filter_notes(self, text):
+        """
+        Show only the captures whose note matches, see ATNoteIndex.search.
+        :param text: str words and #tags, empty to show all
+        :return: void
+        """
+        self.capture_model.filter_text = text
+        self.filter_model.setFilterFixedString(u"1" if text.strip() else u"")
+        self.filter_model.invalidate()
+
+    def set_timebase(self, fps, offset):
+        """
+        Change fps and offset of all takes.
+        Frames, intervals and times are calculated again for the whole take.
+        :param fps: frame rate, see ATTimebase.get
+        :param offset: int ms
+        :return: void
+        """
+        fps = core.ATTimebase.get(fps)
+        if (fps, offset) == (self.fps, self.offset):
+            return
+
+        self.fps = fps
+        self.offset = offset
+
+        self.session.set_timebase(fps, offset)
+        self.capture_model.refresh()
+
+        self.timebase_changed = True
+        self.takesChanged.emit()
+
+    # ---
+    # Applied by the commands of the history
+
+    def _show(self, take):
+        """
+        Make a take current, so what is undone is seen.
+        """
+        if self.session.current is not take:
+            self.session.select(self.session.takes.index(take))
+            self.capture_model.set_take(take)
+            self.takesChanged.emit()
+
+    def _insert_take(self, index, take):
+        self.session.insert(index, take)
+        self.capture_model.set_take(take)
+
+        self.takesChanged.emit()
+
+    def _remove_take(self, take):
+        self.session.remove(self.session.takes.index(take))
+
+        if self.session.current is None:
+            self.session.new_take()
+
+        self.capture_model.set_take(self.session.current)
+
+        self.takesChanged.emit()
+
+    def _clear(self):
+        self.session.clear()
+        self.session.set_timebase(self.fps, self.offset)
+        self.session.new_take()
+        self.capture_model.set_take(self.session.current)
+
+        self.takesChanged.emit()
+        self.rowsCleared.emit()
+
+    def _restore(self, state):
+        self.session.restore(state)
+        self.capture_model.set_take(self.session.current)
+
+        self.takesChanged.emit()
+
+    def _set_times(self, take, rows, times):
+        self._show(take)
+        self.capture_model.set_times(rows, times)
+        self.timesChanged.emit()
+
+    def _set_note(self, take, row, text):
+        self._show(take)
+        self.capture_model.set_note(row, text)
+
+    def _delete_rows(self, take, rows):
+        self._show(take)
+        self.clearSelection()
+
+        captures = self.capture_model.remove_rows(rows)
+        self.timesChanged.emit()
+
+        return captures
+
+    def _insert_rows(self, take, rows, captures):
+        self._show(take)
+        self.capture_model.insert_rows(rows, captures)
+
+        # Select what came back
+        selection = QtGui.QItemSelection()
+        for row in rows:
+            index = self.filter_model.mapFromSource(self.capture_model.index(row, 0))
+            if index.isValid():
+                selection.select(index, index.sibling(index.row(), self.capture_model.columnCount() - 1))
+        self.selectionModel().select(selection, QtGui.QItemSelectionModel.ClearAndSelect)
+
+        self.timesChanged.emit()
+
+    def _rows_to_captures(self, data):
+        # Rows hold times with the offset
+        return [(AnimationTimer.parse_time(row['time']) - self.offset, row['note'], row.get('channel', 0))
+                for row in data]
+
+    # ---
+
+    def col_interval_toggle_visibility(self):
+        if self.parent.action_column_interval.isChecked():
+            self.setColumnHidden(2, False)
+        else:
+            self.setColumnHidden(2, True)
+
+    def col_note_toggle_visibility(self):
+        if self.parent.action_column_note.isChecked():
+            self.setColumnHidden(3, False)
+        else:
+            self.setColumnHidden(3, True)
+
+    def col_track_toggle_visibility(self):
+        # Only multi-track takes have a Track column
+        self.setColumnHidden(4, not self.capture_model.take.tracks)
+
+    # ---
+    # Events
+
+    def keyPressEvent(self, event):
+        if event.key() == QtCore.Qt.Key_Space:
+            self.parent.on_start_btn_clicked()
+            event.accept()
+        elif event.key() == QtCore.Qt.Key_Escape:
+            self.parent.on_stop_btn_clicked()
+            event.accept()
+        elif event.key() in self.parent.track_keys and self.parent.timer.isActive():
+            if not event.isAutoRepeat():
+                self.parent._capture(self.parent.track_keys[event.key()])
+            event.accept()
+        elif event.key() == QtCore.Qt.Key_Delete or event.key() == QtCore.Qt.Key_Backspace:
+            if self.selected_rows() and not self.parent.timer.isActive():
+                self.delete_rows(self.selected_rows())
+            else:
+                self.parent.on_reset_btn_clicked()
+            event.accept()
+        else:
+            # Make sure usual keys get dealt with
+            super(ATCenterList, self).keyPressEvent(event)
+
+    def focusOutEvent(self, *args, **kwargs):
+        # When this widget loose the focus, stop the timer
+        setting = AnimationTimer.load_settings_file()
+        if setting.value("Preferences/stop_timer_on_out_focus", True):
+            self.parent.on_stop_btn_clicked()
+
+        super(ATCenterList, self).focusOutEvent(*args, **kwargs)
+
+    # ---
+
+    @QtCore.Slot()
+    def on_content_changed(self, *args):
+        if self.parent.file is None:
+            if not self.session.is_empty():
+                self.changed = True
+                self.parent.file_info_label.setText(u"Untitled*")
+            else:
+                self.changed = False
+                self.parent.file_info_label.setText(u"Untitled")
+        else:
+            # The history knows whether the file was left: no need to compare the takes
+            if self.undo_stack.isClean() and not self.timebase_changed:
+                self.changed = False
+                self.parent.file_info_label.setText(self.parent.file.fileName())
+            else:
+                self.changed = True
+                self.parent.file_info_label.setText(self.parent.file.fileName() + u'*')
+
+        if self.changed:
+            self.parent.action_discard_current_changes.setEnabled(True)
+        else:
+            self.parent.action_discard_current_changes.setEnabled(False)
+
+        self.contentChanged.emit(self.changed)
+
+    def on_vertical_header_clicked(self, logical_index):
+        """
+        By clicking on the row id, it start the playback from the current frame specified on this row.
+        Each click restart the playback from this frame number.
+        :param logical_index: int row of the view
+        :return:
+        """
+        # Get the frame number for the row
+        row = self.filter_model.mapToSource(self.filter_model.index(logical_index, 0)).row()
+        data = self.capture_model.take.frames[row]
+
+        # Playback
+        pm.currentTime(data)
+
+        if self.parent.sound_btn.isChecked():
+            pm.play(forward=True, playSound=True)
+        else:
+            pm.play(forward=True, playSound=False)
+
+
+class ATFile(QtCore.QFile):
+    """
+    File object to manage timing file.
+    """
+    def __init__(self, name, parent=None):
+        super(ATFile, self).__init__(name, parent)
+        self.parent = parent
+
+        self.fps = None
+        self.offset_time = 0
+        self.offset_frame = 0
+        self.duration = 0  # ms
+        self.data = None
+        self.takes = dict()
+
+    def __getitem__(self, item):
+        return self.data[item]
+
+    def save(self):
+        """
+        Save the file to the disk
+        :return: void
+        """
+        # Populate the file with latest data
+        self.populate()
+
+        # Add to recent timing or update if already exists
+        self.parent.recent_timings.add(self)
+
+        # Save it to a file
+        data = self._prepare_saving_data()
+        ATTimingFile.write(self.fileName(), data)
+
+        # Set file changed of False
+        self.parent.central_list.set_clean()
+
+    def load(self):
+        """
+        Load a file data into the app.
+        :return: void
+        """
+
+        # Get data from file
+        try:
+            data = ATTimingFile.read(self.fileName())
+        except (IOError, ValueError):
+            return AnimationTimer.error("This file could not be read. Is it a valid timing file with contents ?")
+
+        # Security
+        state = self._on_load_check(data)
+        if state is False:
+            return
+
+        try:
+            # If no error, Reset interface
+            self.parent.on_reset_btn_clicked()
+
+            # Propagate data to file and app
+            self.propagate(data)
+
+            # Add to recent timing or update if already exists
+            self.parent.recent_timings.add(self)
+        except:
+            return AnimationTimer.error("Cannot load the file " + self.fileName() + ". It seems corrupted.")
+
+    # ---
+
+    def _prepare_saving_data(self):
+        now = datetime.now()
+
+        d = dict()
+        d['infos'] = {
+            'plugin_name': AnimationTimer.TITLE,
+            'plugin_version': AnimationTimer.VERSION,
+            'fps': self.fps,
+            'offset_time': self.offset_time,
+            'offset_frame': self.offset_frame,
+            'duration': self.duration,
+            'date': '{m}/{d}/{y} {h}:{min}:{s}'.format(
+                m=now.month,
+                d=now.day,
+                y=now.year,
+                h=now.hour,
+                min=now.minute,
+                s=now.second,
+            )
+        }
+        d['data'] = self.data
+        d['takes'] = self.takes
+
+        return d
+
+    def _on_load_check(self, dic):
+        """
+        Verify data in the file before load.
+        Check for file info as : Title, Version and Date.
+        Check critical info as : FPS and Offsets
+        :param: dict
+        :return: bool
+        """
+        data = dic.get('infos', None)
 
         plugin_name = data.get('plugin_name', None)
         plugin_version = data.get('plugin_version', None)
@@ -1384,270 +3065,1989 @@ class ATFile(QtCore.QFile):
         offset_time = data.get('offset_time', None)
         offset_frame = data.get('offset_frame', None)
 
-        # If not data whatsoever, do not load.
-        if data is None:
-            AnimationTimer.error("File header cannot be recovered. Data like 'fps' or 'offsets' are not available.")
-            AnimationTimer.error("Load aborted.")
-            return False
+        # If not data whatsoever, do not load.
+        if data is None:
+            AnimationTimer.error("File header cannot be recovered. Data like 'fps' or 'offsets' are not available.")
+            AnimationTimer.error("Load aborted.")
+            return False
+
+        if not plugin_name or plugin_name != AnimationTimer.TITLE:
+            AnimationTimer.warning("The plugin title could not be found in the save file.")
+            AnimationTimer.warning("Are you sure it is meant to be used in Animation Timer ?")
+
+        if not plugin_version:
+            AnimationTimer.warning("The version of this save file could not be found. Use it with caution.")
+
+        if plugin_version < AnimationTimer.VERSION:
+            AnimationTimer.error("Ancien save file are not compatible with this version of the script.")
+            AnimationTimer.error("Load aborted.")
+            return False
+
+        try:
+            fps = core.ATTimebase.get(fps) if fps else None
+        except (ValueError, ZeroDivisionError):
+            fps = None
+
+        if not fps:
+            AnimationTimer.warning("FPS data could not be found or is corrupted. Default FPS will be used.")
+            AnimationTimer.info("You can still change that in the options panel.")
+
+        if not offset_time or not isinstance(int(offset_time), int):
+            AnimationTimer.warning("Offset Time data could not be found or is corrupted.")
+            AnimationTimer.info("Offset Time will be set to 0.")
+            AnimationTimer.info("You can still change that in the options panel.")
+
+        if not offset_time or not isinstance(int(offset_time), int):
+            AnimationTimer.warning("Offset Frame data could not be found or is corrupted.")
+            AnimationTimer.info("Offset Frame will be set to 0.")
+            AnimationTimer.info("You can still change that in the options panel.")
+
+        return True
+
+    # ---
+
+    def populate(self):
+        """
+        From the app to the file.
+        """
+        data = self.parent.options_window.export_data()
+
+        self.fps = data.get('fps')
+        self.offset_time = data.get('offset_time')
+        self.offset_frame = data.get('offset_frame')
+        self.data = self.parent.central_list.export_data()
+        self.takes = self.parent.central_list.export_takes()
+        self.duration = self.parent.central_list.session.duration()
+
+    def propagate(self, data):
+        """
+        From the file to the app.
+        """
+        # The best way is to send data to options window and then activate the accepted function.
+        self.parent.options_window.restore_from_data(data)
+        self.parent.options_window.on_accepted()
+
+        # Save in ATFile too
+        infos = data.get('infos', None)
+        if infos:
+            self.fps = infos.get('fps', AnimationTimerOptions.default_fps)
+            self.offset_time = infos.get('offset_time', 0)
+            self.offset_frame = infos.get('offset_frame', 0)
+            self.duration = infos.get('duration', 0)
+
+        self.data = data.get('data', {})
+
+        # Import data to central_list
+        self.parent.central_list.import_data(self.data, data.get('takes'))
+
+        # Older files have no takes: keep them as the central list understood them
+        self.takes = self.parent.central_list.export_takes()
+        self.parent.central_list.set_clean()
+
+
+class ATRecentTimings(object):
+    """
+    Manage recent timing files.
+    """
+    MAX = 10
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.data = list()
+
+        settings = AnimationTimer.load_settings_file()
+        self.max_count = int(settings.value("Preferences/max_recent_timing", ATRecentTimings.MAX))
+
+        # Populate at launch from settings
+        self._load()
+
+    def __getitem__(self, item):
+        return self.data[item]
+
+    def add(self, f):
+        """
+        Add a recent timing to the list.
+        If already exists, make it to the top of the list.
+        :param f: ATFile obj
+        :return: void
+        """
+        if f in self.data:
+            self._update(f)
+        else:
+            if self.count >= self.max_count:
+                self.data.pop()
+
+            self.data.insert(0, f)
+
+        # Remove Duplicates
+        self._uniqify()
+
+    def remove(self, f):
+        """
+        Remove a recent timing from the list.
+        :param f: ATFile
+        :return: bool
+        """
+        self.data.remove(f)
+
+        # Remove Duplicates
+        self._uniqify()
+
+    def clear(self):
+        """
+        Clear the list of Recent Timings.
+        :return: void
+        """
+        self.data[:] = []
+
+    def all(self):
+        """
+        Return all the list of recent timings
+        :return: list
+        """
+        return self.data
+
+    # ---
+
+    def on_clear_triggerd(self):
+        """
+        When clearing recent timing items.
+        It is permanent. You will have to reopen a create new files to append to the list again.
+        :return:
+        """
+        self.clear()
+        self._uniqify()
+
+    # ---
+
+    @property
+    def count(self):
+        """
+        Count the number of file in Recent Timings
+        :return: int
+        """
+        return len(self.data)
+
+    # ---
+
+    def _update(self, f):
+        """
+        Update a recent timing by putting it to the top of the list.
+        :param f: ATFile obj
+        :return: void
+        """
+        self.remove(f)
+        self.add(f)
+
+        # Remove Duplicates
+        self._uniqify()
+
+    def _uniqify(self):
+        """
+        Remove all duplicates from data when preserving the order.
+        """
+        seen = set()
+        result = list()
+
+        for f in self.data:
+            if f.fileName() in seen: continue
+            result.append(f)
+            seen.add(f.fileName())
+
+        self.data[:] = result
+
+        # Save changes
+        self._save()
+
+        # Automatically generate the menu
+        self._generate_menu()
+
+    def _generate_menu(self):
+        """
+        Generate the menu
+        :return: void
+        """
+        if self.count > 0:
+            # Enabled the submenu
+            self.parent.submenu_recent_timing.setEnabled(True)
+
+            # Delete all actions in the menu to recreate them later
+            # Only temporary...
+            self.parent.submenu_recent_timing.clear()
+
+            # Add actions dynamically
+            for f in self.data:
+                # Create QAction
+                item = QtGui.QAction(f.fileName(), self.parent)
+                item.setAutoRepeat(False)
+                item.triggered.connect(self.parent.on_recent_item_triggered)
+
+                # Append to submenu
+                self.parent.submenu_recent_timing.addAction(item)
+
+            # Add management options at the bottom
+            item_clear = QtGui.QAction(u"Clear", self.parent)
+            item_clear.setAutoRepeat(False)
+            item_clear.triggered.connect(self.on_clear_triggerd)
+
+            self.parent.submenu_recent_timing.addSeparator()
+            self.parent.submenu_recent_timing.addAction(item_clear)
+
+        else:
+            self.parent.submenu_recent_timing.setEnabled(False)
+
+    def _save(self):
+        """
+        Save data to setting file.
+        :return: bool
+        """
+        settings = AnimationTimer.load_settings_file()
+        settings.beginGroup("RecentTimings")
+
+        # Remove everything inside that group
+        settings.remove('')
+
+        # Add new data
+        for key, value in enumerate(self.data):
+            settings.setValue("recent_timing_" + str(key+1), value.fileName())
+
+        settings.endGroup()
+
+    def _load(self):
+        """
+        Load data from setting file.
+        :return: bool
+        """
+        # Clear the list before hand
+        self.clear()
+
+        settings = AnimationTimer.load_settings_file()
+        settings.beginGroup("RecentTimings")
+
+        # Get all keys
+        keys = settings.allKeys()
+
+        # Populate
+        if keys:
+            for key in keys:
+                self.data.append(ATFile(settings.value(key)))
+
+        # Generate menu
+        self._generate_menu()
+
+        settings.endGroup()
+
+
+class ATIndexer(QtCore.QThread):
+    """
+    Scan the search directories in the background.
+    """
+
+    indexed = QtCore.Signal(int)
+
+    def __init__(self, index, roots, parent=None):
+        super(ATIndexer, self).__init__(parent)
+
+        self.index = index
+        self.roots = roots
+        self._stop = False
+
+    def start_scan(self, roots):
+        self.roots = roots
+        self._stop = False  # Here, not in run: a stop before the thread runs must not be lost
+        self.start()
+
+    def run(self):
+        self.indexed.emit(self.index.scan(self.roots, lambda: self._stop))
+
+    def stop(self):
+        self._stop = True
+        self.wait()
+
+
+class ATSearchWindow(QtGui.QDialog):
+    """
+    Search the timings of the search directories.
+    """
+
+    COLS_NAMES = ['Name', 'FPS', 'Captures', 'Takes', 'Duration', 'Directory']
+
+    def __init__(self, parent):
+        super(ATSearchWindow, self).__init__(parent)
+
+        self.parent = parent
+        self.setWindowTitle(u"Find Timing")
+        self.resize(600, 350)
+
+        self.index = ATTimingIndex(os.path.join(AnimationTimer.USER_PREFS_DIR, ATTimingIndex.FILENAME))
+        self.indexer = ATIndexer(self.index, AnimationTimer.search_directories(), self)
+
+        # Controls
+        self.search_edit = QtGui.QLineEdit()
+        self.search_edit.setPlaceholderText(u"Search in names, directories and notes")
+
+        self.reindex_btn = QtGui.QPushButton(u"Re-index")
+        self.reindex_btn.setToolTip(u"Look for new or modified timings in the search directories")
+
+        self.results = QtGui.QTableWidget(0, len(ATSearchWindow.COLS_NAMES))
+        self.results.setHorizontalHeaderLabels(ATSearchWindow.COLS_NAMES)
+        self.results.horizontalHeader().setStretchLastSection(True)
+        self.results.verticalHeader().setVisible(False)
+        self.results.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        self.results.setSelectionMode(QtGui.QAbstractItemView.SingleSelection)
+        self.results.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.results.setShowGrid(False)
+
+        self.status_label = QtGui.QLabel()
+        self.status_label.setStyleSheet("""
+                                        color:#888888;
+                                        font-style:italic;
+                                        """)
+
+        # Layout
+        search_layout = QtGui.QHBoxLayout()
+        search_layout.addWidget(self.search_edit)
+        search_layout.addWidget(self.reindex_btn)
+
+        main_layout = QtGui.QVBoxLayout()
+        main_layout.addLayout(search_layout)
+        main_layout.addWidget(self.results)
+        main_layout.addWidget(self.status_label)
+
+        self.setLayout(main_layout)
+
+        # Connections
+        self.search_edit.textChanged.connect(self.on_search_changed)
+        self.reindex_btn.clicked.connect(self.on_reindex_clicked)
+        self.results.itemDoubleClicked.connect(self.on_result_double_clicked)
+        self.indexer.indexed.connect(self.on_indexed)
+
+    # ---
+
+    def showEvent(self, event):
+        self.on_search_changed()
+        self.on_reindex_clicked()
+        super(ATSearchWindow, self).showEvent(event)
+
+    def closeEvent(self, event):
+        self.indexer.stop()
+        super(ATSearchWindow, self).closeEvent(event)
+
+    # ---
+
+    def on_search_changed(self):
+        rows = self.index.search(self.search_edit.text())
+
+        self.results.setUpdatesEnabled(False)
+        self.results.setRowCount(len(rows))
+
+        for i, row in enumerate(rows):
+            duration = core.format_time(row['duration'] or 0)
+            values = [row['name'], row['fps'], row['rows'], row['takes'], duration, os.path.dirname(row['path'])]
+
+            for col, value in enumerate(values):
+                item = QtGui.QTableWidgetItem(unicode(value))
+                item.setData(QtCore.Qt.UserRole, row['path'])
+                item.setToolTip(row['notes'] or row['path'])
+                self.results.setItem(i, col, item)
+
+        self.results.setUpdatesEnabled(True)
+
+        self.status_label.setText(u"%d of %d timings" % (len(rows), self.index.count()))
+
+    def on_reindex_clicked(self):
+        if self.indexer.isRunning():
+            return
+
+        self.reindex_btn.setEnabled(False)
+        self.status_label.setText(u"Indexing...")
+        self.indexer.start_scan(AnimationTimer.search_directories())
+
+    def on_indexed(self, count):
+        self.reindex_btn.setEnabled(True)
+        self.on_search_changed()
+
+    def on_result_double_clicked(self, item):
+        path = item.data(QtCore.Qt.UserRole)
+
+        if not os.path.exists(path):
+            return AnimationTimer.warning(u"Animation Timer: %s does not exist anymore." % path)
+
+        self.parent.file = ATFile(path, self.parent)
+        self.parent.file.load()
+
+
+class ATDiffWindow(QtGui.QDialog):
+    """
+    Compare two timings of a shot beat by beat, pick the changes of the
+    second one and merge them into a new take or a new timing.
+    """
+
+    COLS_NAMES = ['Take', 'Change', 'First', 'Frame', 'Second', 'Frame', 'Delta']
+    DIFF_ROWS = 5000
+
+    COLORS = {ATTimingDiff.SHIFTED: "#E0C060", ATTimingDiff.MISSING: "#E08060", ATTimingDiff.INSERTED: "#80C060"}
+
+    def __init__(self, parent):
+        super(ATDiffWindow, self).__init__(parent)
+
+        self.parent = parent
+        self.setWindowTitle(u"Compare Timings")
+        self.resize(560, 480)
+
+        self.diff = None
+        self.chosen = set()  # Entries taken from the second timing
+        self.shown = list()  # Entries of the table rows
+
+        # Controls
+        self.first_edit = QtGui.QLineEdit()
+        self.first_btn = QtGui.QPushButton(u"...")
+        self.first_btn.setFixedWidth(30)
+
+        self.second_edit = QtGui.QLineEdit()
+        self.second_btn = QtGui.QPushButton(u"...")
+        self.second_btn.setFixedWidth(30)
+
+        self.tolerance_spinbox = QtGui.QSpinBox()
+        self.tolerance_spinbox.setRange(0, 5000)
+        self.tolerance_spinbox.setSuffix(u" ms")
+        self.tolerance_spinbox.setSpecialValueText(u"Auto")
+        self.tolerance_spinbox.setToolTip(u"How far a beat can move and still be the same beat. "
+                                          u"Auto is half the median interval.")
+
+        self.compare_btn = QtGui.QPushButton(u"Compare")
+
+        self.same_checkbox = QtGui.QCheckBox(u"Show unchanged beats")
+
+        self.results = QtGui.QTableWidget(0, len(ATDiffWindow.COLS_NAMES))
+        self.results.setHorizontalHeaderLabels(ATDiffWindow.COLS_NAMES)
+        self.results.horizontalHeader().setStretchLastSection(True)
+        self.results.verticalHeader().setVisible(False)
+        self.results.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        self.results.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.results.setShowGrid(False)
+
+        self.status_label = QtGui.QLabel()
+        self.status_label.setStyleSheet("""
+                                        color:#888888;
+                                        font-style:italic;
+                                        """)
+
+        self.all_btn = QtGui.QPushButton(u"Take All")
+        self.none_btn = QtGui.QPushButton(u"Take None")
+        self.take_btn = QtGui.QPushButton(u"Add as Take")
+        self.take_btn.setToolTip(u"Add the merge to the session as a new take")
+        self.save_btn = QtGui.QPushButton(u"Save Merge As...")
+
+        # Layout
+        first_layout = QtGui.QHBoxLayout()
+        first_layout.addWidget(self.first_edit)
+        first_layout.addWidget(self.first_btn)
+
+        second_layout = QtGui.QHBoxLayout()
+        second_layout.addWidget(self.second_edit)
+        second_layout.addWidget(self.second_btn)
+
+        tolerance_layout = QtGui.QHBoxLayout()
+        tolerance_layout.addWidget(self.tolerance_spinbox)
+        tolerance_layout.addStretch()
+        tolerance_layout.addWidget(self.compare_btn)
+
+        settings_layout = QtGui.QFormLayout()
+        settings_layout.addRow(u"First", first_layout)
+        settings_layout.addRow(u"Second", second_layout)
+        settings_layout.addRow(u"Tolerance", tolerance_layout)
+
+        buttons_layout = QtGui.QHBoxLayout()
+        buttons_layout.addWidget(self.all_btn)
+        buttons_layout.addWidget(self.none_btn)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(self.take_btn)
+        buttons_layout.addWidget(self.save_btn)
+
+        main_layout = QtGui.QVBoxLayout()
+        main_layout.addLayout(settings_layout)
+        main_layout.addWidget(self.same_checkbox)
+        main_layout.addWidget(self.results)
+        main_layout.addWidget(self.status_label)
+        main_layout.addLayout(buttons_layout)
+
+        self.setLayout(main_layout)
+
+        # Connections
+        self.first_btn.clicked.connect(lambda: self.on_browse_clicked(self.first_edit))
+        self.second_btn.clicked.connect(lambda: self.on_browse_clicked(self.second_edit))
+        self.compare_btn.clicked.connect(self.on_compare_clicked)
+        self.same_checkbox.toggled.connect(self.show_entries)
+        self.results.itemChanged.connect(self.on_item_changed)
+        self.all_btn.clicked.connect(lambda: self.on_take_all_clicked(True))
+        self.none_btn.clicked.connect(lambda: self.on_take_all_clicked(False))
+        self.take_btn.clicked.connect(self.on_add_take_clicked)
+        self.save_btn.clicked.connect(self.on_save_clicked)
+
+        self.show_entries()
+
+    # ---
+
+    def showEvent(self, event):
+        # The timing opened is the first one by default
+        if not self.first_edit.text() and self.parent.file is not None:
+            self.first_edit.setText(self.parent.file.fileName())
+
+        super(ATDiffWindow, self).showEvent(event)
+
+    def show_entries(self, *args):
+        """
+        List the changes, and the unchanged beats when asked.
+        """
+        entries = self.diff.entries if self.diff is not None else []
+        same = self.same_checkbox.isChecked()
+
+        self.shown = [i for i, entry in enumerate(entries) if same or entry['kind'] != ATTimingDiff.SAME]
+        shown = self.shown[:ATDiffWindow.DIFF_ROWS]
+
+        self.results.blockSignals(True)
+        self.results.setUpdatesEnabled(False)
+        self.results.setRowCount(len(shown))
+
+        for row, index in enumerate(shown):
+            entry = entries[index]
+
+            take = QtGui.QTableWidgetItem()
+            if entry['kind'] != ATTimingDiff.SAME:
+                take.setFlags(QtCore.Qt.ItemIsEnabled | QtCore.Qt.ItemIsUserCheckable)
+                take.setCheckState(QtCore.Qt.Checked if index in self.chosen else QtCore.Qt.Unchecked)
+            else:
+                take.setFlags(QtCore.Qt.NoItemFlags)
+            self.results.setItem(row, 0, take)
+
+            values = [entry['kind'],
+                      core.format_time(entry['first']) if entry['first'] is not None else u'',
+                      entry['first_frame'] if entry['first_frame'] is not None else u'',
+                      core.format_time(entry['second']) if entry['second'] is not None else u'',
+                      entry['second_frame'] if entry['second_frame'] is not None else u'',
+                      u"%+d" % entry['delta'] if entry['delta'] is not None else u'']
+
+            color = ATDiffWindow.COLORS.get(entry['kind'])
+            for col, value in enumerate(values):
+                item = QtGui.QTableWidgetItem(unicode(value))
+                item.setToolTip(u"  ".join(text for text in (self.diff.track(entry),
+                                                             entry['note'] or entry['second_note']) if text))
+                if color is not None:
+                    item.setForeground(QtGui.QColor(color))
+                self.results.setItem(row, col + 1, item)
+
+        self.results.setUpdatesEnabled(True)
+        self.results.blockSignals(False)
+
+        self.show_status()
+
+    def show_status(self):
+        if self.diff is None:
+            self.status_label.setText(u"Choose two timings to compare")
+        else:
+            shown = min(len(self.shown), ATDiffWindow.DIFF_ROWS)
+            shown_text = u", first %d listed" % shown if shown < len(self.shown) else u""
+            self.status_label.setText(u"%s. %d change(s) taken from the second%s" % (self.diff.summary(),
+                                                                                    len(self.chosen), shown_text))
+
+        for widget in (self.all_btn, self.none_btn, self.take_btn, self.save_btn):
+            widget.setEnabled(self.diff is not None)
+
+    # ---
+
+    def on_browse_clicked(self, edit):
+        filename, _ = QtGui.QFileDialog.getOpenFileName(
+            self,
+            'Open Timing',
+            AnimationTimer.switch_filedialog_dir(),
+            'Timing Files (*.timing *.json *.timingb *.csv)',
+            '',
+            QtGui.QFileDialog.DontUseNativeDialog
+        )
+
+        if filename:
+            edit.setText(filename)
+
+    def on_compare_clicked(self):
+        try:
+            self.diff = ATTimingDiff.from_files(self.first_edit.text(), self.second_edit.text(),
+                                                self.tolerance_spinbox.value() or None)
+        except (IOError, OSError, ValueError) as e:
+            self.diff = None
+            AnimationTimer.error(u"Animation Timer: cannot compare the timings: %s" % e)
+
+        self.chosen = set()
+        self.show_entries()
+
+    def on_item_changed(self, item):
+        if item.column() != 0 or item.row() >= len(self.shown):
+            return
+
+        index = self.shown[item.row()]
+        if item.checkState() == QtCore.Qt.Checked:
+            self.chosen.add(index)
+        else:
+            self.chosen.discard(index)
+
+        self.show_status()
+
+    def on_take_all_clicked(self, take):
+        self.chosen = set(self.diff.changes()) if take and self.diff is not None else set()
+        self.show_entries()
+
+    def on_add_take_clicked(self):
+        if self.diff is None:
+            return
+
+        rows = [{'time': core.format_time(ms), 'note': note, 'channel': channel}
+                for ms, note, channel in self.diff.merge(self.chosen)]
+        self.parent.central_list.add_take(u"Merge", rows, ATTake.MERGE, self.diff.tracks)
+
+    def on_save_clicked(self):
+        if self.diff is None:
+            return
+
+        dialog = AnimationTimer.open_save_window(self)
+        if not dialog.exec_():
+            return
+
+        path = dialog.selectedFiles()[0]
+        try:
+            ATTimingFile.write(path, self.diff.merged_data(self.chosen))
+        except (IOError, OSError) as e:
+            return AnimationTimer.error(u"Animation Timer: cannot save %s: %s" % (path, e))
+
+        AnimationTimer.info(u"Animation Timer: merge saved as %s." % path)
+
+
+class ATOnsetDetection(QtCore.QThread):
+    """
+    Detect the onsets of a sound in the background.
+    """
+
+    detected = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super(ATOnsetDetection, self).__init__(parent)
+
+        self.detector = None
+        self.error = None
+        self._stop = False
+
+    def start_detection(self, detector):
+        self.detector = detector
+        self._stop = False  # Here, not in run: a stop before the thread runs must not be lost
+        self.start()
+
+    def run(self):
+        self.error = None
+
+        try:
+            self.detector.detect(lambda: self._stop)
+        except (IOError, EOFError, RuntimeError, wave.Error) as e:
+            self.error = unicode(e)
+
+        self.detected.emit()
+
+    def stop(self):
+        self._stop = True
+        self.wait()
+
+
+class ATOnsetWindow(QtGui.QDialog):
+    """
+    Propose beats from a sound of the scene and add the accepted ones as
+    a new take.
+    """
+
+    COLS_NAMES = ['Time', 'Frame', 'Strength']
+
+    def __init__(self, parent):
+        super(ATOnsetWindow, self).__init__(parent)
+
+        self.parent = parent
+        self.setWindowTitle(u"Beats from Sound")
+        self.resize(380, 420)
+
+        self.detection = ATOnsetDetection(self)
+        self.candidates = list()  # (scene ms, strength)
+
+        # Controls
+        self.sound_combobox = QtGui.QComboBox()
+        self.sound_combobox.setToolTip(u"Sound nodes of the scene")
+
+        self.browse_btn = QtGui.QPushButton(u"...")
+        self.browse_btn.setFixedWidth(30)
+        self.browse_btn.setToolTip(u"Choose a WAV file")
+
+        self.mode_combobox = QtGui.QComboBox()
+        self.mode_combobox.addItems([u"Onsets", u"Beats"])
+        self.mode_combobox.setToolTip(u"Onsets: every hit found. Beats: a regular grid at the detected tempo.")
+
+        self.sensitivity_spinbox = QtGui.QDoubleSpinBox()
+        self.sensitivity_spinbox.setRange(0.5, 5.0)
+        self.sensitivity_spinbox.setSingleStep(0.25)
+        self.sensitivity_spinbox.setValue(1.5)
+        self.sensitivity_spinbox.setToolTip(u"Lower values find more onsets")
+
+        self.gap_spinbox = QtGui.QSpinBox()
+        self.gap_spinbox.setRange(20, 2000)
+        self.gap_spinbox.setSingleStep(10)
+        self.gap_spinbox.setValue(100)
+        self.gap_spinbox.setSuffix(u" ms")
+        self.gap_spinbox.setToolTip(u"Minimum time between two onsets")
+
+        self.detect_btn = QtGui.QPushButton(u"Detect")
+
+        self.results = QtGui.QTableWidget(0, len(ATOnsetWindow.COLS_NAMES))
+        self.results.setHorizontalHeaderLabels(ATOnsetWindow.COLS_NAMES)
+        self.results.horizontalHeader().setStretchLastSection(True)
+        self.results.verticalHeader().setVisible(False)
+        self.results.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        self.results.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.results.setShowGrid(False)
+
+        self.status_label = QtGui.QLabel()
+        self.status_label.setStyleSheet("""
+                                        color:#888888;
+                                        font-style:italic;
+                                        """)
+
+        self.add_btn = QtGui.QPushButton(u"Add as New Take")
+        self.add_btn.setEnabled(False)
+        self.add_btn.setToolTip(u"Add the checked beats as a new take")
+
+        # Layout
+        sound_layout = QtGui.QHBoxLayout()
+        sound_layout.addWidget(self.sound_combobox, 1)
+        sound_layout.addWidget(self.browse_btn)
+
+        settings_layout = QtGui.QFormLayout()
+        settings_layout.addRow(u"Sound", sound_layout)
+        settings_layout.addRow(u"Detect", self.mode_combobox)
+        settings_layout.addRow(u"Sensitivity", self.sensitivity_spinbox)
+        settings_layout.addRow(u"Minimum gap", self.gap_spinbox)
+
+        buttons_layout = QtGui.QHBoxLayout()
+        buttons_layout.addWidget(self.detect_btn)
+        buttons_layout.addWidget(self.add_btn)
+
+        main_layout = QtGui.QVBoxLayout()
+        main_layout.addLayout(settings_layout)
+        main_layout.addWidget(self.results)
+        main_layout.addWidget(self.status_label)
+        main_layout.addLayout(buttons_layout)
+
+        self.setLayout(main_layout)
+
+        # Connections
+        self.browse_btn.clicked.connect(self.on_browse_clicked)
+        self.detect_btn.clicked.connect(self.on_detect_clicked)
+        self.add_btn.clicked.connect(self.on_add_clicked)
+        self.mode_combobox.activated.connect(lambda index: self.on_detected())
+        self.detection.detected.connect(self.on_detected)
+
+    # ---
+
+    def showEvent(self, event):
+        self.populate()
+        super(ATOnsetWindow, self).showEvent(event)
+
+    def closeEvent(self, event):
+        self.detection.stop()
+        super(ATOnsetWindow, self).closeEvent(event)
+
+    def populate(self):
+        """
+        List the sound nodes of the scene, the one on the timeline first.
+        """
+        current = self.sound_combobox.currentText()
+        self.sound_combobox.clear()
+
+        for name, path, offset in AnimationTimer.sound_nodes():
+            self.sound_combobox.addItem(u"%s (%s)" % (name, os.path.basename(path)), (path, offset))
+
+        i = self.sound_combobox.findText(current)
+        self.sound_combobox.setCurrentIndex(max(i, 0))
+
+    # ---
+
+    def on_browse_clicked(self):
+        path, _ = QtGui.QFileDialog.getOpenFileName(self, u"Choose a sound", AnimationTimer.switch_filedialog_dir(),
+                                                    u"WAV (*.wav)")
+        if not path:
+            return
+
+        self.sound_combobox.addItem(os.path.basename(path), (path, 0))
+        self.sound_combobox.setCurrentIndex(self.sound_combobox.count() - 1)
+
+    def on_detect_clicked(self):
+        sound = self.sound_combobox.itemData(self.sound_combobox.currentIndex())
 
-        if not plugin_name or plugin_name != AnimationTimer.TITLE:
-            AnimationTimer.warning("The plugin title could not be found in the save file.")
-            AnimationTimer.warning("Are you sure it is meant to be used in Animation Timer ?")
+        if not sound or self.detection.isRunning():
+            return
 
-        if not plugin_version:
-            AnimationTimer.warning("The version of this save file could not be found. Use it with caution.")
+        path, _ = sound
+        if not os.path.exists(path):
+            return AnimationTimer.warning(u"Animation Timer: %s does not exist." % path)
 
-        if plugin_version < AnimationTimer.VERSION:
-            AnimationTimer.error("Ancien save file are not compatible with this version of the script.")
-            AnimationTimer.error("Load aborted.")
+        detector = core.ATOnsetDetector(path, self.sensitivity_spinbox.value(), self.gap_spinbox.value())
+
+        if self.parent.waveform_strip.isVisible():
+            self.parent.waveform_strip.set_sound(*sound)
+
+        self.detect_btn.setEnabled(False)
+        self.add_btn.setEnabled(False)
+        self.status_label.setText(u"Reading %s..." % os.path.basename(path))
+        self.detection.start_detection(detector)
+
+    def on_detected(self):
+        self.detect_btn.setEnabled(True)
+
+        detector = self.detection.detector
+        if detector is None or self.detection.isRunning():
+            return
+
+        if self.detection.error:
+            self.status_label.setText(u"")
+            return AnimationTimer.error(u"Animation Timer: %s" % self.detection.error)
+
+        _, offset_frame = self.sound_combobox.itemData(self.sound_combobox.currentIndex()) or (None, 0)
+        fps = self.parent.fps_label.text()
+
+        # The sound starts at its offset frame in the scene
+        start = AnimationTimer.calculate_time_ms(offset_frame, fps)
+
+        if self.mode_combobox.currentIndex() == 1:
+            found = detector.beats()
+        else:
+            found = detector.onsets
+
+        self.candidates = [(start + ms, strength) for ms, strength in found]
+
+        self.results.setUpdatesEnabled(False)
+        self.results.setRowCount(len(self.candidates))
+
+        for row, (ms, strength) in enumerate(self.candidates):
+            values = [core.format_time(ms), AnimationTimer.calculate_frames(ms, fps), u"%d%%" % round(strength * 100)]
+
+            for col, value in enumerate(values):
+                item = QtGui.QTableWidgetItem(unicode(value))
+                if col == 0:
+                    item.setFlags(item.flags() | QtCore.Qt.ItemIsUserCheckable)
+                    # Before the timer's offset, a beat cannot be captured
+                    checked = strength > 0 and ms >= self.parent.timer.offset
+                    item.setCheckState(QtCore.Qt.Checked if checked else QtCore.Qt.Unchecked)
+                self.results.setItem(row, col, item)
+
+        self.results.setUpdatesEnabled(True)
+
+        tempo = detector.tempo()
+        status = u"%d onsets in %s" % (len(detector.onsets), core.format_time(detector.duration))
+        if tempo:
+            status += u", about %d BPM" % round(tempo)
+        self.status_label.setText(status)
+
+        self.add_btn.setEnabled(bool(self.candidates))
+
+    def on_add_clicked(self):
+        fps = self.parent.fps_label.text()
+        offset = self.parent.timer.offset
+
+        data = list()
+        for row, (ms, strength) in enumerate(self.candidates):
+            if self.results.item(row, 0).checkState() != QtCore.Qt.Checked or ms < offset:
+                continue
+
+            data.append({
+                'time': core.format_time(ms),
+                'frame': AnimationTimer.calculate_frames(ms, fps),
+                'interval': u'',
+                'note': u'%s %d%%' % (self.mode_combobox.currentText()[:-1], round(strength * 100)),
+            })
+
+        if not data:
+            return AnimationTimer.warning(u"Animation Timer: No beat checked after the timer's offset.")
+
+        self.parent.on_stop_btn_clicked()
+        self.parent.central_list.add_take(u"Sound", data, ATTake.SOUND)
+
+
+class ATWaveformLoader(QtCore.QThread):
+    """
+    Read or build the peaks of a sound in the background.
+    """
+
+    loaded = QtCore.Signal()
+
+    def __init__(self, parent=None):
+        super(ATWaveformLoader, self).__init__(parent)
+
+        self.path = None
+        self.waveform = None
+        self.error = None
+        self._stop = False
+
+    def start_loading(self, path):
+        self.path = path
+        self._stop = False  # Here, not in run: a stop before the thread runs must not be lost
+        self.start()
+
+    def run(self):
+        self.error = None
+        self.waveform = None
+
+        try:
+            self.waveform = core.ATWaveform.open(self.path, lambda: self._stop)
+        except (IOError, EOFError, RuntimeError, wave.Error) as e:
+            self.error = unicode(e)
+
+        self.loaded.emit()
+
+    def stop(self):
+        self._stop = True
+        self.wait()
+
+
+class ATWaveformStrip(QtGui.QWidget):
+    """
+    Waveform of a sound of the scene, drawn under the Center List with the
+    captures of the current take over it.
+    ---
+    Wheel zooms around the cursor, dragging moves along the sound, double
+    click shows the whole sound and a click on a capture selects its row.
+    """
+
+    HEIGHT = 60
+    MIN_SPAN = 50  # ms
+    ZOOM = 1.25
+
+    def __init__(self, parent):
+        super(ATWaveformStrip, self).__init__(parent)
+
+        self.parent = parent
+
+        self.waveform = None
+        self.name = u''
+        self.start = 0          # ms, scene time of the first sample
+        self.view = (0, 10000)  # ms, scene time range shown
+
+        self.loader = ATWaveformLoader(self)
+        self.loader.loaded.connect(self.on_loaded)
+
+        self._drag = None       # (x, view) when the drag started
+
+        self.setFixedHeight(ATWaveformStrip.HEIGHT)
+        self.setToolTip(u"Wheel to zoom, drag to move, double click to see the whole sound")
+
+    def set_sound(self, path, offset_frame=0):
+        """
+        Show a WAV file starting at a frame of the scene.
+        :return: void
+        """
+        if self.loader.isRunning():
+            self.loader.stop()
+
+        self.start = AnimationTimer.calculate_time_ms(offset_frame, self.parent.fps_label.text())
+        self.name = os.path.basename(path)
+        self.waveform = None
+
+        self.loader.start_loading(path)
+        self.update()
+
+    def load_scene_sound(self):
+        """
+        Show the sound used by the timeline, if any.
+        :return: bool
+        """
+        sounds = AnimationTimer.sound_nodes()
+        if not sounds:
             return False
 
-        if not fps or not isinstance(int(fps), int):
-            AnimationTimer.warning("FPS data could not be found or is corrupted. Default FPS will be used.")
-            AnimationTimer.info("You can still change that in the options panel.")
+        _, path, offset_frame = sounds[0]
+        self.set_sound(path, offset_frame)
 
-        if not offset_time or not isinstance(int(offset_time), int):
-            AnimationTimer.warning("Offset Time data could not be found or is corrupted.")
-            AnimationTimer.info("Offset Time will be set to 0.")
-            AnimationTimer.info("You can still change that in the options panel.")
+        return True
 
-        if not offset_time or not isinstance(int(offset_time), int):
-            AnimationTimer.warning("Offset Frame data could not be found or is corrupted.")
-            AnimationTimer.info("Offset Frame will be set to 0.")
-            AnimationTimer.info("You can still change that in the options panel.")
+    def show_all(self):
+        if self.waveform is not None:
+            self.view = (self.start, self.start + max(self.waveform.duration, ATWaveformStrip.MIN_SPAN))
+        self.update()
+
+    # ---
+
+    def on_loaded(self):
+        if self.loader.error:
+            self.name = u''
+            return AnimationTimer.error(u"Animation Timer: %s" % self.loader.error)
+
+        self.waveform = self.loader.waveform
+        self.show_all()
+
+    # ---
+    # Events
+
+    def paintEvent(self, event):
+        painter = QtGui.QPainter(self)
+        painter.fillRect(self.rect(), QtGui.QColor("#2B2B2B"))
+
+        width = self.width()
+        middle = self.height() / 2.0
+        start, end = self.view
+        span = float(end - start)
+
+        if self.waveform is not None:
+            painter.setPen(QtGui.QColor("#6A8CAF"))
+            for x, peak in enumerate(self.waveform.peaks(start - self.start, end - self.start, width)):
+                if peak is not None:
+                    low, high = peak
+                    painter.drawLine(x, middle - high * middle, x, middle - low * middle)
+        else:
+            painter.setPen(QtGui.QColor("#757575"))
+            text = u"Reading %s..." % self.name if self.loader.isRunning() else u"No sound"
+            painter.drawText(self.rect(), QtCore.Qt.AlignCenter, text)
+
+        # Captures of the current take, one lane per track
+        take = self.parent.central_list.session.current
+        if take is not None and len(take):
+            selected = set(self.parent.central_list.selected_rows())
+            times = take.times
+            lane = self.height() / float(max(len(take.tracks), 1))
+
+            first = bisect_left(times, start - take.offset)
+            last = bisect_left(times, end - take.offset)
+
+            for row in range(first, last):
+                x = int((times[row] + take.offset - start) * width / span)
+                channel = take.channel(row)
+                color = "#FFFFFF" if row in selected else ATCaptureModel.track_color(channel)
+                painter.setPen(QtGui.QColor(color))
+                painter.drawLine(x, int(channel * lane), x, int((channel + 1) * lane))
+
+        painter.end()
+
+    def wheelEvent(self, event):
+        start, end = self.view
+        at = start + (end - start) * event.pos().x() / float(max(self.width(), 1))
+
+        zoom = ATWaveformStrip.ZOOM if event.delta() < 0 else 1 / ATWaveformStrip.ZOOM
+        span = max((end - start) * zoom, ATWaveformStrip.MIN_SPAN)
+
+        # Keep the time under the cursor in place
+        start = at - (at - start) * span / (end - start)
+        self.view = (start, start + span)
+        self.update()
+
+    def mousePressEvent(self, event):
+        self._drag = (event.pos().x(), self.view)
+
+    def mouseMoveEvent(self, event):
+        if self._drag is None:
+            return
+
+        x, (start, end) = self._drag
+        shift = (x - event.pos().x()) * (end - start) / float(max(self.width(), 1))
+        self.view = (start + shift, end + shift)
+        self.update()
+
+    def mouseReleaseEvent(self, event):
+        if self._drag is not None and abs(self._drag[0] - event.pos().x()) < 3:
+            self._select_capture(event.pos().x())
+        self._drag = None
+
+    def mouseDoubleClickEvent(self, event):
+        self.show_all()
+
+    # ---
+
+    def _select_capture(self, x):
+        """
+        Select the row of the capture drawn under x, if close enough.
+        """
+        take = self.parent.central_list.session.current
+        if take is None or not len(take):
+            return
+
+        start, end = self.view
+        ms = start + (end - start) * x / float(max(self.width(), 1)) - take.offset
+
+        times = take.times
+        i = bisect_left(times, ms)
+        rows = [row for row in (i - 1, i) if 0 <= row < len(times)]
+
+        row = min(rows, key=lambda row: abs(times[row] - ms))
+        if abs(times[row] - ms) * self.width() / float(end - start) <= 4:
+            self.parent.central_list.select_row(row)
+            self.update()
+
+
+class ATQuantizeWindow(QtGui.QDialog):
+    """
+    Snap the selected captures, or the whole take, to the frame grid or
+    to a tempo grid. The result is previewed before being applied.
+    """
+
+    COLS_NAMES = ['Row', 'Time', 'Quantized', 'Frame']
+    PREVIEW_ROWS = 500
+
+    DIVISIONS = [(u"1/4", 1), (u"1/8", 2), (u"1/16", 4), (u"1/8 triplets", 3)]
+
+    def __init__(self, parent):
+        super(ATQuantizeWindow, self).__init__(parent)
+
+        self.parent = parent
+        self.setWindowTitle(u"Quantize")
+        self.resize(380, 460)
+
+        self.rows = list()
+        self.times = list()  # Quantized times of the rows
+
+        # Controls
+        self.scope_combobox = QtGui.QComboBox()
+        self.scope_combobox.addItems([u"Selected captures", u"Whole take"])
+
+        self.grid_combobox = QtGui.QComboBox()
+        self.grid_combobox.addItems([u"Frames", u"Tempo"])
+
+        self.tempo_spinbox = QtGui.QDoubleSpinBox()
+        self.tempo_spinbox.setRange(20.0, 400.0)
+        self.tempo_spinbox.setDecimals(2)
+        self.tempo_spinbox.setValue(120.0)
+        self.tempo_spinbox.setSuffix(u" BPM")
+
+        self.division_combobox = QtGui.QComboBox()
+        for name, _ in ATQuantizeWindow.DIVISIONS:
+            self.division_combobox.addItem(name)
+
+        self.swing_spinbox = QtGui.QSpinBox()
+        self.swing_spinbox.setRange(50, 75)
+        self.swing_spinbox.setValue(int(core.ATQuantizer.STRAIGHT))
+        self.swing_spinbox.setSuffix(u" %")
+        self.swing_spinbox.setToolTip(u"50% is straight, 66% is a triplet feel")
+
+        self.origin_timebox = QtGui.QTimeEdit()
+        self.origin_timebox.setDisplayFormat("hh:mm:ss:zzz")
+        self.origin_timebox.setToolTip(u"Time of a beat, the first capture by default")
+
+        self.strength_slider = QtGui.QSlider(QtCore.Qt.Horizontal)
+        self.strength_slider.setRange(0, 100)
+        self.strength_slider.setValue(100)
+
+        self.strength_label = QtGui.QLabel(u"100%")
+        self.strength_label.setFixedWidth(36)
+
+        self.preview = QtGui.QTableWidget(0, len(ATQuantizeWindow.COLS_NAMES))
+        self.preview.setHorizontalHeaderLabels(ATQuantizeWindow.COLS_NAMES)
+        self.preview.horizontalHeader().setStretchLastSection(True)
+        self.preview.verticalHeader().setVisible(False)
+        self.preview.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.preview.setSelectionMode(QtGui.QAbstractItemView.NoSelection)
+        self.preview.setShowGrid(False)
+
+        self.status_label = QtGui.QLabel()
+        self.status_label.setStyleSheet("""
+                                        color:#888888;
+                                        font-style:italic;
+                                        """)
+
+        self.button_box = QtGui.QDialogButtonBox(QtGui.QDialogButtonBox.Apply | QtGui.QDialogButtonBox.Close)
+
+        # Layout
+        strength_layout = QtGui.QHBoxLayout()
+        strength_layout.addWidget(self.strength_slider)
+        strength_layout.addWidget(self.strength_label)
+
+        settings_layout = QtGui.QFormLayout()
+        settings_layout.addRow(u"Captures", self.scope_combobox)
+        settings_layout.addRow(u"Grid", self.grid_combobox)
+        settings_layout.addRow(u"Tempo", self.tempo_spinbox)
+        settings_layout.addRow(u"Division", self.division_combobox)
+        settings_layout.addRow(u"Swing", self.swing_spinbox)
+        settings_layout.addRow(u"Origin", self.origin_timebox)
+        settings_layout.addRow(u"Strength", strength_layout)
+
+        main_layout = QtGui.QVBoxLayout()
+        main_layout.addLayout(settings_layout)
+        main_layout.addWidget(self.preview)
+        main_layout.addWidget(self.status_label)
+        main_layout.addWidget(self.button_box)
+
+        self.setLayout(main_layout)
+
+        # Connections
+        self.scope_combobox.currentIndexChanged.connect(self.on_settings_changed)
+        self.grid_combobox.currentIndexChanged.connect(self.on_settings_changed)
+        self.tempo_spinbox.valueChanged.connect(self.on_settings_changed)
+        self.division_combobox.currentIndexChanged.connect(self.on_settings_changed)
+        self.swing_spinbox.valueChanged.connect(self.on_settings_changed)
+        self.origin_timebox.timeChanged.connect(self.on_settings_changed)
+        self.strength_slider.valueChanged.connect(self.on_settings_changed)
+        self.button_box.button(QtGui.QDialogButtonBox.Apply).clicked.connect(self.on_apply_clicked)
+        self.button_box.rejected.connect(self.reject)
+
+    # ---
+
+    def showEvent(self, event):
+        take = self.parent.central_list.session.current
+
+        # Selected captures by default when there is a selection
+        self.scope_combobox.setCurrentIndex(0 if self.parent.central_list.selected_rows() else 1)
+
+        if take is not None and len(take):
+            self.origin_timebox.setTime(QtCore.QTime(0, 0, 0, 0).addMSecs(take.time(0)))
+
+        self.on_settings_changed()
+        super(ATQuantizeWindow, self).showEvent(event)
+
+    def quantizer(self):
+        """
+        :return: ATQuantizer with the settings of the window
+        """
+        tempo = self.grid_combobox.currentIndex() == 1
+
+        for widget in (self.tempo_spinbox, self.division_combobox, self.swing_spinbox, self.origin_timebox):
+            widget.setEnabled(tempo)
+
+        return core.ATQuantizer(
+            grid=core.ATQuantizer.TEMPO if tempo else core.ATQuantizer.FRAMES,
+            fps=self.parent.fps_label.text(),
+            tempo=self.tempo_spinbox.value(),
+            division=ATQuantizeWindow.DIVISIONS[self.division_combobox.currentIndex()][1],
+            swing=self.swing_spinbox.value(),
+            strength=self.strength_slider.value() / 100.0,
+            origin=QtCore.QTime(0, 0, 0).msecsTo(self.origin_timebox.time()))
+
+    # ---
+
+    def on_settings_changed(self, *args):
+        self.strength_label.setText(u"%d%%" % self.strength_slider.value())
+
+        take = self.parent.central_list.session.current
+
+        if self.scope_combobox.currentIndex() == 0:
+            self.rows = self.parent.central_list.selected_rows()
+        else:
+            self.rows = list(range(len(take)))
+
+        times = [take.times[row] for row in self.rows]
+        self.times = self.quantizer().quantize(times, take.offset)
+
+        # Only the moved captures are listed
+        moved = [(row, old, new) for row, old, new in zip(self.rows, times, self.times) if old != new]
+        shown = moved[:ATQuantizeWindow.PREVIEW_ROWS]
+
+        fps = self.parent.fps_label.text()
+        offset = take.offset
+
+        self.preview.setUpdatesEnabled(False)
+        self.preview.setRowCount(len(shown))
+
+        for i, (row, old, new) in enumerate(shown):
+            values = [row + 1, core.format_time(old + offset), core.format_time(new + offset),
+                      AnimationTimer.calculate_frames(new + offset, fps)]
+
+            for col, value in enumerate(values):
+                self.preview.setItem(i, col, QtGui.QTableWidgetItem(unicode(value)))
+
+        self.preview.setUpdatesEnabled(True)
+
+        shift = max([abs(new - old) for _, old, new in moved] or [0])
+        self.status_label.setText(u"%d of %d captures move, up to %d ms" % (len(moved), len(self.rows), shift))
+
+        self.button_box.button(QtGui.QDialogButtonBox.Apply).setEnabled(bool(moved))
+
+    def on_apply_clicked(self):
+        if not self.rows:
+            return
+
+        self.parent.on_stop_btn_clicked()
+        self.parent.central_list.set_times(self.rows, self.times, u"Quantize")
+
+        self.on_settings_changed()
+
+
+class ATSmoothWindow(QtGui.QDialog):
+    """
+    Smooth the jitter of the selected captures, or of the whole take, and
+    score each capture. The result is previewed before being applied.
+    """
+
+    COLS_NAMES = ['Row', 'Time', 'Smoothed', 'Confidence']
+    PREVIEW_ROWS = 500
+
+    METHODS = [(u"Median", core.ATSmoother.MEDIAN), (u"Kalman", core.ATSmoother.KALMAN),
+               (u"Tempo tracking", core.ATSmoother.TEMPO)]
+
+    def __init__(self, parent):
+        super(ATSmoothWindow, self).__init__(parent)
+
+        self.parent = parent
+        self.setWindowTitle(u"Smooth")
+        self.resize(380, 480)
+
+        self.rows = list()
+        self.times = list()  # Smoothed times of the rows
+        self.smoother = core.ATSmoother()  # Kept, its estimates are reused while only blending changes
+
+        # Controls
+        self.scope_combobox = QtGui.QComboBox()
+        self.scope_combobox.addItems([u"Selected captures", u"Whole take"])
+
+        self.method_combobox = QtGui.QComboBox()
+        for name, _ in ATSmoothWindow.METHODS:
+            self.method_combobox.addItem(name)
+
+        self.window_spinbox = QtGui.QSpinBox()
+        self.window_spinbox.setRange(3, 15)
+        self.window_spinbox.setSingleStep(2)
+        self.window_spinbox.setValue(5)
+        self.window_spinbox.setSuffix(u" captures")
+
+        self.responsiveness_slider = QtGui.QSlider(QtCore.Qt.Horizontal)
+        self.responsiveness_slider.setRange(0, 100)
+        self.responsiveness_slider.setValue(50)
+        self.responsiveness_slider.setToolTip(u"How fast a change of tempo is followed")
+
+        self.tolerance_spinbox = QtGui.QSpinBox()
+        self.tolerance_spinbox.setRange(0, 500)
+        self.tolerance_spinbox.setSuffix(u" ms")
+        self.tolerance_spinbox.setSpecialValueText(u"Auto")
+        self.tolerance_spinbox.setToolTip(u"Captures further from their estimate are outliers. "
+                                          u"Auto is 3 times the jitter of the captures.")
+
+        self.outliers_checkbox = QtGui.QCheckBox(u"Move the outliers only")
+
+        self.strength_slider = QtGui.QSlider(QtCore.Qt.Horizontal)
+        self.strength_slider.setRange(0, 100)
+        self.strength_slider.setValue(100)
+
+        self.strength_label = QtGui.QLabel(u"100%")
+        self.strength_label.setFixedWidth(36)
+
+        self.preview = QtGui.QTableWidget(0, len(ATSmoothWindow.COLS_NAMES))
+        self.preview.setHorizontalHeaderLabels(ATSmoothWindow.COLS_NAMES)
+        self.preview.horizontalHeader().setStretchLastSection(True)
+        self.preview.verticalHeader().setVisible(False)
+        self.preview.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.preview.setSelectionMode(QtGui.QAbstractItemView.NoSelection)
+        self.preview.setShowGrid(False)
+
+        self.status_label = QtGui.QLabel()
+        self.status_label.setStyleSheet("""
+                                        color:#888888;
+                                        font-style:italic;
+                                        """)
+
+        self.button_box = QtGui.QDialogButtonBox(QtGui.QDialogButtonBox.Apply | QtGui.QDialogButtonBox.Close)
+
+        # Layout
+        strength_layout = QtGui.QHBoxLayout()
+        strength_layout.addWidget(self.strength_slider)
+        strength_layout.addWidget(self.strength_label)
+
+        settings_layout = QtGui.QFormLayout()
+        settings_layout.addRow(u"Captures", self.scope_combobox)
+        settings_layout.addRow(u"Method", self.method_combobox)
+        settings_layout.addRow(u"Window", self.window_spinbox)
+        settings_layout.addRow(u"Responsiveness", self.responsiveness_slider)
+        settings_layout.addRow(u"Tolerance", self.tolerance_spinbox)
+        settings_layout.addRow(u"", self.outliers_checkbox)
+        settings_layout.addRow(u"Strength", strength_layout)
+
+        main_layout = QtGui.QVBoxLayout()
+        main_layout.addLayout(settings_layout)
+        main_layout.addWidget(self.preview)
+        main_layout.addWidget(self.status_label)
+        main_layout.addWidget(self.button_box)
+
+        self.setLayout(main_layout)
+
+        # Connections
+        self.scope_combobox.currentIndexChanged.connect(self.on_settings_changed)
+        self.method_combobox.currentIndexChanged.connect(self.on_settings_changed)
+        self.window_spinbox.valueChanged.connect(self.on_settings_changed)
+        self.responsiveness_slider.valueChanged.connect(self.on_settings_changed)
+        self.tolerance_spinbox.valueChanged.connect(self.on_settings_changed)
+        self.outliers_checkbox.toggled.connect(self.on_settings_changed)
+        self.strength_slider.valueChanged.connect(self.on_settings_changed)
+        self.button_box.button(QtGui.QDialogButtonBox.Apply).clicked.connect(self.on_apply_clicked)
+        self.button_box.rejected.connect(self.reject)
+
+    # ---
+
+    def showEvent(self, event):
+        # Selected captures by default when there is a selection
+        self.scope_combobox.setCurrentIndex(0 if self.parent.central_list.selected_rows() else 1)
+
+        self.on_settings_changed()
+        super(ATSmoothWindow, self).showEvent(event)
+
+    def update_smoother(self):
+        """
+        :return: ATSmoother with the settings of the window
+        """
+        method = ATSmoothWindow.METHODS[self.method_combobox.currentIndex()][1]
+
+        self.window_spinbox.setEnabled(method == core.ATSmoother.MEDIAN)
+        self.responsiveness_slider.setEnabled(method != core.ATSmoother.MEDIAN)
+
+        smoother = self.smoother
+        smoother.method = method
+        smoother.window = self.window_spinbox.value()
+        smoother.responsiveness = self.responsiveness_slider.value() / 100.0
+        smoother.tolerance = self.tolerance_spinbox.value() or None
+        smoother.strength = self.strength_slider.value() / 100.0
+        smoother.outliers_only = self.outliers_checkbox.isChecked()
+
+        return smoother
+
+    # ---
+
+    def on_settings_changed(self, *args):
+        self.strength_label.setText(u"%d%%" % self.strength_slider.value())
+
+        take = self.parent.central_list.session.current
+        if take is None:
+            return
+
+        if self.scope_combobox.currentIndex() == 0:
+            self.rows = self.parent.central_list.selected_rows()
+        else:
+            self.rows = list(range(len(take)))
+
+        times = [take.times[row] for row in self.rows]
+        self.times, confidence = self.update_smoother().adjust(take, self.rows)
+
+        # Moved captures are listed, least confident first
+        moved = [(row, old, new, score) for row, old, new, score in zip(self.rows, times, self.times, confidence)
+                 if old != new]
+        shown = sorted(moved, key=lambda capture: capture[3])[:ATSmoothWindow.PREVIEW_ROWS]
+
+        offset = take.offset
+        outlier = QtGui.QColor("#E08060")
+
+        self.preview.setUpdatesEnabled(False)
+        self.preview.setRowCount(len(shown))
+
+        for i, (row, old, new, score) in enumerate(shown):
+            values = [row + 1, core.format_time(old + offset), core.format_time(new + offset), u"%d%%" % (score * 100)]
+
+            for col, value in enumerate(values):
+                item = QtGui.QTableWidgetItem(unicode(value))
+                if score < core.ATSmoother.OUTLIER:
+                    item.setForeground(outlier)
+                self.preview.setItem(i, col, item)
+
+        self.preview.setUpdatesEnabled(True)
+
+        shift = max([abs(new - old) for _, old, new, _ in moved] or [0])
+        outliers = len([score for score in confidence if score < core.ATSmoother.OUTLIER])
+        self.status_label.setText(u"%d of %d captures move, up to %d ms, %d outlier(s)" % (len(moved), len(self.rows),
+                                                                                         shift, outliers))
+
+        self.button_box.button(QtGui.QDialogButtonBox.Apply).setEnabled(bool(moved))
+
+    def on_apply_clicked(self):
+        if not self.rows:
+            return
+
+        self.parent.on_stop_btn_clicked()
+        self.parent.central_list.set_times(self.rows, self.times, u"Smooth")
+
+        self.on_settings_changed()
+
+
+class ATTemplateWindow(QtGui.QDialog):
+    """
+    Library of timing templates: save captures as a template, list the
+    templates most like the captures, insert one at the end of the take.
+    """
+
+    COLS_NAMES = ['Name', 'Captures', 'Duration', 'Distance']
+    RESULTS = 50
+
+    def __init__(self, parent):
+        super(ATTemplateWindow, self).__init__(parent)
+
+        self.parent = parent
+        self.setWindowTitle(u"Templates")
+        self.resize(420, 420)
+
+        self.library = ATTemplateLibrary(os.path.join(AnimationTimer.USER_PREFS_DIR, ATTemplateLibrary.FILENAME))
+
+        # Controls
+        self.search_edit = QtGui.QLineEdit()
+        self.search_edit.setPlaceholderText(u"Search in names")
+
+        self.like_combobox = QtGui.QComboBox()
+        self.like_combobox.addItems([u"Like the selected captures", u"Like the whole take", u"All by name"])
+
+        self.tempo_checkbox = QtGui.QCheckBox(u"Insert at the tempo of the captures")
+        self.tempo_checkbox.setChecked(True)
+
+        self.results = QtGui.QTableWidget(0, len(ATTemplateWindow.COLS_NAMES))
+        self.results.setHorizontalHeaderLabels(ATTemplateWindow.COLS_NAMES)
+        self.results.horizontalHeader().setStretchLastSection(True)
+        self.results.verticalHeader().setVisible(False)
+        self.results.setSelectionBehavior(QtGui.QAbstractItemView.SelectRows)
+        self.results.setSelectionMode(QtGui.QAbstractItemView.SingleSelection)
+        self.results.setEditTriggers(QtGui.QAbstractItemView.NoEditTriggers)
+        self.results.setShowGrid(False)
+
+        self.status_label = QtGui.QLabel()
+        self.status_label.setStyleSheet("""
+                                        color:#888888;
+                                        font-style:italic;
+                                        """)
+
+        self.save_btn = QtGui.QPushButton(u"Save as Template...")
+        self.save_btn.setToolTip(u"Save the selected captures, or the whole take, as a template")
+        self.delete_btn = QtGui.QPushButton(u"Delete")
+        self.insert_btn = QtGui.QPushButton(u"Insert")
+        self.insert_btn.setToolTip(u"Add the template at the end of the take. Double click does the same.")
+
+        # Layout
+        buttons_layout = QtGui.QHBoxLayout()
+        buttons_layout.addWidget(self.save_btn)
+        buttons_layout.addWidget(self.delete_btn)
+        buttons_layout.addStretch()
+        buttons_layout.addWidget(self.insert_btn)
+
+        main_layout = QtGui.QVBoxLayout()
+        main_layout.addWidget(self.search_edit)
+        main_layout.addWidget(self.like_combobox)
+        main_layout.addWidget(self.results)
+        main_layout.addWidget(self.tempo_checkbox)
+        main_layout.addWidget(self.status_label)
+        main_layout.addLayout(buttons_layout)
+
+        self.setLayout(main_layout)
+
+        # Connections
+        self.search_edit.textChanged.connect(self.on_search_changed)
+        self.like_combobox.currentIndexChanged.connect(self.on_search_changed)
+        self.results.itemDoubleClicked.connect(self.on_insert_clicked)
+        self.results.itemSelectionChanged.connect(self.on_result_selection_changed)
+        self.save_btn.clicked.connect(self.on_save_clicked)
+        self.delete_btn.clicked.connect(self.on_delete_clicked)
+        self.insert_btn.clicked.connect(self.on_insert_clicked)
+
+    # ---
+
+    def showEvent(self, event):
+        # Like the selected captures by default when there is a selection
+        self.like_combobox.setCurrentIndex(0 if self.parent.central_list.selected_rows() else 1)
+
+        self.on_search_changed()
+        super(ATTemplateWindow, self).showEvent(event)
+
+    def captures(self):
+        """
+        Captures the templates are compared to and saved from.
+        :return: list of int rows of the current take
+        """
+        take = self.parent.central_list.session.current
+        if take is None:
+            return []
+
+        if self.like_combobox.currentIndex() == 0:
+            return self.parent.central_list.selected_rows()
+
+        return list(range(len(take)))
+
+    def selected_template(self):
+        """
+        :return: int id or None
+        """
+        items = self.results.selectedItems()
+        return items[0].data(QtCore.Qt.UserRole) if items else None
+
+    # ---
+
+    def on_search_changed(self, *args):
+        take = self.parent.central_list.session.current
+
+        times = None
+        if self.like_combobox.currentIndex() != 2 and take is not None:
+            times = [take.times[row] for row in self.captures()]
+            if len(times) < 3:
+                times = None
+
+        rows = self.library.search(times, self.search_edit.text(), ATTemplateWindow.RESULTS)
+
+        self.results.setUpdatesEnabled(False)
+        self.results.setRowCount(len(rows))
+
+        for i, row in enumerate(rows):
+            distance = u"%.3f" % row['distance'] if row['distance'] is not None else u""
+            values = [row['name'], row['count'], core.format_time(row['duration']), distance]
+
+            for col, value in enumerate(values):
+                item = QtGui.QTableWidgetItem(unicode(value))
+                item.setData(QtCore.Qt.UserRole, row['id'])
+                self.results.setItem(i, col, item)
+
+        self.results.setUpdatesEnabled(True)
+
+        self.status_label.setText(u"%d of %d templates%s" % (len(rows), self.library.count(),
+                                                             u", closest first" if times is not None else u""))
+        self.on_result_selection_changed()
+
+    def on_result_selection_changed(self):
+        selected = self.selected_template() is not None
+
+        self.insert_btn.setEnabled(selected)
+        self.delete_btn.setEnabled(selected)
+
+    def on_save_clicked(self):
+        take = self.parent.central_list.session.current
+        rows = self.captures()
+        if take is None or len(rows) < 2:
+            return AnimationTimer.warning(u"Animation Timer: a template needs 2 captures at least.")
+
+        name, ok = QtGui.QInputDialog.getText(self, u"Save as Template", u"Name", text=take.name)
+        if not ok or not name.strip():
+            return
+
+        notes = dict((i, take.note(row)) for i, row in enumerate(rows) if take.note(row))
+        self.library.add(name.strip(), [take.times[row] for row in rows], notes)
 
-        return True
+        self.on_search_changed()
 
-    # ---
+    def on_delete_clicked(self):
+        template_id = self.selected_template()
+        if template_id is None:
+            return
 
-    def populate(self):
-        """
-        From the app to the file.
-        """
-        data = self.parent.options_window.export_data()
+        self.library.remove(template_id)
+        self.on_search_changed()
 
-        self.fps = data.get('fps')
-        self.offset_time = data.get('offset_time')
-        self.offset_frame = data.get('offset_frame')
-        self.data = self.parent.central_list.export_data()
+    def on_insert_clicked(self, *args):
+        template = self.library.get(self.selected_template())
+        if template is None or not template['times']:
+            return
 
-    def propagate(self, data):
-        """
-        From the file to the app.
-        """
-        # The best way is to send data to options window and then activate the accepted function.
-        self.parent.options_window.restore_from_data(data)
-        self.parent.options_window.on_accepted()
+        times = template['times']
+        take = self.parent.central_list.session.current
 
-        # Save in ATFile too
-        infos = data.get('infos', None)
-        if infos:
-            self.fps = infos.get('fps', AnimationTimerOptions.default_fps)
-            self.offset_time = infos.get('offset_time', 0)
-            self.offset_frame = infos.get('offset_frame', 0)
+        # Template at the tempo of the captures compared
+        factor = 1.0
+        rows = self.captures()
+        if self.tempo_checkbox.isChecked() and len(rows) > 1 and len(times) > 1:
+            own = float(times[-1] - times[0]) / (len(times) - 1)
+            theirs = float(take.times[rows[-1]] - take.times[rows[0]]) / (len(rows) - 1)
+            if own > 0 and theirs > 0:
+                factor = theirs / own
 
-        self.data = data.get('data', {})
+        # One interval after the last capture
+        start = 0
+        if take is not None and len(take):
+            step = (times[-1] - times[0]) / float(len(times) - 1) if len(times) > 1 else 0
+            start = take.times[-1] + int(round(step * factor))
 
-        # Import data to central_list
-        self.parent.central_list.import_data(self.data)
+        self.parent.on_stop_btn_clicked()
+        self.parent.central_list.insert_captures([(start + int(round(ms * factor)), template['notes'].get(i, u''), 0)
+                                                  for i, ms in enumerate(times)], u"Insert %s" % template['name'])
 
 
-class ATRecentTimings(object):
+class ATClickTrackWindow(QtGui.QDialog):
     """
-    Manage recent timing files.
+    Render a click track of the current take or of a tempo, and put it
+    on the timeline to hear the timing against the shot.
     """
-    MAX = 10
 
-    def __init__(self, parent=None):
+    NODE = "AnimationTimerClick"
+
+    def __init__(self, parent):
+        super(ATClickTrackWindow, self).__init__(parent)
+
         self.parent = parent
-        self.data = list()
+        self.setWindowTitle(u"Click Track")
+        self.setFixedSize(300, 320)
+
+        # Controls
+        self.source_combobox = QtGui.QComboBox()
+        self.source_combobox.addItems([u"Current take", u"Tempo"])
+
+        self.snap_checkbox = QtGui.QCheckBox(u"Click on the frames of the captures")
+        self.snap_checkbox.setChecked(True)
+
+        self.tempo_spinbox = QtGui.QDoubleSpinBox()
+        self.tempo_spinbox.setRange(20.0, 400.0)
+        self.tempo_spinbox.setDecimals(2)
+        self.tempo_spinbox.setValue(120.0)
+        self.tempo_spinbox.setSuffix(u" BPM")
+
+        self.beats_spinbox = QtGui.QSpinBox()
+        self.beats_spinbox.setRange(1, 99999)
+        self.beats_spinbox.setValue(64)
+
+        self.bar_spinbox = QtGui.QSpinBox()
+        self.bar_spinbox.setRange(0, 16)
+        self.bar_spinbox.setValue(4)
+        self.bar_spinbox.setToolTip(u"Beats per bar, the first is accented. 0 for no accent")
+
+        self.start_spinbox = QtGui.QSpinBox()
+        self.start_spinbox.setRange(-999999, 999999)
+
+        self.count_in_spinbox = QtGui.QSpinBox()
+        self.count_in_spinbox.setRange(0, 16)
+        self.count_in_spinbox.setSuffix(u" clicks")
+
+        self.timeline_checkbox = QtGui.QCheckBox(u"Play it with the timeline")
+        self.timeline_checkbox.setChecked(True)
+
+        self.status_label = QtGui.QLabel()
+        self.status_label.setWordWrap(True)
+        self.status_label.setStyleSheet("""
+                                        color:#888888;
+                                        font-style:italic;
+                                        """)
 
-        settings = AnimationTimer.load_settings_file()
-        self.max_count = int(settings.value("Preferences/max_recent_timing", ATRecentTimings.MAX))
+        self.render_btn = QtGui.QPushButton(u"Render...")
+        self.button_box = QtGui.QDialogButtonBox(QtGui.QDialogButtonBox.Close)
+        self.button_box.addButton(self.render_btn, QtGui.QDialogButtonBox.ActionRole)
+
+        # Layout
+        settings_layout = QtGui.QFormLayout()
+        settings_layout.addRow(u"Clicks of", self.source_combobox)
+        settings_layout.addRow(u"", self.snap_checkbox)
+        settings_layout.addRow(u"Tempo", self.tempo_spinbox)
+        settings_layout.addRow(u"Beats", self.beats_spinbox)
+        settings_layout.addRow(u"Beats per bar", self.bar_spinbox)
+        settings_layout.addRow(u"Start frame", self.start_spinbox)
+        settings_layout.addRow(u"Count-in", self.count_in_spinbox)
+        settings_layout.addRow(u"", self.timeline_checkbox)
 
-        # Populate at launch from settings
-        self._load()
+        main_layout = QtGui.QVBoxLayout()
+        main_layout.addLayout(settings_layout)
+        main_layout.addWidget(self.status_label)
+        main_layout.addStretch(1)
+        main_layout.addWidget(self.button_box)
 
-    def __getitem__(self, item):
-        return self.data[item]
+        self.setLayout(main_layout)
 
-    def add(self, f):
-        """
-        Add a recent timing to the list.
-        If already exists, make it to the top of the list.
-        :param f: ATFile obj
-        :return: void
-        """
-        if f in self.data:
-            self._update(f)
+        # Connections
+        self.source_combobox.currentIndexChanged.connect(self.on_source_changed)
+        self.render_btn.clicked.connect(self.on_render_clicked)
+        self.button_box.rejected.connect(self.reject)
+
+    # ---
+
+    def showEvent(self, event):
+        take = self.parent.central_list.session.current
+        has_take = take is not None and len(take) > 0
+
+        self.source_combobox.setCurrentIndex(0 if has_take else 1)
+        self.source_combobox.model().item(0).setEnabled(has_take)
+        self.start_spinbox.setValue(int(pm.playbackOptions(q=True, minTime=True)))
+        self.status_label.clear()
+
+        self.on_source_changed()
+        super(ATClickTrackWindow, self).showEvent(event)
+
+    def on_source_changed(self, *args):
+        tempo = self.source_combobox.currentIndex() == 1
+
+        self.snap_checkbox.setEnabled(not tempo)
+        for widget in (self.tempo_spinbox, self.beats_spinbox, self.bar_spinbox, self.start_spinbox):
+            widget.setEnabled(tempo)
+
+    def on_render_clicked(self):
+        take = self.parent.central_list.session.current
+
+        if self.source_combobox.currentIndex() == 0:
+            name = take.name
         else:
-            if self.count >= self.max_count:
-                self.data.pop()
+            name = u"%g BPM" % self.tempo_spinbox.value()
 
-            self.data.insert(0, f)
+        default = os.path.join(AnimationTimer.switch_filedialog_dir(), u"click %s.wav" % name)
+        path, _ = QtGui.QFileDialog.getSaveFileName(self, u"Save the click track", default, u"WAV (*.wav)")
+        if not path:
+            return
 
-        # Remove Duplicates
-        self._uniqify()
+        start = default_timer()
 
-    def remove(self, f):
-        """
-        Remove a recent timing from the list.
-        :param f: ATFile
-        :return: bool
-        """
-        self.data.remove(f)
+        if self.source_combobox.currentIndex() == 0:
+            track = core.ATClickTrack.from_take(take, self.snap_checkbox.isChecked(), self.count_in_spinbox.value())
+        else:
+            track = core.ATClickTrack.from_tempo(self.tempo_spinbox.value(), self.beats_spinbox.value(),
+                                                 self.parent.fps_label.text(), self.start_spinbox.value(),
+                                                 self.bar_spinbox.value(), self.count_in_spinbox.value())
 
-        # Remove Duplicates
-        self._uniqify()
+        try:
+            samples = track.write(path)
+        except (IOError, OSError, wave.Error) as e:
+            AnimationTimer.error(u"Animation Timer: cannot write %s: %s" % (path, e))
+            return
 
-    def clear(self):
-        """
-        Clear the list of Recent Timings.
-        :return: void
-        """
-        self.data[:] = []
+        elapsed = default_timer() - start
 
-    def all(self):
-        """
-        Return all the list of recent timings
-        :return: list
-        """
-        return self.data
+        self._import_sound(path, track.start_frame)
+
+        self.status_label.setText(u"%d clicks, %s long, rendered in %d ms. Starts on frame %d." % (
+            len(track), core.format_time(samples * 1000 // track.rate), elapsed * 1000, track.start_frame))
 
     # ---
 
-    def on_clear_triggerd(self):
+    def _import_sound(self, path, frame):
         """
-        When clearing recent timing items.
-        It is permanent. You will have to reopen a create new files to append to the list again.
-        :return:
+        Put the click track on a sound node starting on a frame, and on
+        the timeline if asked.
         """
-        self.clear()
-        self._uniqify()
+        if pm.objExists(ATClickTrackWindow.NODE):
+            pm.delete(ATClickTrackWindow.NODE)
 
-    # ---
+        node = pm.sound(file=path, offset=frame, name=ATClickTrackWindow.NODE)
 
-    @property
-    def count(self):
-        """
-        Count the number of file in Recent Timings
-        :return: int
-        """
-        return len(self.data)
+        if self.timeline_checkbox.isChecked():
+            slider = pm.language.mel.eval('$temp1=$gPlayBackSlider')
+            pm.timeControl(slider, edit=True, sound=node, displaySound=True)
 
-    # ---
 
-    def _update(self, f):
-        """
-        Update a recent timing by putting it to the top of the list.
-        :param f: ATFile obj
-        :return: void
-        """
-        self.remove(f)
-        self.add(f)
+class ATEditWindow(QtGui.QDialog):
+    """
+    Nudge, scale or fit the selected captures.
+    """
 
-        # Remove Duplicates
-        self._uniqify()
+    OPERATIONS = [u"Nudge", u"Scale", u"Fit to duration"]
+    UNITS = [u"frames", u"ms"]
+    PIVOTS = [u"First capture", u"Last capture", u"Middle"]
 
-    def _uniqify(self):
-        """
-        Remove all duplicates from data when preserving the order.
-        """
-        seen = set()
-        result = list()
+    def __init__(self, parent):
+        super(ATEditWindow, self).__init__(parent)
 
-        for f in self.data:
-            if f.fileName() in seen: continue
-            result.append(f)
-            seen.add(f.fileName())
+        self.parent = parent
+        self.setWindowTitle(u"Edit Captures")
+        self.setFixedSize(280, 200)
 
-        self.data[:] = result
+        # Controls
+        self.operation_combobox = QtGui.QComboBox()
+        self.operation_combobox.addItems(ATEditWindow.OPERATIONS)
 
-        # Save changes
-        self._save()
+        self.amount_spinbox = QtGui.QDoubleSpinBox()
+        self.amount_spinbox.setRange(-999999, 999999)
+        self.amount_spinbox.setDecimals(0)
 
-        # Automatically generate the menu
-        self._generate_menu()
+        self.unit_combobox = QtGui.QComboBox()
+        self.unit_combobox.addItems(ATEditWindow.UNITS)
 
-    def _generate_menu(self):
-        """
-        Generate the menu
-        :return: void
-        """
-        if self.count > 0:
-            # Enabled the submenu
-            self.parent.submenu_recent_timing.setEnabled(True)
+        self.pivot_combobox = QtGui.QComboBox()
+        self.pivot_combobox.addItems(ATEditWindow.PIVOTS)
 
-            # Delete all actions in the menu to recreate them later
-            # Only temporary...
-            self.parent.submenu_recent_timing.clear()
+        self.status_label = QtGui.QLabel()
+        self.status_label.setStyleSheet("""
+                                        color:#888888;
+                                        font-style:italic;
+                                        """)
 
-            # Add actions dynamically
-            for f in self.data:
-                # Create QAction
-                item = QtGui.QAction(f.fileName(), self.parent)
-                item.setAutoRepeat(False)
-                item.triggered.connect(self.parent.on_recent_item_triggered)
+        self.button_box = QtGui.QDialogButtonBox(QtGui.QDialogButtonBox.Apply | QtGui.QDialogButtonBox.Close)
 
-                # Append to submenu
-                self.parent.submenu_recent_timing.addAction(item)
+        # Layout
+        amount_layout = QtGui.QHBoxLayout()
+        amount_layout.addWidget(self.amount_spinbox, 1)
+        amount_layout.addWidget(self.unit_combobox)
 
-            # Add management options at the bottom
-            item_clear = QtGui.QAction(u"Clear", self.parent)
-            item_clear.setAutoRepeat(False)
-            item_clear.triggered.connect(self.on_clear_triggerd)
+        settings_layout = QtGui.QFormLayout()
+        settings_layout.addRow(u"Operation", self.operation_combobox)
+        settings_layout.addRow(u"Amount", amount_layout)
+        settings_layout.addRow(u"Pivot", self.pivot_combobox)
 
-            self.parent.submenu_recent_timing.addSeparator()
-            self.parent.submenu_recent_timing.addAction(item_clear)
+        main_layout = QtGui.QVBoxLayout()
+        main_layout.addLayout(settings_layout)
+        main_layout.addWidget(self.status_label)
+        main_layout.addStretch(1)
+        main_layout.addWidget(self.button_box)
+
+        self.setLayout(main_layout)
+
+        # Connections
+        self.operation_combobox.currentIndexChanged.connect(self.on_operation_changed)
+        self.button_box.button(QtGui.QDialogButtonBox.Apply).clicked.connect(self.on_apply_clicked)
+        self.button_box.rejected.connect(self.reject)
+
+        self.on_operation_changed(0)
+
+    # ---
+
+    def showEvent(self, event):
+        self.on_selection_changed()
+        super(ATEditWindow, self).showEvent(event)
 
+    def on_operation_changed(self, index):
+        scale = index == 1
+
+        # Scale is a percentage, the others a time
+        self.amount_spinbox.setSuffix(u" %" if scale else u"")
+        self.amount_spinbox.setValue(100 if scale else (0 if index == 0 else self._selection_span()))
+        self.unit_combobox.setEnabled(not scale)
+        self.pivot_combobox.setEnabled(scale)
+
+    def on_selection_changed(self, *args):
+        rows = self.parent.central_list.selected_rows()
+        take = self.parent.central_list.session.current
+
+        if len(rows) > 1:
+            span = take.frames[rows[-1]] - take.frames[rows[0]]
+            self.status_label.setText(u"%d captures selected, over %d frames" % (len(rows), span))
         else:
-            self.parent.submenu_recent_timing.setEnabled(False)
+            self.status_label.setText(u"%d capture selected" % len(rows))
 
-    def _save(self):
-        """
-        Save data to setting file.
-        :return: bool
-        """
-        settings = AnimationTimer.load_settings_file()
-        settings.beginGroup("RecentTimings")
+        self.button_box.button(QtGui.QDialogButtonBox.Apply).setEnabled(bool(rows))
 
-        # Remove everything inside that group
-        settings.remove('')
+    def on_apply_clicked(self):
+        central_list = self.parent.central_list
+        take = central_list.session.current
+        rows = central_list.selected_rows()
 
-        # Add new data
-        for key, value in enumerate(self.data):
-            settings.setValue("recent_timing_" + str(key+1), value.fileName())
+        if not rows:
+            return
 
-        settings.endGroup()
+        operation = self.operation_combobox.currentIndex()
+        amount = self.amount_spinbox.value()
+        frames = self.unit_combobox.currentIndex() == 0
 
-    def _load(self):
-        """
-        Load data from setting file.
-        :return: bool
-        """
-        # Clear the list before hand
-        self.clear()
+        if operation == 0:
+            if frames:
+                times = ATBulkEdit.nudge(take, rows, frames=int(amount))
+            else:
+                times = ATBulkEdit.nudge(take, rows, ms=int(amount))
+        elif operation == 1:
+            first, last = take.times[rows[0]], take.times[rows[-1]]
+            pivot = [first, last, (first + last) // 2][self.pivot_combobox.currentIndex()]
+            times = ATBulkEdit.scale(take, rows, amount / 100.0, pivot)
+        else:
+            duration = AnimationTimer.calculate_time_ms(int(amount), take.fps) if frames else int(amount)
+            times = ATBulkEdit.fit(take, rows, duration)
 
-        settings = AnimationTimer.load_settings_file()
-        settings.beginGroup("RecentTimings")
+        self.parent.on_stop_btn_clicked()
+        central_list.set_times(rows, times, ATEditWindow.OPERATIONS[operation])
 
-        # Get all keys
-        keys = settings.allKeys()
+        self.on_selection_changed()
 
-        # Populate
-        if keys:
-            for key in keys:
-                self.data.append(ATFile(settings.value(key)))
+    # ---
 
-        # Generate menu
-        self._generate_menu()
+    def _selection_span(self):
+        """
+        Time between the first and the last selected captures, in the
+        current unit.
+        """
+        rows = self.parent.central_list.selected_rows()
+        take = self.parent.central_list.session.current
 
-        settings.endGroup()
+        if len(rows) < 2:
+            return 0
+
+        if self.unit_combobox.currentIndex() == 0:
+            return take.frames[rows[-1]] - take.frames[rows[0]]
+
+        return take.times[rows[-1]] - take.times[rows[0]]
 
 
 class AnimationTimerOptions(QtGui.QDialog):
 
-    fps_preset_list = [6, 12, 15, 24, 25, 30, 48, 50, 60]
+    fps_preset_list = [6, 12, 15, 23.976, 24, 25, 29.97, 30, 48, 50, 59.94, 60]
     default_fps = 24
 
     MIN_FPS = 6
@@ -1721,7 +5121,8 @@ class AnimationTimerOptions(QtGui.QDialog):
         self.fps_label = QtGui.QLabel(u"fps")
         self.custom_fps_label = QtGui.QLabel(u"fps")
 
-        self.fps_custom_spinbox = QtGui.QSpinBox()
+        self.fps_custom_spinbox = QtGui.QDoubleSpinBox()
+        self.fps_custom_spinbox.setDecimals(3)
         self.fps_custom_spinbox.setRange(
             AnimationTimerOptions.MIN_FPS, AnimationTimerOptions.MAX_FPS)
         self.fps_custom_spinbox.setFixedWidth(100)
@@ -1738,8 +5139,8 @@ class AnimationTimerOptions(QtGui.QDialog):
 
         self.timebox = QtGui.QTimeEdit()
         self.timebox.setMinimumTime(QtCore.QTime(0, 0, 0, 0))
-        self.timebox.setMaximumTime(QtCore.QTime(0, 60, 0, 0))
-        self.timebox.setDisplayFormat("mm:ss:zzz")
+        self.timebox.setMaximumTime(QtCore.QTime(23, 59, 59, 999))
+        self.timebox.setDisplayFormat("hh:mm:ss:zzz")
 
         self.offset_time_eraser = QtGui.QPushButton()
         self.offset_time_eraser.setIcon(QtGui.QIcon(QtCore.QDir(os.path.join(AnimationTimer.ICON_DIR, 'ysp_eraser.png')).path()).pixmap(16, 16))
@@ -1863,21 +5264,23 @@ class AnimationTimerOptions(QtGui.QDialog):
     def on_accepted(self):
         # FPS
         if self.fps_radio_preset.isChecked():
-            self.fps = int(self.fps_combobox.currentText())
+            self.fps = core.ATTimebase.get(self.fps_combobox.currentText())
 
         if self.fps_radio_custom.isChecked():
-            self.fps = int(self.fps_custom_spinbox.value())
+            self.fps = core.ATTimebase.get(self.fps_custom_spinbox.value())
 
         # Change on the interface
-        self.parent.fps_label.setNum(self.fps)
+        self.parent.fps_label.setText(str(self.fps))
 
         # Offsets
         offset_time_ms = QtCore.QTime(0, 0, 0).msecsTo(self.timebox.time())
         offset_frame_ms = AnimationTimer.calculate_time_ms(self.framebox.value(), self.parent.fps_label.text())
         self.parent.timer.offset = int(offset_time_ms + offset_frame_ms)
-        self.parent.timer_label.setText(QtCore.QTime(0, 0, 0).addMSecs(self.parent.timer.offset).toString("mm:ss:zzz"))
+        self.parent.set_timer_display(self.parent.timer.offset)
+
+        self.parent.frame_counter_label.setNum(AnimationTimer.calculate_frames(self.parent.timer.offset, self.fps))
 
-        self.parent.frame_counter_label.setNum(int(AnimationTimer.calculate_frames(self.parent.timer.offset, self.fps)))
+        self.parent.central_list.set_timebase(self.fps, self.parent.timer.offset)
 
         if self.parent.timer.offset > 0:
             self.parent.action_reset_offsets.setEnabled(True)
@@ -1956,14 +5359,20 @@ class AnimationTimerOptions(QtGui.QDialog):
             return
 
         # FPS
-        fps = infos.get('fps', AnimationTimerOptions.default_fps)
-        if AnimationTimerOptions.is_preset(int(fps)):
+        try:
+            fps = core.ATTimebase.get(infos.get('fps') or AnimationTimerOptions.default_fps)
+        except (ValueError, ZeroDivisionError):
+            fps = core.ATTimebase.get(AnimationTimerOptions.default_fps)
+
+        if AnimationTimerOptions.is_preset(fps):
+            self.fps_radio_preset.setChecked(True)
             self.on_fps_preset_selected()
             i = self.fps_combobox.findText(str(fps))
             self.fps_combobox.setCurrentIndex(i)
         else:
+            self.fps_radio_custom.setChecked(True)
             self.on_fps_custom_selected()
-            self.fps_custom_spinbox.setValue(int(fps))
+            self.fps_custom_spinbox.setValue(float(fps))
 
         # Offsets
         offset_time = infos.get('offset_time', 0)
@@ -1980,7 +5389,8 @@ class AnimationTimerOptions(QtGui.QDialog):
         Check if a fps number is a preset or a custom.
         :return bool
         """
-        return True if fps in AnimationTimerOptions.fps_preset_list else False
+        fps = core.ATTimebase.get(fps)
+        return True if fps in [core.ATTimebase.get(x) for x in AnimationTimerOptions.fps_preset_list] else False
 
     # ---
 
@@ -1996,7 +5406,7 @@ class AnimationTimerPreferences(QtGui.QDialog):
 
         self.parent = parent
         self.setWindowTitle(u"Preferences")
-        self.setFixedSize(450, 350)
+        self.setFixedSize(450, 500)
 
         self.section_font = QtGui.QFont()
         self.section_font.setPixelSize(24)
@@ -2031,6 +5441,7 @@ class AnimationTimerPreferences(QtGui.QDialog):
         self.button_box.rejected.connect(self.on_rejected)
         self.menu.currentItemChanged.connect(self.on_page_selected)
         self.timings_default_dir_btn.clicked.connect(self._select_dir)
+        self.timings_search_dirs_btn.clicked.connect(self._add_search_dir)
 
         self._read_pref_settings()
 
@@ -2044,7 +5455,8 @@ class AnimationTimerPreferences(QtGui.QDialog):
 
         # Contents
         self.general_default_fps_label = QtGui.QLabel(u"Default FPS")
-        self.general_default_fps_num = QtGui.QSpinBox()
+        self.general_default_fps_num = QtGui.QDoubleSpinBox()
+        self.general_default_fps_num.setDecimals(3)
         self.general_default_fps_num.setRange(AnimationTimerOptions.MIN_FPS, AnimationTimerOptions.MAX_FPS)
         self.general_default_fps_num.setSingleStep(2)
 
@@ -2055,6 +5467,36 @@ class AnimationTimerPreferences(QtGui.QDialog):
         self.general_auto_load_timing_label = QtGui.QLabel(u"Open the last timing you worked on when script start")
         self.general_auto_load_timing_label.setWordWrap(True)
 
+        self.general_tracks_label = QtGui.QLabel(u"Tracks")
+        self.general_tracks_label.setStyleSheet("margin-top:10px;")
+
+        self.general_tracks_edit = QtGui.QLineEdit()
+        self.general_tracks_edit.setPlaceholderText(u"Left foot=F; Right foot=J; Head=H")
+        self.general_tracks_edit.setToolTip(u"Tracks as Name=Key separated by ';'")
+
+        self.general_tracks_desc = QtGui.QLabel(
+            u'Record several tracks at once, each key captures on its track. '
+            'Space captures on the first one. Leave empty for a single track.')
+        self.general_tracks_desc.setWordWrap(True)
+        self.general_tracks_desc.setStyleSheet("""
+                                            color:#888888;
+                                            font-style:italic;
+                                            """)
+
+        self.general_tap_port_spinbox = QtGui.QSpinBox()
+        self.general_tap_port_spinbox.setRange(1024, 65535)
+        self.general_tap_port_spinbox.setButtonSymbols(QtGui.QAbstractSpinBox.NoButtons)
+        self.general_tap_port_label = QtGui.QLabel(u"UDP port of the External Tap Input")
+
+        self.general_tap_network_checkbox = QtGui.QCheckBox()
+        self.general_tap_network_label = QtGui.QLabel(u"Accept taps from other machines")
+
+        self.general_broadcast_edit = QtGui.QLineEdit()
+        self.general_broadcast_edit.setFixedWidth(130)
+        self.general_broadcast_edit.setPlaceholderText(u"%s:%d" % (core.ATLivePublisher.GROUP,
+                                                                   core.ATLivePublisher.PORT))
+        self.general_broadcast_label = QtGui.QLabel(u"Broadcast address (multicast group or host)")
+
         # Grid
         self.grid_general = QtGui.QGridLayout()
         self.grid_general.setColumnStretch(1, 1)
@@ -2065,6 +5507,15 @@ class AnimationTimerPreferences(QtGui.QDialog):
         self.grid_general.addWidget(self.general_reset_offsets_on_new_file_label, 1, 1)
         self.grid_general.addWidget(self.general_auto_load_timing_checkbox, 2, 0, QtCore.Qt.AlignRight)
         self.grid_general.addWidget(self.general_auto_load_timing_label, 2, 1)
+        self.grid_general.addWidget(self.general_tracks_label, 3, 0, 1, 2)
+        self.grid_general.addWidget(self.general_tracks_edit, 4, 0, 1, 2)
+        self.grid_general.addWidget(self.general_tracks_desc, 5, 0, 1, 2)
+        self.grid_general.addWidget(self.general_tap_port_spinbox, 6, 0, QtCore.Qt.AlignRight)
+        self.grid_general.addWidget(self.general_tap_port_label, 6, 1)
+        self.grid_general.addWidget(self.general_tap_network_checkbox, 7, 0, QtCore.Qt.AlignRight)
+        self.grid_general.addWidget(self.general_tap_network_label, 7, 1)
+        self.grid_general.addWidget(self.general_broadcast_edit, 8, 0, QtCore.Qt.AlignRight)
+        self.grid_general.addWidget(self.general_broadcast_label, 8, 1)
 
         # Set layout
         self.layout_general = QtGui.QVBoxLayout()
@@ -2130,6 +5581,33 @@ class AnimationTimerPreferences(QtGui.QDialog):
         self.timings_recent_timing_spinbox.setButtonSymbols(QtGui.QAbstractSpinBox.NoButtons)
         self.timings_recent_timing_spinbox.setSingleStep(1)
 
+        self.timings_search_dirs_label = QtGui.QLabel(u"Search Directories")
+        self.timings_search_dirs_label.setStyleSheet("margin-top:10px;")
+
+        self.timings_search_dirs_edit = QtGui.QLineEdit()
+        self.timings_search_dirs_edit.setToolTip(u"Directories separated by ';'")
+
+        self.timings_search_dirs_btn = QtGui.QPushButton(u'+')
+        self.timings_search_dirs_btn.setFixedWidth(30)
+
+        self.timings_search_dirs_desc = QtGui.QLabel(
+            u'Used by "Find Timing". If empty, the default directory '
+            'and the current project are searched.')
+        self.timings_search_dirs_desc.setWordWrap(True)
+        self.timings_search_dirs_desc.setStyleSheet("""
+                                            color:#888888;
+                                            font-style:italic;
+                                            """)
+
+        self.timings_search_dirs_hbox = QtGui.QHBoxLayout()
+        self.timings_search_dirs_hbox.addWidget(self.timings_search_dirs_edit)
+        self.timings_search_dirs_hbox.addWidget(self.timings_search_dirs_btn)
+
+        self.timings_search_dirs_layout = QtGui.QVBoxLayout()
+        self.timings_search_dirs_layout.addWidget(self.timings_search_dirs_label)
+        self.timings_search_dirs_layout.addLayout(self.timings_search_dirs_hbox)
+        self.timings_search_dirs_layout.addWidget(self.timings_search_dirs_desc)
+
         # Grid
         self.grid_timings = QtGui.QGridLayout()
         self.grid_timings.setColumnStretch(1, 1)
@@ -2139,6 +5617,7 @@ class AnimationTimerPreferences(QtGui.QDialog):
         self.grid_timings.addWidget(self.timings_save_in_project_dir_label, 1, 1)
         self.grid_timings.addWidget(self.timings_recent_timing_spinbox, 2, 0, QtCore.Qt.AlignRight)
         self.grid_timings.addWidget(self.timings_recent_timing_label, 2, 1)
+        self.grid_timings.addLayout(self.timings_search_dirs_layout, 3, 0, 1, 2)
 
         # Set layout
         self.layout_timings = QtGui.QVBoxLayout()
@@ -2183,6 +5662,23 @@ class AnimationTimerPreferences(QtGui.QDialog):
         else:
             return
 
+    def _add_search_dir(self):
+
+        directory = QtGui.QFileDialog.getExistingDirectory(
+            self,
+            u"Add a search directory",
+            '',
+            QtGui.QFileDialog.DontUseNativeDialog |
+            QtGui.QFileDialog.ShowDirsOnly
+            )
+
+        if not directory:
+            return
+
+        directories = [d for d in self.timings_search_dirs_edit.text().split(';') if d]
+        directories.append(QtCore.QDir(directory).path())
+        self.timings_search_dirs_edit.setText(u';'.join(directories))
+
     # ---
 
     def _read_pref_settings(self):
@@ -2191,7 +5687,7 @@ class AnimationTimerPreferences(QtGui.QDialog):
         settings.beginGroup("Preferences")
 
         # General
-        self.general_default_fps_num.setValue(int(settings.value("default_fps", 24)))
+        self.general_default_fps_num.setValue(float(settings.value("default_fps", 24)))
         self.general_reset_offsets_on_new_file_checkbox.setChecked(
             bool_str(settings.value("reset_offsets_on_new_file", True)))
 
@@ -2199,7 +5695,12 @@ class AnimationTimerPreferences(QtGui.QDialog):
         self.timings_default_dir_edit.setText(directory.path())
         self.timings_recent_timing_spinbox.setValue(int(settings.value("max_recent_timing", 10)))
         self.general_auto_load_timing_checkbox.setChecked(bool_str(settings.value("auto_load_last_timing", False)))
+        self.general_tracks_edit.setText(settings.value("tracks", u''))
+        self.general_tap_port_spinbox.setValue(int(settings.value("tap_port", core.TAP_PORT)))
+        self.general_tap_network_checkbox.setChecked(bool_str(settings.value("tap_network", False)))
+        self.general_broadcast_edit.setText(settings.value("broadcast_address", u''))
         self.timings_save_in_project_dir_checkbox.setChecked(bool_str(settings.value("project_save_in_dirs", True)))
+        self.timings_search_dirs_edit.setText(settings.value("search_directories", u''))
 
         settings.endGroup()
 
@@ -2211,12 +5712,17 @@ class AnimationTimerPreferences(QtGui.QDialog):
         # For directory, passes it to QDir for multi-system
         directory = QtCore.QDir(self.timings_default_dir_edit.text())
 
-        settings.setValue("default_fps", self.general_default_fps_num.value())
+        settings.setValue("default_fps", str(core.ATTimebase.get(self.general_default_fps_num.value())))
         settings.setValue("reset_offsets_on_new_file", self.general_reset_offsets_on_new_file_checkbox.isChecked())
         settings.setValue("default_directory", directory.path())
         settings.setValue("max_recent_timing", self.timings_recent_timing_spinbox.value())
         settings.setValue("auto_load_last_timing", self.general_auto_load_timing_checkbox.isChecked())
+        settings.setValue("tracks", self.general_tracks_edit.text())
+        settings.setValue("tap_port", self.general_tap_port_spinbox.value())
+        settings.setValue("tap_network", self.general_tap_network_checkbox.isChecked())
+        settings.setValue("broadcast_address", self.general_broadcast_edit.text())
         settings.setValue("project_save_in_dirs", self.timings_save_in_project_dir_checkbox.isChecked())
+        settings.setValue("search_directories", self.timings_search_dirs_edit.text())
 
         settings.endGroup()
 
@@ -2252,14 +5758,15 @@ class ATNode(object):
         pm.group(w=True, em=True, n=self.name)
         self._node = pm.general.PyNode(self.name)
 
+        take = self.parent.central_list.session.current
+
         # Prepare...
-        self._prepare_object()
+        self._prepare_object(take.tracks)
 
-        # If central list have content
-        if self.parent.central_list.rowCount() > 0:
-            data = self.parent.central_list.export_data()
-            for row in data:
-                self.add(row['frame'])
+        # If the current take have content
+        frames = take.frames
+        for row in range(len(take)):
+            self.add(frames[row], take.channel(row))
 
     def delete(self):
         """
@@ -2282,11 +5789,18 @@ class ATNode(object):
 
     # ---
 
-    def add(self, frame):
+    def add(self, frame, channel=0):
         """
-        Add a keyframe.
+        Add a keyframe, on the curve of its track.
         """
-        pm.setKeyframe(self.name, attribute="keys", t=frame)
+        pm.setKeyframe(self.name, attribute=ATNode.attribute(channel), t=frame)
+
+    @staticmethod
+    def attribute(channel):
+        """
+        The first track keeps the "keys" attribute of single track timings.
+        """
+        return "keys%d" % channel if channel else "keys"
 
     def key(self):
         pass
@@ -2299,11 +5813,16 @@ class ATNode(object):
 
     # ---
 
-    def _prepare_object(self):
+    def _prepare_object(self, tracks=None):
         """
         Prepare the attribute of the object for the keys.
+        One attribute per track, named after it in the channel box.
         """
-        pm.addAttr(self.name, longName="keys", at='bool', k=True)
+        for channel, track in enumerate(tracks or [None]):
+            if track:
+                pm.addAttr(self.name, longName=ATNode.attribute(channel), niceName=track, at='bool', k=True)
+            else:
+                pm.addAttr(self.name, longName=ATNode.attribute(channel), at='bool', k=True)
 
         # Hide the others
         self._node.translateX.set(keyable=False)
@@ -0,0 +1,4637 @@
+# -*- coding: utf-8 -*-
+
+"""
+Animation Timer - Core.
+---
+
+Timing data, file formats and batch tools of Animation Timer.
+
+This module does not need Maya nor Qt: animationtimer.py uses it inside Maya
+and it can be run as a command line tool:
+
+    python animationtimer_core.py convert SOURCE DESTINATION --fps 30 --format csv
+    python animationtimer_core.py tap --ping 20
+    python animationtimer_core.py replay TIMING --speed 10
+    python animationtimer_core.py diff FIRST SECOND --take shifted,inserted --merge MERGED
+
+---
+
+Copyright 2015 Yann Schmidt
+
+Animation Timer is free software: you can redistribute it and/or modify it under the terms of the
+GNU General Public License as published by the Free Software Foundation, either version 3 of the License,
+or (at your option) any later version.
+
+Animation Timer is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY;
+without even the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.
+See the GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License along with Animation Timer.
+If not, see http://www.gnu.org/licenses/.
+"""
+
+from __future__ import print_function
+
+import os
+import re
+import sys
+import csv
+import json
+import time
+import wave
+import zlib
+import heapq
+import struct
+import socket
+import select
+import sqlite3
+import argparse
+import multiprocessing
+from contextlib import closing
+from math import floor, log10, exp, sin, pi, sqrt
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from fractions import Fraction
+from timeit import default_timer
+
+
+# ---
+# Time & Frames
+
+HOUR = 3600000  # ms
+
+# Typed arrays of times need 64 bits integers. Python 2 has no 'q' and 'l' is
+# only 32 bits on Windows: doubles keep integers exact up to 2^53 ms.
+try:
+    TIME_TYPECODE = array('q').typecode
+except ValueError:
+    TIME_TYPECODE = 'l' if array('l').itemsize >= 8 else 'd'
+
+# One byte per capture for its track.
+TRACK_TYPECODE = 'B'
+TRACK_LIMIT = 16
+
+
+# NTSC rates are shown rounded but are exactly 1000/1001 of the whole rate.
+NTSC_RATES = {
+    '23.976': Fraction(24000, 1001),
+    '23.98': Fraction(24000, 1001),
+    '29.97': Fraction(30000, 1001),
+    '47.952': Fraction(48000, 1001),
+    '59.94': Fraction(60000, 1001),
+    '119.88': Fraction(120000, 1001),
+}
+
+
+class ATTimebase(object):
+    """
+    Exact frame rate, as a fraction of frames per second.
+    ---
+    A rate always comes back in phase with the millisec after a whole
+    number of frames: 3 frames every 125 ms at 24 fps, 30 frames every
+    1001 ms at 29.97 fps. Conversions of one such cycle are tabulated
+    once, any other time is a division and a lookup: O(1) and exact,
+    even hours into a take.
+    """
+    TABLE_LIMIT = 120000  # Entries per table, rates with longer cycles are calculated
+
+    _cache = dict()
+
+    def __init__(self, rate):
+        self.rate = Fraction(rate)
+        if self.rate <= 0:
+            raise ValueError("Invalid frame rate: %s" % rate)
+
+        per_ms = self.rate / 1000
+        self.cycle_frames = per_ms.numerator
+        self.cycle_ms = per_ms.denominator
+
+        self._frames = None  # ms in the cycle -> frame
+        self._times = None   # frame in the cycle -> first ms
+
+        if self.cycle_ms <= ATTimebase.TABLE_LIMIT and self.cycle_frames <= ATTimebase.TABLE_LIMIT:
+            self._frames = array('l', [self._frame(ms) for ms in range(self.cycle_ms)])
+            self._times = array('l', [self._time_ms(f) for f in range(self.cycle_frames)])
+
+    @classmethod
+    def get(cls, fps):
+        """
+        Timebase of a frame rate, created once per value.
+        :param fps: ATTimebase, int, float or str ("24", "29.97", "30000/1001")
+        :return: ATTimebase
+        """
+        if isinstance(fps, ATTimebase):
+            return fps
+
+        try:
+            return cls._cache[fps]
+        except KeyError:
+            pass
+
+        text = str(fps).strip()
+        rate = NTSC_RATES.get(text) or Fraction(text)
+        rate = NTSC_RATES.get(('%.3f' % rate).rstrip('0'), rate)
+
+        if len(cls._cache) > 64:
+            cls._cache.clear()
+
+        timebase = cls._cache[fps] = cls(rate)
+        return timebase
+
+    # ---
+
+    def frame(self, ms):
+        """
+        Frame shown at a time.
+        :param ms: int
+        :return: int
+        """
+        cycles, ms = divmod(int(ms), self.cycle_ms)
+
+        if self._frames is None:
+            return cycles * self.cycle_frames + self._frame(ms)
+
+        return cycles * self.cycle_frames + self._frames[ms]
+
+    def time_ms(self, frame):
+        """
+        First millisec of a frame.
+        :param frame: int
+        :return: int
+        """
+        cycles, frame = divmod(int(frame), self.cycle_frames)
+
+        if self._times is None:
+            return cycles * self.cycle_ms + self._time_ms(frame)
+
+        return cycles * self.cycle_ms + self._times[frame]
+
+    def exact_frame(self, ms):
+        """
+        Frame with its sub-frame part.
+        :return: float
+        """
+        return float(ms) * self.cycle_frames / self.cycle_ms
+
+    @property
+    def drop_frame(self):
+        """
+        29.97 fps and its multiples use SMPTE drop-frame timecode.
+        """
+        return self.rate.denominator == 1001 and self.rate.numerator % 30000 == 0
+
+    def timecode(self, frame, drop=None):
+        """
+        SMPTE timecode of a frame, "hh:mm:ss:ff" or "hh:mm:ss;ff" when
+        frame numbers are dropped.
+        ---
+        Drop-frame timecode skips the first 2 numbers (4 at 59.94 fps) of
+        every minute except each tenth, so it stays on the clock.
+        :param frame: int
+        :param drop: bool, drop-frame by default for the rates using it
+        :return: str
+        """
+        nominal = int(round(self.rate))
+        drop = self.drop_frame if drop is None else drop and self.drop_frame
+
+        sign = u'-' if frame < 0 else u''
+        frame = abs(int(frame))
+
+        if drop:
+            dropped = nominal // 15
+            per_minute = nominal * 60 - dropped
+            per_ten_minutes = nominal * 600 - dropped * 9
+
+            tens, rest = divmod(frame, per_ten_minutes)
+            frame += dropped * 9 * tens
+            if rest > dropped:
+                frame += dropped * ((rest - dropped) // per_minute)
+
+        seconds, ff = divmod(frame, nominal)
+        minutes, seconds = divmod(seconds, 60)
+        hours, minutes = divmod(minutes, 60)
+
+        return u"%s%02d:%02d:%02d%s%02d" % (sign, hours % 24, minutes, seconds, u';' if drop else u':', ff)
+
+    # ---
+
+    def _frame(self, ms):
+        return ms * self.cycle_frames // self.cycle_ms
+
+    def _time_ms(self, frame):
+        return -(-frame * self.cycle_ms // self.cycle_frames)
+
+    def __float__(self):
+        return float(self.rate)
+
+    def __str__(self):
+        """
+        Rate as written in files and in the interface: "24", "29.97".
+        """
+        if self.rate.denominator == 1:
+            return str(self.rate.numerator)
+
+        return ('%.3f' % self.rate).rstrip('0').rstrip('.')
+
+    def __repr__(self):
+        return "ATTimebase(%s)" % self.rate
+
+    def __eq__(self, other):
+        return isinstance(other, ATTimebase) and self.rate == other.rate
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.rate)
+
+
+def calculate_frames(ms, fps):
+    """
+    Calculate the current frame based on the elasped time and current
+    fps.
+    ms : int millisec
+    fps: frame rate, see ATTimebase.get
+    @return int frames
+    """
+    return ATTimebase.get(fps).frame(ms)
+
+
+def calculate_time_ms(frame, fps):
+    """
+    Calculte the time based on the frame and the current fps number
+    :param frame: int
+    :param fps: frame rate, see ATTimebase.get
+    :return milliseconds: int
+    """
+    return ATTimebase.get(fps).time_ms(frame)
+
+
+def calculate_frame_length(fps):
+    """
+    Length of one frame, rounded up.
+    :return: int millisec
+    """
+    return ATTimebase.get(fps).time_ms(1)
+
+
+# "mm:ss:" for every second of an hour and "zzz" for every millisec of a second.
+# Formatting a time is then two lookups and one concatenation.
+_TIME_PREFIXES = [u"%02d:%02d:" % (s // 60, s % 60) for s in range(3600)]
+_TIME_MSECS = [u"%03d" % ms for ms in range(1000)]
+
+
+def format_time(ms):
+    """
+    Millisec to "mm:ss:zzz", same as QTime.toString("mm:ss:zzz").
+    From one hour, hours are added in front: "hh:mm:ss:zzz".
+    :param ms: int
+    :return: str
+    """
+    seconds, msec = divmod(int(ms), 1000)
+    hours, seconds = divmod(seconds, 3600)
+
+    if hours:
+        return u"%02d:" % hours + _TIME_PREFIXES[seconds] + _TIME_MSECS[msec]
+
+    return _TIME_PREFIXES[seconds] + _TIME_MSECS[msec]
+
+
+def benchmark_format_time(count=100000):
+    """
+    Compare format_time with formatting each field of the time, as the
+    QTime round-trip it replaced did, and check both give the same strings:
+        python -c "import animationtimer_core as c; print(c.benchmark_format_time())"
+    or the lookup alone:
+        python -m timeit -s "from animationtimer_core import format_time" "format_time(2345678)"
+    :param count: int number of times formatted, spread over two hours
+    :return: tuple (fields seconds, format_time seconds, int mismatches)
+    """
+    step = max(1, (2 * HOUR - 1) // count)
+    values = range(0, step * count, step)
+
+    def fields_format(ms):
+        hours, rest = divmod(ms, HOUR)
+        text = u"%02d:%02d:%03d" % (rest // 60000, rest // 1000 % 60, rest % 1000)
+        return u"%02d:%s" % (hours, text) if hours else text
+
+    start = default_timer()
+    expected = [fields_format(ms) for ms in values]
+    fields_duration = default_timer() - start
+
+    start = default_timer()
+    result = [format_time(ms) for ms in values]
+    core_duration = default_timer() - start
+
+    return fields_duration, core_duration, sum(1 for a, b in zip(expected, result) if a != b)
+
+
+def parse_time(text):
+    """
+    "mm:ss:zzz" or "hh:mm:ss:zzz" to millisec.
+    :param text: str
+    :return: int
+    """
+    try:
+        values = [int(x) for x in text.split(':')]
+    except (AttributeError, ValueError):
+        values = None
+
+    if not values or len(values) not in (3, 4):
+        raise ValueError("Invalid time: %r" % (text,))
+
+    hours, minutes, seconds, msec = [0] * (4 - len(values)) + values
+
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + msec
+
+
+def parse_tracks(text):
+    """
+    Read the tracks set in the preferences, "Name=Key" separated by ';'.
+    Tracks without a key are kept, they can only be captured on Space
+    if they come first.
+    :param text: str "Left foot=F; Right foot=J; Head=H"
+    :return: list of tuple (name, key)
+    """
+    tracks = list()
+
+    for item in (text or u'').split(';'):
+        name, _, key = item.partition('=')
+        name, key = name.strip(), key.strip()
+
+        if name and name not in [t[0] for t in tracks]:
+            tracks.append((name, key))
+
+    return tracks[:TRACK_LIMIT]
+
+
+class ATCaptureBuffer(object):
+    """
+    Ring buffer of captured times (millisec) and their track.
+    ---
+    Storage is allocated once so appending a capture never allocates
+    nor touches the interface. The reader drains it at display rate.
+    """
+    SIZE = 4096
+
+    def __init__(self, size=SIZE):
+        self.size = size
+        self._data = array(TIME_TYPECODE, [0]) * size
+        self._channels = array(TRACK_TYPECODE, [0]) * size
+
+        self._write = 0  # Total number of captures written
+        self._read = 0   # Total number of captures read
+
+    def __len__(self):
+        return self._write - self._read
+
+    def append(self, ms, channel=0):
+        """
+        Store a capture.
+        :param ms: int
+        :param channel: int track of the capture
+        :return: bool False if the buffer is full
+        """
+        if self._write - self._read >= self.size:
+            return False
+
+        self._data[self._write % self.size] = ms
+        self._channels[self._write % self.size] = channel
+        self._write += 1
+
+        return True
+
+    def drain(self):
+        """
+        Return all pending captures in order and mark them as read.
+        :return: list of tuple (ms, channel)
+        """
+        start = self._read % self.size
+        end = self._write % self.size
+        count = self._write - self._read
+
+        if not count:
+            return []
+
+        if start < end:
+            captures = list(zip([int(ms) for ms in self._data[start:end]], self._channels[start:end]))
+        else:
+            captures = list(zip([int(ms) for ms in self._data[start:]] + [int(ms) for ms in self._data[:end]],
+                                self._channels[start:] + self._channels[:end]))
+
+        self._read = self._write
+
+        return captures
+
+    def clear(self):
+        self._write = 0
+        self._read = 0
+
+
+class ATClock(object):
+    """
+    Clock of the captures: millisec elapsed since start.
+    ---
+    Real time by default, or faster or slower than real time by speed.
+    The timer and the replay take any clock with this interface.
+    """
+    def __init__(self, speed=1.0):
+        self.speed = speed
+        self._start = None
+
+    def start(self):
+        self._start = default_timer()
+
+    def stop(self):
+        self._start = None
+
+    def is_running(self):
+        return self._start is not None
+
+    def elapsed(self):
+        """
+        :return: int ms or None if stopped
+        """
+        start = self._start
+        if start is None:
+            return None
+
+        return int((default_timer() - start) * 1000 * self.speed)
+
+    def wait(self, ms):
+        """
+        Return once elapsed reaches ms. Sleeps overshoot, the last
+        millisec of real time is spent polling.
+        """
+        while True:
+            left = (ms - (self.elapsed() or 0)) / 1000.0 / self.speed
+            if left <= 0:
+                return
+
+            if left > 0.002:
+                time.sleep(left - 0.001)
+
+    def sleep(self, ms):
+        """
+        Let at most ms of clock time pass, 0 only yields to other threads.
+        """
+        time.sleep(max(ms, 0) / 1000.0 / self.speed)
+
+
+class ATVirtualClock(ATClock):
+    """
+    Clock that only moves when told to: runs are deterministic and
+    nothing is waited for.
+    """
+    def __init__(self):
+        super(ATVirtualClock, self).__init__()
+        self.now = 0
+
+    def start(self):
+        self.now = 0
+        self._start = 0
+
+    def elapsed(self):
+        return None if self._start is None else self.now
+
+    def advance(self, ms):
+        self.now += ms
+
+    def wait(self, ms):
+        self.now = max(self.now, ms)
+
+    def sleep(self, ms):
+        # Smallest step is 1 ms, so polling moves on
+        self.now += max(ms, 1)
+
+
+class ATReplay(object):
+    """
+    Feed recorded captures back through a capture path, at their time.
+    ---
+    The path is two callables, as in the interface: capture(ms, channel)
+    stores a capture, flush() moves the stored ones to the table every
+    flush_interval. With the virtual clock a run is deterministic and
+    takes no time; with ATClock(speed) it runs in real time, accelerated.
+    Each capture is timed against its recorded time and against the
+    flush that shows it.
+    """
+    FLUSH_INTERVAL = 16  # ms, as the interface
+
+    def __init__(self, captures, clock=None, flush_interval=FLUSH_INTERVAL):
+        """
+        :param captures: list of tuple (ms, channel) in time order
+        :param clock: ATClock, virtual by default
+        """
+        self.captures = captures
+        self.clock = clock if clock is not None else ATVirtualClock()
+        self.flush_interval = flush_interval
+
+    @classmethod
+    def from_take(cls, take, clock=None, flush_interval=FLUSH_INTERVAL):
+        return cls([(take.times[row], take.channel(row)) for row in range(len(take))], clock, flush_interval)
+
+    def run(self, capture, flush, interrupted=None):
+        """
+        :param capture: callable(ms, channel)
+        :param flush: callable()
+        :param interrupted: callable returning True to stop
+        :return: ATReplayReport
+        """
+        clock = self.clock
+        interval = self.flush_interval
+        report = ATReplayReport()
+
+        pending = list()  # Times of the captures not flushed yet
+        clock.start()
+
+        for ms, channel in self.captures:
+            if interrupted and interrupted():
+                break
+
+            # Flushes due before this capture
+            while pending:
+                due = (pending[0] // interval + 1) * interval
+                if due > ms:
+                    break
+                clock.wait(due)
+                self._flush(flush, pending, report)
+
+            clock.wait(ms)
+
+            now = clock.elapsed()
+            capture(now, channel)
+            pending.append(now)
+
+            report.error.add(now - ms)
+            if now != ms:
+                report.mismatches += 1
+
+        if pending:
+            clock.wait((pending[0] // interval + 1) * interval)
+            self._flush(flush, pending, report)
+
+        clock.stop()
+        report.stop()
+
+        return report
+
+    def headless(self, interrupted=None):
+        """
+        Replay through the capture buffer into a take, as the interface
+        does, without Qt.
+        :return: tuple (ATTake, ATReplayReport)
+        """
+        buffer = ATCaptureBuffer()
+        take = ATTake()
+
+        def flush():
+            take.extend([(ms, u'', channel) for ms, channel in buffer.drain()])
+
+        def capture(ms, channel):
+            if not buffer.append(ms, channel):
+                flush()
+                buffer.append(ms, channel)
+
+        report = self.run(capture, flush, interrupted)
+        flush()
+
+        return take, report
+
+    def _flush(self, flush, pending, report):
+        flush()
+
+        now = self.clock.elapsed()
+        for ms in pending:
+            report.latency.add(now - ms)
+        del pending[:]
+
+
+class ATReplayReport(object):
+    """
+    Summary of an ATReplay run, delays in ms of the replay clock.
+    """
+    def __init__(self):
+        self.error = ATLatency()    # Capture time - recorded time
+        self.latency = ATLatency()  # Flush time - capture time
+        self.mismatches = 0         # Captures not at their recorded time
+
+        self._start = time.time()
+        self.elapsed = 0.0
+
+    def __len__(self):
+        return len(self.error)
+
+    def stop(self):
+        self.elapsed = time.time() - self._start
+
+    def summary(self):
+        return u"\n".join([u"Replayed: %d capture(s) in %.2fs, %d not at their time" % (len(self), self.elapsed,
+                                                                                        self.mismatches),
+                           u"Timing error: %s" % self.error.summary(),
+                           u"Capture to table: %s" % self.latency.summary()])
+
+
+class ATCueScheduler(object):
+    """
+    Fire the captures of a take as cues, at their time on a running clock.
+    ---
+    Meant for a thread of its own, so cues keep their time whatever the
+    interface is busy with. The wait before a cue is slept in short steps,
+    to see an interruption, and its last millisec are polled. Each cue is
+    fired with its lateness, collected in jitter.
+    """
+    POLL = 2    # ms before a cue spent polling
+    CHECK = 50  # ms, longest sleep between two interruption checks
+
+    def __init__(self, cues, clock):
+        """
+        :param cues: list of tuple (ms, channel) in time order
+        :param clock: ATClock, started by the recording
+        """
+        self.cues = cues
+        self.clock = clock
+        self.jitter = ATLatency()  # Fire time - cue time
+
+    @classmethod
+    def from_take(cls, take, clock):
+        return cls([(take.times[row], take.channel(row)) for row in range(len(take))], clock)
+
+    def run(self, fire, interrupted=None):
+        """
+        :param fire: callable(index, late ms)
+        :param interrupted: callable returning True to stop
+        :return: int number of cues fired
+        """
+        clock = self.clock
+        index = 0
+        self.jitter.reset()
+
+        while index < len(self.cues):
+            if interrupted and interrupted():
+                break
+
+            now = clock.elapsed()
+            if now is None:
+                break
+
+            left = self.cues[index][0] - now
+            if left > ATCueScheduler.POLL:
+                clock.sleep(min(left - ATCueScheduler.POLL, ATCueScheduler.CHECK))
+            elif left > 0:
+                clock.sleep(0)
+            else:
+                # Every cue due, when late
+                while index < len(self.cues) and self.cues[index][0] <= now:
+                    fire(index, now - self.cues[index][0])
+                    self.jitter.add(now - self.cues[index][0])
+                    index += 1
+
+        return index
+
+
+class ATTapStats(object):
+    """
+    Consistency of the taps of a track, updated at each capture.
+    ---
+    Mean and variance of the intervals are kept with Welford's online
+    update, the current tempo with an exponential average of the last
+    intervals, and the drift against a beat extended from the first bar.
+    A capture costs the same whatever the length of the take, so the
+    stats follow the recording live.
+    """
+    BAR = 4            # intervals of the first bar
+    SMOOTHING = 0.25   # weight of the last interval in the current tempo
+
+    FIELDS = ('captures', 'count', 'mean', 'm2', 'recent', 'first', 'last', 'bar', 'drift')
+
+    def __init__(self):
+        self.captures = 0
+        self.count = 0      # intervals
+        self.mean = 0.0     # ms
+        self.m2 = 0.0       # sum of squared deviations
+        self.recent = 0.0   # ms, average of the last intervals
+        self.first = None   # ms of the first capture
+        self.last = None    # ms of the last capture
+        self.bar = 0.0      # ms, mean interval of the first bar
+        self.drift = 0.0    # ms, last capture - its beat at the pace of the first bar
+
+    def __len__(self):
+        return self.captures
+
+    @classmethod
+    def from_times(cls, times):
+        """
+        Stats of captures already made, as if recorded in this order.
+        :param times: iterable of int ms in time order
+        :return: ATTapStats
+        """
+        stats = cls()
+        for ms in times:
+            stats.add(ms)
+
+        return stats
+
+    def add(self, ms):
+        self.captures += 1
+
+        if self.last is None:
+            self.first = self.last = ms
+            return
+
+        interval = ms - self.last
+        self.last = ms
+
+        self.count += 1
+        delta = interval - self.mean
+        self.mean += delta / float(self.count)
+        self.m2 += delta * (interval - self.mean)
+
+        self.recent = interval if self.count == 1 else self.recent + ATTapStats.SMOOTHING * (interval - self.recent)
+
+        if self.count <= ATTapStats.BAR:
+            self.bar = self.mean
+        else:
+            self.drift = ms - (self.first + self.count * self.bar)
+
+    @property
+    def deviation(self):
+        """
+        :return: float ms, standard deviation of the intervals
+        """
+        return sqrt(self.m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    @property
+    def tempo(self):
+        """
+        :return: float current beats per minute, 0 before two captures
+        """
+        return 60000.0 / self.recent if self.recent > 0 else 0.0
+
+    def summary(self):
+        if not self.count:
+            return u""
+
+        text = u"%.1f BPM\n%.0f \u00b1 %.1f ms" % (self.tempo, self.mean, self.deviation)
+        if self.count > ATTapStats.BAR:
+            text += u"\ndrift %+d ms" % self.drift
+
+        return text
+
+    def to_dict(self):
+        return dict((field, getattr(self, field)) for field in ATTapStats.FIELDS)
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for field in ATTapStats.FIELDS:
+            if field in data:
+                setattr(stats, field, data[field])
+
+        return stats
+
+
+class ATNoteIndex(object):
+    """
+    Inverted index of the notes of a take: word -> rows.
+    ---
+    Words are lower case and a #tag is indexed both as the tag and as a
+    word. Editing a note only updates the words of its row; deleting and
+    inserting captures shift the rows after them in place, in the postings
+    of their words only.
+    ---
+    A query matches the rows holding all its terms, each term as the start
+    of a word, so it can be searched while typed: the words starting with
+    a term are a range of the sorted vocabulary.
+    """
+    WORD = re.compile(r'#?\w+', re.UNICODE)
+
+    def __init__(self, notes=None):
+        """
+        :param notes: dict row -> text
+        """
+        self.postings = dict()   # word -> set of rows
+        self.words = dict()      # row -> tuple of words
+        self.rows = list()       # Sorted rows holding a note
+        self.vocabulary = list()  # Sorted words
+        self.version = 0         # Changed by every update
+
+        self._last = (None, None, None)  # Last search, as (version, terms, rows)
+
+        for row, text in (notes or {}).items():
+            self.set(row, text)
+
+    def __len__(self):
+        return len(self.words)
+
+    @classmethod
+    def tokenize(cls, text):
+        """
+        :return: set of str words and #tags
+        """
+        words = set()
+        for word in cls.WORD.findall(text.lower()):
+            words.add(word)
+            if word.startswith(u'#') and len(word) > 1:
+                words.add(word[1:])
+
+        return words
+
+    def set(self, row, text):
+        """
+        Index the new note of a row, empty to remove it.
+        """
+        old = self.words.pop(row, ())
+        if old:
+            del self.rows[bisect_left(self.rows, row)]
+
+        for word in old:
+            rows = self.postings[word]
+            rows.discard(row)
+            if not rows:
+                del self.postings[word]
+                del self.vocabulary[bisect_left(self.vocabulary, word)]
+
+        words = ATNoteIndex.tokenize(text) if text else ()
+        if words:
+            self.words[row] = tuple(words)
+            insort(self.rows, row)
+
+        for word in words:
+            if word not in self.postings:
+                self.postings[word] = set()
+                insort(self.vocabulary, word)
+            self.postings[word].add(row)
+
+        self.version += 1
+
+    def delete(self, rows):
+        """
+        :param rows: sorted list of int, rows of the captures removed
+        """
+        if not rows:
+            return
+
+        for row in rows:
+            if row in self.words:
+                self.set(row, u'')
+
+        # Numbered lower from the first: each row moves to a number already left
+        self._shift(rows[0], lambda row: row - bisect_left(rows, row), False)
+
+    def insert(self, rows, notes):
+        """
+        :param rows: sorted list of int, rows of the captures once inserted
+        :param notes: list of str, one per row
+        """
+        if not rows:
+            return
+
+        before = [row - i for i, row in enumerate(rows)]
+        # Numbered higher from the last: each row moves to a number already left
+        self._shift(before[0], lambda row: row + bisect_right(before, row), True)
+
+        for row, text in zip(rows, notes):
+            if text:
+                self.set(row, text)
+
+    def search(self, query):
+        """
+        :return: set of int rows, or None for an empty query
+        """
+        terms = tuple(ATNoteIndex.WORD.findall(query.lower()))
+        if not terms:
+            return None
+
+        if self._last[:2] == (self.version, terms):
+            return self._last[2]
+
+        result = None
+        for term in terms:
+            rows = set()
+            vocabulary = self.vocabulary
+            for i in range(bisect_left(vocabulary, term), len(vocabulary)):
+                if not vocabulary[i].startswith(term):
+                    break
+                rows.update(self.postings[vocabulary[i]])
+
+            result = rows if result is None else result & rows
+            if not result:
+                break
+
+        self._last = (self.version, terms, result)
+        return result
+
+    def tags(self):
+        """
+        :return: list of tuple (str #tag, int number of notes), by tag
+        """
+        # Tags sort between '#' and '$'
+        vocabulary = self.vocabulary
+        tags = vocabulary[bisect_left(vocabulary, u'#'):bisect_left(vocabulary, u'$')]
+
+        return [(word, len(self.postings[word])) for word in tags]
+
+    # ---
+
+    def _shift(self, start, move, backward):
+        """
+        Renumber the rows from start.
+        :param move: callable(row) -> new row, keeping their order
+        :param backward: bool True when rows are numbered higher, so the last moves first
+        """
+        first = bisect_left(self.rows, start)
+        tail = self.rows[first:]
+        moved = [move(row) for row in tail]
+
+        pairs = list(zip(tail, moved))
+        if backward:
+            pairs.reverse()
+
+        words, postings = self.words, self.postings
+        for row, new in pairs:
+            if new != row:
+                row_words = words[new] = words.pop(row)
+                for word in row_words:
+                    rows = postings[word]
+                    rows.discard(row)
+                    rows.add(new)
+
+        self.rows[first:] = moved
+        self.version += 1
+
+
+class ATTake(object):
+    """
+    One recording attempt.
+    ---
+    Each capture is stored once, as the millisec elapsed since Start
+    (offset not included), in a typed array. Frames and texts are derived
+    from it for the current fps and offset: frames are calculated for the
+    whole take in one pass when first needed, texts row by row when shown.
+    Notes are kept apart in a dict as most captures have none.
+    ---
+    Captures of every track share the same arrays, in time order, so
+    editing and undoing stay row based. The track of each capture is
+    kept in channels, only once a capture is not on the first track.
+    The rows of each track are derived from it when needed.
+    ---
+    Takes made by the tool rather than tapped keep their origin.
+    """
+    CONSENSUS = u'consensus'  # Origins
+    SOUND = u'sound'
+    MERGE = u'merge'
+
+    def __init__(self, name=u'', fps=24, offset=0):
+        self.name = name
+
+        self.times = array(TIME_TYPECODE)   # ms since Start
+        self.notes = dict()       # row -> text
+
+        self.tracks = list()      # Names of the tracks, empty for a single track
+        self.channels = None      # Track of each capture, None if all on the first
+
+        self.scores = None        # Outlier score per capture, see ATConsensus
+        self.stats = list()       # ATTapStats per track, as recorded
+        self.origin = None        # CONSENSUS, SOUND or MERGE, None when tapped
+
+        self.fps = fps
+        self.offset = offset      # ms
+
+        self._frames = None
+        self._texts = None
+        self._rows = None         # channel -> rows of the track
+        self._note_index = None   # ATNoteIndex, built when first searched
+
+    def __len__(self):
+        return len(self.times)
+
+    def extend(self, captures):
+        """
+        Append captures to the take.
+        :param captures: list of tuple (ms, note) or (ms, note, channel)
+        :return: void
+        """
+        for capture in captures:
+            ms, note = capture[0], capture[1]
+            channel = capture[2] if len(capture) > 2 else 0
+
+            if note:
+                self.notes[len(self.times)] = note
+                if self._note_index is not None:
+                    self._note_index.set(len(self.times), note)
+
+            if channel and self.channels is None:
+                self.channels = array(TRACK_TYPECODE, [0]) * len(self.times)
+
+            if self.channels is not None:
+                self.channels.append(channel)
+
+            if self._rows is not None:
+                self._rows.setdefault(channel, array('l')).append(len(self.times))
+
+            self.times.append(int(ms))
+
+        if self._frames is not None:
+            self._frames.extend(self._calculate_frames(self.times[len(self._frames):]))
+            self._texts.extend([None] * (len(self.times) - len(self._texts)))
+
+    def set_times(self, rows, times):
+        """
+        Move captures. Only the frames and texts of these rows are
+        calculated again.
+        :param rows: list of int
+        :param times: list of int ms, offset excluded
+        :return: void
+        """
+        frame = ATTimebase.get(self.fps).frame if self._frames is not None else None
+
+        for row, ms in zip(rows, times):
+            self.times[row] = int(ms)
+
+            if frame is not None:
+                self._frames[row] = frame(self.times[row] + self.offset)
+                self._texts[row] = None
+
+        self._update_stats()
+
+    def set_timebase(self, fps, offset):
+        """
+        Change fps and offset. Derived values are dropped and calculated
+        again when needed.
+        :return: bool True if something changed
+        """
+        if (fps, offset) == (self.fps, self.offset):
+            return False
+
+        self.fps = fps
+        self.offset = offset
+
+        self._frames = None
+        self._texts = None
+
+        return True
+
+    def delete(self, rows):
+        """
+        Remove captures. Frames of the other captures stay valid, only
+        the arrays are cut and the notes renumbered.
+        :param rows: sorted list of int
+        :return: list of tuple (ms, note, channel) removed
+        """
+        captures = [(self.times[row], self.notes.get(row, u''), self.channel(row)) for row in rows]
+
+        self.times = ATTake._remove(self.times, rows)
+        self.notes = dict((row - bisect_left(rows, row), text) for row, text in self.notes.items()
+                          if bisect_left(rows, row) == bisect_right(rows, row))
+        if self._note_index is not None:
+            self._note_index.delete(rows)
+
+        if self._frames is not None:
+            self._frames = ATTake._remove(self._frames, rows)
+            self._texts = ATTake._remove(self._texts, rows)
+
+        if self.scores is not None:
+            self.scores = ATTake._remove(self.scores, rows)
+
+        if self.channels is not None:
+            self.channels = ATTake._remove(self.channels, rows)
+            self._rows = None
+
+        self._update_stats()
+
+        return captures
+
+    def insert(self, rows, captures):
+        """
+        Put back captures removed by delete.
+        :param rows: sorted list of int, rows of the captures once inserted
+        :param captures: list of tuple (ms, note, channel)
+        :return: void
+        """
+        # Row of the other captures before the insertion of each capture
+        before = [row - i for i, row in enumerate(rows)]
+
+        self.notes = dict((row + bisect_right(before, row), text) for row, text in self.notes.items())
+        for row, capture in zip(rows, captures):
+            if capture[1]:
+                self.notes[row] = capture[1]
+        if self._note_index is not None:
+            self._note_index.insert(rows, [capture[1] for capture in captures])
+
+        channels = [capture[2] if len(capture) > 2 else 0 for capture in captures]
+        if any(channels) and self.channels is None:
+            self.channels = array(TRACK_TYPECODE, [0]) * len(self.times)
+        if self.channels is not None:
+            self.channels = ATTake._merge(self.channels, rows, channels)
+            self._rows = None
+
+        times = [int(capture[0]) for capture in captures]
+        self.times = ATTake._merge(self.times, rows, times)
+
+        if self._frames is not None:
+            frame = ATTimebase.get(self.fps).frame
+            self._frames = ATTake._merge(self._frames, rows, [frame(ms + self.offset) for ms in times])
+            self._texts = ATTake._merge(self._texts, rows, [None] * len(rows))
+
+        if self.scores is not None:
+            self.scores = ATTake._merge(self.scores, rows, [None] * len(rows))
+
+        self._update_stats()
+
+    # ---
+
+    @property
+    def frames(self):
+        """
+        Frame of every capture at the current fps and offset.
+        :return: array
+        """
+        if self._frames is None:
+            self._frames = self._calculate_frames(self.times)
+            self._texts = [None] * len(self.times)
+
+        return self._frames
+
+    def time(self, row):
+        """
+        :return: int ms, offset included
+        """
+        return self.times[row] + self.offset
+
+    def frame(self, row):
+        return self.frames[row]
+
+    def exact_frame(self, row):
+        """
+        Frame with its sub-frame part.
+        :return: float
+        """
+        return ATTimebase.get(self.fps).exact_frame(self.time(row))
+
+    def timecode(self, row):
+        """
+        SMPTE timecode of a capture.
+        """
+        return ATTimebase.get(self.fps).timecode(self.frames[row])
+
+    def text(self, row):
+        """
+        Time of a capture as "mm:ss:zzz".
+        """
+        self.frames  # Make sure the cache exists
+
+        text = self._texts[row]
+        if text is None:
+            text = self._texts[row] = format_time(self.time(row))
+
+        return text
+
+    def note(self, row):
+        return self.notes.get(row, u'')
+
+    def set_note(self, row, text):
+        if text:
+            self.notes[row] = text
+        else:
+            self.notes.pop(row, None)
+
+        if self._note_index is not None:
+            self._note_index.set(row, text)
+
+    @property
+    def note_index(self):
+        """
+        :return: ATNoteIndex of the notes, kept up to date once built
+        """
+        if self._note_index is None:
+            self._note_index = ATNoteIndex(self.notes)
+
+        return self._note_index
+
+    def channel(self, row):
+        """
+        :return: int track of a capture
+        """
+        return self.channels[row] if self.channels is not None else 0
+
+    def track(self, row):
+        """
+        :return: str name of the track of a capture
+        """
+        channel = self.channel(row)
+        return self.tracks[channel] if channel < len(self.tracks) else u''
+
+    def tap_stats(self, channel):
+        """
+        :return: ATTapStats of a track, created when first asked
+        """
+        while len(self.stats) <= channel:
+            self.stats.append(ATTapStats())
+
+        return self.stats[channel]
+
+    def _update_stats(self):
+        """
+        Stats recorded with the take follow its edits: they are made again
+        from the captures left on each track.
+        """
+        if self.stats:
+            times = self.times
+            self.stats = [ATTapStats.from_times(times[row] for row in self.track_rows(channel))
+                          for channel in range(len(self.stats))]
+
+    def track_rows(self, channel):
+        """
+        Rows of the captures of a track, in time order.
+        :return: array
+        """
+        if self.channels is None:
+            return array('l', range(len(self.times))) if not channel else array('l')
+
+        if self._rows is None:
+            self._rows = dict()
+            for row, value in enumerate(self.channels):
+                self._rows.setdefault(value, array('l')).append(row)
+
+        return self._rows.get(channel, array('l'))
+
+    def interval(self, row):
+        """
+        Number of frames since the previous capture of the same track.
+        :return: int or None for the first capture
+        """
+        if self.channels is None:
+            previous = row - 1
+        else:
+            rows = self.track_rows(self.channels[row])
+            i = bisect_left(rows, row)
+            previous = rows[i - 1] if i else -1
+
+        if previous < 0:
+            return None
+
+        frames = self.frames
+        return frames[row] - frames[previous]
+
+    # ---
+
+    def to_dict(self):
+        """
+        Frames are saved for readers of the file, they are not read back.
+        :return: dict
+        """
+        data = {
+            'name': self.name,
+            'times': [int(ms) for ms in self.times],
+            'frames': self.frames.tolist(),
+            'notes': dict((str(k), v) for k, v in self.notes.items() if v),
+        }
+
+        # Single track takes are written as before
+        if self.tracks:
+            data['tracks'] = list(self.tracks)
+        if self.channels is not None:
+            data['channels'] = self.channels.tolist()
+        if self.stats:
+            data['stats'] = [stats.to_dict() for stats in self.stats]
+        if self.origin:
+            data['origin'] = self.origin
+
+        return data
+
+    @classmethod
+    def from_dict(cls, data, fps=24, offset=0):
+        take = cls(data.get('name', u''), fps, offset)
+        take.times = array(TIME_TYPECODE, data.get('times', []))
+        take.notes = dict((int(k), v) for k, v in data.get('notes', {}).items())
+        take.tracks = list(data.get('tracks') or [])
+
+        if data.get('channels'):
+            take.channels = array(TRACK_TYPECODE, data['channels'])
+        take.stats = [ATTapStats.from_dict(stats) for stats in data.get('stats') or []]
+        take.origin = data.get('origin') or None
+
+        return take
+
+    # ---
+
+    def _calculate_frames(self, times):
+        frame = ATTimebase.get(self.fps).frame
+        offset = self.offset
+
+        return array('l', [frame(ms + offset) for ms in times])
+
+    @staticmethod
+    def _remove(values, rows):
+        """
+        Copy of an array or a list without some rows, by slices.
+        """
+        result = values[:0]
+        previous = 0
+
+        for row in rows:
+            result.extend(values[previous:row])
+            previous = row + 1
+
+        result.extend(values[previous:])
+        return result
+
+    @staticmethod
+    def _merge(values, rows, inserted):
+        """
+        Copy of an array or a list with values inserted at some rows.
+        """
+        result = values[:0]
+        previous = 0
+
+        for i, (row, value) in enumerate(zip(rows, inserted)):
+            result.extend(values[previous:row - i])
+            result.append(value)
+            previous = row - i
+
+        result.extend(values[previous:])
+        return result
+
+
+class ATSession(object):
+    """
+    All the takes recorded for the current timing.
+    """
+    def __init__(self, fps=24, offset=0):
+        self.takes = list()
+        self.index = -1
+
+        self.fps = fps
+        self.offset = offset
+
+        self._counter = 0  # Used to name takes
+
+    def __len__(self):
+        return len(self.takes)
+
+    def __iter__(self):
+        for take in self.takes:
+            yield take
+
+    def __getitem__(self, item):
+        return self.takes[item]
+
+    @property
+    def current(self):
+        if self.index < 0:
+            return None
+
+        return self.takes[self.index]
+
+    def is_empty(self):
+        return not any(len(take) for take in self.takes)
+
+    def new_take(self, name=None):
+        """
+        Create a new take and make it the current one.
+        :return: ATTake
+        """
+        names = set(take.name for take in self.takes)
+
+        if name:
+            base, i = name, 1
+            while name in names:
+                i += 1
+                name = u"%s %d" % (base, i)
+
+        while not name or name in names:
+            self._counter += 1
+            name = u"Take %d" % self._counter
+
+        take = ATTake(name, self.fps, self.offset)
+        self.takes.append(take)
+        self.index = len(self.takes) - 1
+
+        return take
+
+    def duration(self):
+        """
+        Time of the last capture of the longest take, offset included.
+        :return: int ms
+        """
+        return max([take.time(len(take) - 1) for take in self.takes if len(take)] or [0])
+
+    def set_timebase(self, fps, offset):
+        """
+        Set fps and offset of every take.
+        :return: void
+        """
+        self.fps = fps
+        self.offset = offset
+
+        for take in self.takes:
+            take.set_timebase(fps, offset)
+
+    def select(self, index):
+        self.index = max(-1, min(index, len(self.takes) - 1))
+
+    def remove(self, index):
+        del self.takes[index]
+
+        if self.index >= len(self.takes):
+            self.index = len(self.takes) - 1
+
+    def insert(self, index, take):
+        """
+        Put back a take removed before and make it the current one.
+        Empty takes waiting for a recording are dropped.
+        :return: void
+        """
+        self.takes = [t for t in self.takes if len(t)]
+
+        take.set_timebase(self.fps, self.offset)
+
+        index = max(0, min(index, len(self.takes)))
+        self.takes.insert(index, take)
+        self.index = index
+
+    def clear(self):
+        self.takes = list()
+        self.index = -1
+        self._counter = 0
+
+    def state(self):
+        """
+        The takes as they are now, to restore them after a clear.
+        Takes are not copied.
+        :return: tuple
+        """
+        return list(self.takes), self.index, self._counter
+
+    def restore(self, state):
+        self.takes, self.index, self._counter = list(state[0]), state[1], state[2]
+        self.set_timebase(self.fps, self.offset)
+
+    def to_dict(self):
+        """
+        Empty takes are not exported.
+        :return: dict
+        """
+        takes = [take for take in self.takes if len(take)]
+        current = self.current
+
+        return {
+            'current': takes.index(current) if current in takes else len(takes) - 1,
+            'takes': [take.to_dict() for take in takes],
+        }
+
+    @classmethod
+    def from_dict(cls, data, fps=24, offset=0):
+        session = cls(fps, offset)
+        session.takes = [ATTake.from_dict(d, fps, offset) for d in data.get('takes', [])]
+        session._counter = len(session.takes)
+        session.select(int(data.get('current', len(session.takes) - 1)))
+
+        return session
+
+
+class ATDelta(object):
+    """
+    Changes of integer values at some rows, kept for undo.
+    ---
+    Rows are stored as the gap from the previous row and values as the
+    difference from the old value. Both are small and repetitive, so
+    once packed and compressed a move of a whole take costs a few bytes
+    per capture and a contiguous selection almost nothing.
+    """
+    def __init__(self, rows, before, after):
+        self.count = len(rows)
+
+        self._rows = ATDelta._pack([row - previous for previous, row in zip([0] + list(rows[:-1]), rows)])
+        self._diffs = ATDelta._pack([new - old for old, new in zip(before, after)])
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def size(self):
+        """
+        :return: int bytes kept
+        """
+        return len(self._rows) + len(self._diffs)
+
+    def rows(self):
+        rows = list()
+        row = 0
+        for gap in ATDelta._unpack(self._rows):
+            row += gap
+            rows.append(row)
+
+        return rows
+
+    def apply(self, values, reverse=False):
+        """
+        New values of the rows, or the old ones when reverse.
+        :param values: sequence holding every row
+        :return: tuple (rows, values of these rows)
+        """
+        rows = self.rows()
+        sign = -1 if reverse else 1
+
+        return rows, [values[row] + sign * diff for row, diff in zip(rows, ATDelta._unpack(self._diffs))]
+
+    # ---
+
+    @staticmethod
+    def _pack(values):
+        """
+        Values in the smallest integer type holding them, compressed.
+        The type code comes first.
+        """
+        low = min(values) if values else 0
+        high = max(values) if values else 0
+        typecode = 'b' if -128 <= low and high < 128 else 'h' if -32768 <= low and high < 32768 else 'i'
+
+        data = array(typecode, values)
+        return typecode.encode('ascii') + zlib.compress(data.tobytes() if hasattr(data, 'tobytes') else data.tostring())
+
+    @staticmethod
+    def _unpack(blob):
+        data = array(blob[:1].decode('ascii'))
+        raw = zlib.decompress(blob[1:])
+
+        if hasattr(data, 'frombytes'):
+            data.frombytes(raw)
+        else:
+            data.fromstring(raw)
+
+        return data
+
+
+class ATConsensus(object):
+    """
+    Merge several takes of the same action into one timing.
+    ---
+    Takes are aligned on their first capture, then beat by beat against the
+    take holding the median number of captures. Statistics are computed per
+    beat over all the takes at once.
+    ---
+    Only tapped takes vote: the ones with an origin, made from other takes
+    or from a sound, are left out so a consensus made again does not vote
+    for itself.
+    """
+    OUTLIER_THRESHOLD = 3.5  # Modified z-score
+
+    def __init__(self, takes):
+        self.takes = [take for take in takes if len(take) and take.origin is None]
+
+        self.start = 0          # ms, median of the first captures
+        self.beats = list()     # per beat: list of (take index, row, relative ms)
+
+        self.mean = list()
+        self.median = list()
+        self.spread = list()    # standard deviation, ms
+        self.count = list()
+
+        # Per take, per capture. None when the capture matches no beat.
+        self.scores = [[None] * len(take) for take in self.takes]
+
+        if self.takes:
+            self._align()
+            self._compute()
+
+    def __len__(self):
+        return len(self.beats)
+
+    def times(self):
+        """
+        Consensus time of each beat.
+        :return: list of int ms
+        """
+        return [int(round(self.start + ms)) for ms in self.median]
+
+    # ---
+
+    def _align(self):
+        by_count = sorted(range(len(self.takes)), key=lambda i: len(self.takes[i]))
+        reference = self._relative(self.takes[by_count[len(by_count) // 2]])
+
+        self.beats = [list() for _ in reference]
+
+        for i, take in enumerate(self.takes):
+            relative = self._relative(take)
+
+            # Keep the closest capture for each beat
+            closest = dict()
+            for row, ms in enumerate(relative):
+                beat = ATConsensus._nearest(reference, ms)
+                distance = abs(reference[beat] - ms)
+
+                if beat not in closest or distance < closest[beat][0]:
+                    closest[beat] = (distance, row)
+
+            for beat, (_, row) in closest.items():
+                self.beats[beat].append((i, row, relative[row]))
+
+        self.start = ATConsensus._median([take.times[0] for take in self.takes])
+
+    def _compute(self):
+        for beat in self.beats:
+            values = [ms for _, _, ms in beat]
+            count = len(values)
+
+            median = ATConsensus._median(values)
+            mean = float(sum(values)) / count
+            spread = (sum((v - mean) ** 2 for v in values) / count) ** 0.5
+
+            # Median absolute deviation, at least 1 ms to stay meaningful
+            mad = max(ATConsensus._median([abs(v - median) for v in values]), 1.0)
+
+            for i, row, ms in beat:
+                self.scores[i][row] = 0.6745 * abs(ms - median) / mad
+
+            self.mean.append(mean)
+            self.median.append(median)
+            self.spread.append(spread)
+            self.count.append(count)
+
+    # ---
+
+    @staticmethod
+    def _relative(take):
+        first = take.times[0]
+        return [ms - first for ms in take.times]
+
+    @staticmethod
+    def _median(values):
+        values = sorted(values)
+        half = len(values) // 2
+
+        if len(values) % 2:
+            return float(values[half])
+
+        return (values[half - 1] + values[half]) / 2.0
+
+    @staticmethod
+    def _nearest(values, value):
+        """
+        Index of the nearest value in a sorted list.
+        """
+        i = bisect_left(values, value)
+
+        if i == 0:
+            return 0
+        if i == len(values):
+            return i - 1
+
+        return i if values[i] - value < value - values[i - 1] else i - 1
+
+
+class ATQuantizer(object):
+    """
+    Snap captures to a grid.
+    ---
+    The frame grid moves each capture to the start of its nearest frame.
+    The tempo grid moves it to the nearest subdivision of a beat, counted
+    from an origin, and swing delays every second subdivision. Strength
+    blends the captured and the snapped time: a partial quantize keeps
+    some of the feel and never changes the order of the captures.
+    """
+    FRAMES = 'frames'
+    TEMPO = 'tempo'
+
+    STRAIGHT = 50.0  # %, swing of evenly spaced subdivisions
+
+    def __init__(self, grid=FRAMES, fps=24, tempo=120.0, division=1, swing=STRAIGHT, strength=1.0, origin=0):
+        self.grid = grid
+        self.fps = fps
+        self.tempo = tempo          # beats per minute
+        self.division = division    # subdivisions per beat
+        self.swing = swing          # %, place of the second subdivision of a pair
+        self.strength = strength    # 0 keeps the captures, 1 snaps them
+        self.origin = origin        # ms of a beat, for the tempo grid
+
+    def quantize(self, times, offset=0):
+        """
+        :param times: list of int ms, offset excluded as stored in a take
+        :param offset: int ms added to get the scene time
+        :return: list of int ms, offset excluded
+        """
+        snap = self._snap_frames() if self.grid == ATQuantizer.FRAMES else self._snap_tempo()
+        strength = max(0.0, min(float(self.strength), 1.0))
+
+        return [int(round(ms + strength * (snap(ms + offset) - offset - ms))) for ms in times]
+
+    # ---
+
+    def _snap_frames(self):
+        """
+        :return: callable snapping a time on the start of the nearest frame
+        """
+        timebase = ATTimebase.get(self.fps)
+        exact_frame = timebase.exact_frame
+        time_ms = timebase.time_ms
+
+        def snap(ms):
+            return time_ms(floor(exact_frame(ms) + 0.5))
+
+        return snap
+
+    def _snap_tempo(self):
+        """
+        :return: callable snapping a time on the tempo grid
+        """
+        step = 60000.0 / self.tempo / self.division
+        pair = 2 * step
+        second = pair * self.swing / 100.0
+        origin = self.origin
+
+        def snap(ms):
+            start = origin + ((ms - origin) // pair) * pair
+            return min((start, start + second, start + pair), key=lambda grid: abs(grid - ms))
+
+        return snap
+
+
+class ATBulkEdit(object):
+    """
+    New times of selected captures: nudge, scale and fit.
+    ---
+    A capture never passes the captures around the selection, so a take
+    stays in the order it was recorded and no capture goes before the
+    start of the scene.
+    """
+
+    @classmethod
+    def nudge(cls, take, rows, ms=0, frames=0):
+        """
+        Move by a time, or by a number of frames: each capture then
+        lands exactly that many frames away.
+        :return: list of int ms
+        """
+        if frames:
+            timebase = ATTimebase.get(take.fps)
+            offset = take.offset
+
+            times = list()
+            for row in rows:
+                scene = take.times[row] + offset
+                frame = timebase.frame(scene)
+                times.append(take.times[row] + timebase.time_ms(frame + frames) - timebase.time_ms(frame))
+        else:
+            times = [take.times[row] + ms for row in rows]
+
+        return cls._clamp(take, rows, times)
+
+    @classmethod
+    def scale(cls, take, rows, factor, pivot=None):
+        """
+        Spread or tighten captures around a pivot.
+        :param pivot: int ms, offset excluded. The first capture by default.
+        :return: list of int ms
+        """
+        if not rows:
+            return []
+
+        pivot = take.times[rows[0]] if pivot is None else pivot
+        factor = max(float(factor), 0.0)
+
+        return cls._clamp(take, rows, [int(round(pivot + (take.times[row] - pivot) * factor)) for row in rows])
+
+    @classmethod
+    def fit(cls, take, rows, duration):
+        """
+        Scale captures from the first one so the last one is duration
+        after it.
+        :param duration: int ms
+        :return: list of int ms
+        """
+        if len(rows) < 2:
+            return [take.times[row] for row in rows]
+
+        span = take.times[rows[-1]] - take.times[rows[0]]
+        if not span:
+            return [take.times[row] for row in rows]
+
+        return cls.scale(take, rows, float(duration) / span)
+
+    # ---
+
+    @classmethod
+    def _clamp(cls, take, rows, times):
+        """
+        Keep each time between the captures not moved around it.
+        """
+        count = len(take.times)
+        result = list()
+
+        # Runs of consecutive rows share the same bounds
+        start = 0
+        while start < len(rows):
+            end = start
+            while end + 1 < len(rows) and rows[end + 1] == rows[end] + 1:
+                end += 1
+
+            first, last = rows[start], rows[end]
+            low = take.times[first - 1] if first > 0 else -take.offset
+            high = take.times[last + 1] if last + 1 < count else None
+
+            for ms in times[start:end + 1]:
+                ms = max(ms, low)
+                result.append(int(ms if high is None else min(ms, high)))
+
+            start = end + 1
+
+        return result
+
+
+class ATSmoother(object):
+    """
+    Clean up the jitter of tapped captures.
+    ---
+    Each capture is compared to an estimate of where it should be, made
+    from the captures around it: the median of their extrapolations at the
+    local median interval, a Kalman filter of the position and interval
+    smoothed both ways, or a tempo tracker following the beat both ways.
+    Estimates are made on whole sequences at once and kept for each
+    track, so changing the tolerance, the strength or the outliers-only
+    choice does not estimate again.
+    ---
+    The confidence of a capture falls with its distance to the estimate,
+    outliers are further than tolerance. The tolerance is 3 times the
+    jitter by default, measured on the second differences of the times.
+    """
+    MEDIAN = 'median'
+    KALMAN = 'kalman'
+    TEMPO = 'tempo'
+
+    METHODS = (MEDIAN, KALMAN, TEMPO)
+
+    OUTLIER = exp(-4.5)  # Confidence of a capture at the tolerance
+
+    def __init__(self, method=MEDIAN, window=5, responsiveness=0.5, tolerance=None, strength=1.0,
+                 outliers_only=False):
+        self.method = method
+        self.window = window                  # captures, for the median
+        self.responsiveness = responsiveness  # 0 to 1, how fast the Kalman and the tempo follow a change
+        self.tolerance = tolerance            # ms, None to measure it
+        self.strength = strength              # 0 keeps the captures, 1 moves them on the estimate
+        self.outliers_only = outliers_only
+
+        self._estimates = dict()  # track -> last estimate, as (key, array, jitter)
+
+    def estimate(self, times, track=0):
+        """
+        :param times: list of int ms of one track, in time order
+        :return: array of float ms
+        """
+        return self._estimate(times, track)[0]
+
+    @classmethod
+    def jitter(cls, times):
+        """
+        Robust deviation of the captures from a steady beat: the second
+        differences of a jittered beat have 6 times its variance.
+        :return: float ms
+        """
+        if len(times) < 3:
+            return 0.0
+
+        seconds = sorted(abs(times[i + 1] - 2 * times[i] + times[i - 1]) for i in range(1, len(times) - 1))
+        return 1.4826 * seconds[len(seconds) // 2] / 6 ** 0.5
+
+    def smooth(self, times, track=0):
+        """
+        :param times: list of int ms of one track, in time order
+        :param track: int, the estimate of each track is kept on its own
+        :return: tuple (list of int ms, list of float confidence 0 to 1)
+        """
+        estimates, jitter = self._estimate(times, track)
+
+        tolerance = self.tolerance or max(3 * jitter, 1.0)
+        sigma = tolerance / 3.0
+
+        strength = max(0.0, min(float(self.strength), 1.0))
+        outliers_only = self.outliers_only
+
+        confidence = [exp(-0.5 * ((ms - est) / sigma) ** 2) for ms, est in zip(times, estimates)]
+        smoothed = [int(round(ms + strength * (est - ms))) if not outliers_only or abs(est - ms) > tolerance else ms
+                    for ms, est in zip(times, estimates)]
+
+        # Never out of order
+        for i in range(1, len(smoothed)):
+            if smoothed[i] < smoothed[i - 1]:
+                smoothed[i] = smoothed[i - 1]
+
+        return smoothed, confidence
+
+    def adjust(self, take, rows):
+        """
+        Smooth captures of a take, each track on its own.
+        :param rows: sorted list of int
+        :return: tuple (list of int ms, list of float confidence), one per row
+        """
+        times = [0] * len(rows)
+        confidence = [1.0] * len(rows)
+
+        tracks = dict()
+        for i, row in enumerate(rows):
+            tracks.setdefault(take.channel(row), list()).append(i)
+
+        for track, indexes in tracks.items():
+            smoothed, scores = self.smooth([take.times[rows[i]] for i in indexes], track)
+            for i, ms, score in zip(indexes, smoothed, scores):
+                times[i] = ms
+                confidence[i] = score
+
+        return self._order(take, rows, times), confidence
+
+    # ---
+
+    def _estimate(self, times, track=0):
+        """
+        :return: tuple (array of float ms, float jitter), kept for the same times and settings of a track
+        """
+        key = (self.method, self.window, self.responsiveness, tuple(times))
+        last = self._estimates.get(track)
+        if last is not None and last[0] == key:
+            return last[1:]
+
+        if len(times) < 3:
+            estimates = array('d', times)
+        elif self.method == ATSmoother.KALMAN:
+            estimates = self._kalman(times)
+        elif self.method == ATSmoother.TEMPO:
+            estimates = self._tempo(times)
+        else:
+            estimates = self._median(times)
+
+        self._estimates[track] = (key, estimates, ATSmoother.jitter(times))
+        return self._estimates[track][1:]
+
+    def _median(self, times):
+        """
+        Median of the neighbours' times moved by the median interval
+        around each capture.
+        """
+        count = len(times)
+        half = max(int(self.window), 3) // 2
+        intervals = [times[i + 1] - times[i] for i in range(count - 1)]
+
+        estimates = array('d', times)
+        for i in range(count):
+            first, last = max(i - half, 0), min(i + half, count - 1)
+
+            local = sorted(intervals[first:last])
+            step = local[len(local) // 2] if len(local) % 2 else (local[len(local) // 2 - 1] +
+                                                                  local[len(local) // 2]) / 2.0
+
+            guesses = sorted(times[k] + (i - k) * step for k in range(first, last + 1))
+            estimates[i] = guesses[len(guesses) // 2]
+
+        return estimates
+
+    def _kalman(self, times):
+        """
+        Position and interval of each capture, filtered forward then
+        smoothed backward (Rauch-Tung-Striebel). Captures too far from
+        their prediction are not measured, so one outlier does not pull
+        its neighbours; two in a row are a new tempo, the filter starts
+        again from the first of them.
+        """
+        count = len(times)
+        r = max(ATSmoother.jitter(times), 1.0) ** 2
+        intervals = sorted(times[i + 1] - times[i] for i in range(count - 1))
+        responsiveness = max(0.0, min(float(self.responsiveness), 1.0))
+        # Variance of an interval change, from 0.1% to 10% of the interval per capture
+        q = (max(intervals[len(intervals) // 2], 1) * 10 ** (2 * responsiveness - 3)) ** 2
+        gate = 9.0  # Squared innovation beyond 3 sigma
+
+        # Forward: predicted and filtered state (p, v) and covariance (a, b, d) = [[a, b], [b, d]]
+        predicted = list()
+        filtered = list()
+        starts = set()  # Captures the filter started again from
+
+        i = 0
+        misses = 0
+        while i < count:
+            if not i or i in starts:
+                starts.add(i)
+                p, v = float(times[i]), float(times[i + 1] - times[i] if i + 1 < count else times[i] - times[i - 1])
+                a, b, d = r, 0.0, r * 100
+            else:
+                p, v = p + v, v
+                a, b, d = a + 2 * b + d + q / 4, b + d + q / 2, d + q
+            predicted.append((p, v, a, b, d))
+
+            innovation = times[i] - p
+            s = a + r
+            if innovation * innovation <= gate * s:
+                kp, kv = a / s, b / s
+                p, v = p + kp * innovation, v + kv * innovation
+                a, b, d = (1 - kp) * a, (1 - kp) * b, d - kv * b
+                misses = 0
+            else:
+                misses += 1
+                if misses > 1:
+                    # Not an outlier but a new tempo: lock again on the first miss
+                    i -= 1
+                    del predicted[i:]
+                    del filtered[i:]
+                    starts.add(i)
+                    misses = 0
+                    continue
+            filtered.append((p, v, a, b, d))
+            i += 1
+
+        # Backward, each part on its own
+        estimates = array('d', [0.0]) * count
+        sp, sv, sa, sb, sd = filtered[-1]
+        estimates[-1] = sp
+        for i in range(count - 2, -1, -1):
+            fp, fv, fa, fb, fd = filtered[i]
+            if i + 1 in starts:
+                sp, sv, sa, sb, sd = filtered[i]
+                estimates[i] = sp
+                continue
+
+            pp, pv, pa, pb, pd = predicted[i + 1]
+
+            # Gain C = P F' inverse(P predicted)
+            det = pa * pd - pb * pb
+            x11, x12 = fa + fb, fb  # P F'
+            x21, x22 = fb + fd, fd
+            c11, c12 = (x11 * pd - x12 * pb) / det, (x12 * pa - x11 * pb) / det
+            c21, c22 = (x21 * pd - x22 * pb) / det, (x22 * pa - x21 * pb) / det
+
+            dp, dv = sp - pp, sv - pv
+            da, db, dd = sa - pa, sb - pb, sd - pd
+            sp, sv = fp + c11 * dp + c12 * dv, fv + c21 * dp + c22 * dv
+
+            # P smoothed = P + C (P next smoothed - P next predicted) C'
+            m11, m12 = c11 * da + c12 * db, c11 * db + c12 * dd
+            m21, m22 = c21 * da + c22 * db, c21 * db + c22 * dd
+            sa, sb, sd = fa + m11 * c11 + m12 * c12, fb + m11 * c21 + m12 * c22, fd + m21 * c21 + m22 * c22
+
+            estimates[i] = sp
+
+        return estimates
+
+    def _tempo(self, times):
+        """
+        Beat followed as a phase locked loop, forward and backward, and
+        the two averaged so the estimate does not lag.
+        """
+        forward = self._track(times)
+        backward = self._track([-ms for ms in reversed(times)])
+        count = len(times)
+
+        return array('d', [(forward[i] - backward[count - 1 - i]) / 2.0 for i in range(count)])
+
+    def _track(self, times):
+        alpha = 0.05 + 0.9 * max(0.0, min(float(self.responsiveness), 1.0))  # Phase correction
+        beta = alpha * alpha / 4                                            # Period correction
+
+        first = sorted(times[i + 1] - times[i] for i in range(min(len(times), 5) - 1))
+        period = float(first[len(first) // 2])
+        tolerance = max(3 * ATSmoother.jitter(times), 1.0)
+
+        beat = float(times[0])
+        beats = [beat]
+        misses = 0
+        for i in range(1, len(times)):
+            beat += period
+            error = times[i] - beat
+            if abs(error) <= max(tolerance, period / 4):
+                beat += alpha * error
+                period += beta * error
+                misses = 0
+            else:
+                misses += 1
+                if misses > 1:  # Not an outlier but a new tempo: lock again
+                    period = float(times[i] - times[i - 1])
+                    beat = float(times[i])
+                    misses = 0
+            beats.append(beat)
+
+        return beats
+
+    @classmethod
+    def _order(cls, take, rows, times):
+        """
+        Keep the captures of all tracks in time order: each moved capture
+        stays after the one before it and before the next one not moved.
+        """
+        moved = set(rows)
+        count = len(take)
+        result = list()
+
+        high = None
+        for row, ms in zip(rows, times):
+            if high is None or high < row:
+                high = row + 1
+                while high < count and high in moved:
+                    high += 1
+
+            low = result[-1] if result and rows[len(result) - 1] == row - 1 else (take.times[row - 1] if row
+                                                                                  else -take.offset)
+            ms = max(ms, low)
+            if high < count:
+                ms = min(ms, take.times[high])
+            result.append(int(ms))
+
+        return result
+
+
+# ---
+# Audio
+
+try:
+    import audioop
+except ImportError:  # Removed from Python 3.13
+    audioop = None
+
+
+def mono_samples(data, channels, width):
+    """
+    One channel of signed samples audioop can measure, from WAV frames.
+    :return: tuple (bytes, sample width)
+    """
+    if channels > 2:
+        # Keep the first channel
+        frame = channels * width
+        first = bytearray(len(data) // frame * width)
+        for b in range(width):
+            first[b::width] = data[b::frame]
+        data, channels = bytes(first), 1
+
+    if width == 3:
+        # audioop of Python 2 has no 24 bits: keep the 16 most significant
+        samples = bytearray(len(data) // 3 * 2)
+        samples[0::2] = data[1::3]
+        samples[1::2] = data[2::3]
+        data, width = bytes(samples), 2
+
+    elif width == 1:
+        # 8 bits WAV samples are unsigned
+        data = audioop.bias(data, 1, -128)
+
+    if channels == 2:
+        data = audioop.tomono(data, width, 0.5, 0.5)
+
+    return data, width
+
+
+class ATOnsetDetector(object):
+    """
+    Find the onsets of a WAV file: hits, syllables, notes.
+    ---
+    The file is read by chunks so long tracks never sit in memory. Each
+    chunk is cut in hops of HOP ms whose loudness is measured by audioop,
+    without any Python loop over the samples. An onset is a hop where the
+    loudness rises clearly more than it does around it.
+    """
+    HOP = 10            # ms
+    CHUNK = 100         # hops read at once
+    WINDOW = 50         # hops on each side used for the local threshold
+    FLOOR = -80.0       # dBFS, quietest level measured
+    SILENCE = -50.0     # dBFS, quieter hops are never onsets
+    MIN_RISE = 3.0      # dB
+
+    def __init__(self, path, sensitivity=1.5, min_gap=100):
+        self.path = path
+        self.sensitivity = sensitivity  # Standard deviations above the local mean
+        self.min_gap = min_gap          # ms between two onsets
+
+        self.duration = 0               # ms
+        self.levels = array('d')        # dBFS per hop
+        self.onsets = list()            # (ms, strength from 0 to 1)
+
+        self._hop = 1                   # samples per hop
+        self._rate = 1000               # samples per second
+
+    def detect(self, interrupted=None):
+        """
+        :param interrupted: callable returning True to stop reading
+        :return: list of (ms, strength)
+        """
+        self._read(interrupted)
+        self._pick()
+
+        return self.onsets
+
+    def time(self, hop):
+        """
+        :return: int ms at the start of a hop
+        """
+        return hop * self._hop * 1000 // self._rate
+
+    def tempo(self, low=40, high=240):
+        """
+        Most common time between close onsets, as beats per minute.
+        :return: float or None without enough onsets
+        """
+        period = self._period(60000.0 / high, 60000.0 / low)
+
+        return 60000.0 / period if period else None
+
+    def beats(self, low=40, high=240):
+        """
+        Regular beats at the detected tempo. Each beat snaps to the onset
+        found near it, so the grid follows a drifting tempo.
+        :return: list of (ms, strength), 0 when no onset supports the beat
+        """
+        period = self._period(60000.0 / high, 60000.0 / low)
+        if not period:
+            return []
+
+        times = [ms for ms, _ in self.onsets]
+        tolerance = period / 4
+
+        # Phase where the onsets are the strongest
+        bins = [0.0] * 20
+        for ms, strength in self.onsets:
+            bins[int(ms % period / period * 20) % 20] += strength
+        phase = (bins.index(max(bins)) + 0.5) * period / 20
+
+        beats = list()
+        ms = phase
+        while ms < self.duration:
+            i = bisect_left(times, ms)
+            near = [j for j in (i - 1, i) if 0 <= j < len(times) and abs(times[j] - ms) <= tolerance]
+
+            if near:
+                j = min(near, key=lambda k: abs(times[k] - ms))
+                ms = times[j]
+                beats.append((int(ms), self.onsets[j][1]))
+            else:
+                beats.append((int(round(ms)), 0.0))
+
+            ms += period
+
+        return beats
+
+    # ---
+
+    def _read(self, interrupted=None):
+        if audioop is None:
+            raise RuntimeError("Audio analysis needs the audioop module.")
+
+        with closing(wave.open(self.path, 'rb')) as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+
+            self._rate = wav.getframerate()
+            self._hop = max(1, self._rate * ATOnsetDetector.HOP // 1000)
+            self.duration = wav.getnframes() * 1000 // self._rate
+
+            levels = self.levels = array('d')
+            floor = ATOnsetDetector.FLOOR
+
+            while not (interrupted and interrupted()):
+                data = wav.readframes(self._hop * ATOnsetDetector.CHUNK)
+                if not data:
+                    break
+
+                data, sample_width = mono_samples(data, channels, width)
+                full_scale = float(1 << (8 * sample_width - 1))
+                step = self._hop * sample_width
+
+                for i in range(0, len(data), step):
+                    rms = audioop.rms(data[i:i + step], sample_width)
+                    levels.append(max(20 * log10(rms / full_scale), floor) if rms else floor)
+
+    def _pick(self):
+        levels = self.levels
+        count = len(levels)
+
+        # Rise of loudness over the two previous hops
+        rise = array('d', [0.0]) * count
+        for i in range(2, count):
+            rise[i] = max(0.0, levels[i] - min(levels[i - 1], levels[i - 2]))
+
+        # Running sums give the local mean and deviation in one pass
+        sums = [0.0]
+        squares = [0.0]
+        for value in rise:
+            sums.append(sums[-1] + value)
+            squares.append(squares[-1] + value * value)
+
+        window = ATOnsetDetector.WINDOW
+        strongest = max(rise) if count else 0.0
+
+        self.onsets = list()
+        last = None
+
+        for i in range(2, count - 2):
+            value = rise[i]
+
+            if value < ATOnsetDetector.MIN_RISE or levels[i] < ATOnsetDetector.SILENCE:
+                continue
+            if value < max(rise[i - 2], rise[i - 1]) or value <= max(rise[i + 1], rise[i + 2]):
+                continue
+
+            low = max(0, i - window)
+            high = min(count, i + window + 1)
+            mean = (sums[high] - sums[low]) / (high - low)
+            deviation = max((squares[high] - squares[low]) / (high - low) - mean * mean, 0.0) ** 0.5
+
+            if value <= mean + self.sensitivity * deviation:
+                continue
+
+            ms = self.time(i)
+            strength = value / strongest
+
+            if last is not None and ms - last < self.min_gap:
+                # Too close to the previous onset: keep the strongest of both
+                if strength > self.onsets[-1][1]:
+                    self.onsets[-1] = (ms, strength)
+                    last = ms
+                continue
+
+            self.onsets.append((ms, strength))
+            last = ms
+
+    def _period(self, shortest, longest):
+        """
+        Most common interval between an onset and its next few ones.
+        :return: float ms or None
+        """
+        if len(self.onsets) < 4:
+            return None
+
+        bins = dict()  # 10 ms bin -> [weight, weighted sum of intervals]
+        for i, (ms, strength) in enumerate(self.onsets):
+            for other, other_strength in self.onsets[i + 1:i + 5]:
+                interval = other - ms
+                if shortest <= interval <= longest:
+                    weight = strength * other_strength
+                    total = bins.setdefault(interval // 10, [0.0, 0.0])
+                    total[0] += weight
+                    total[1] += weight * interval
+
+        if not bins:
+            return None
+
+        empty = [0.0, 0.0]
+        best = max(bins, key=lambda k: bins.get(k - 1, empty)[0] + bins[k][0] + bins.get(k + 1, empty)[0])
+
+        # Weighted mean of the intervals around the best bin
+        totals = [bins.get(k, empty) for k in (best - 1, best, best + 1)]
+        return sum(t[1] for t in totals) / sum(t[0] for t in totals)
+
+
+class ATWaveform(object):
+    """
+    Min/max peaks of a WAV file at several resolutions.
+    ---
+    Level 0 holds the lowest and highest sample of every BLOCK samples,
+    each next level is FACTOR times coarser. Drawing a range reads the
+    level with about one block per pixel, so the cost depends on the
+    width drawn, not on the length of the sound nor on the zoom. Levels
+    are cached next to the WAV and built again when the WAV changes.
+    """
+    BLOCK = 256         # samples per block of level 0
+    FACTOR = 4          # blocks of a level per block of the next one
+    EXTENSION = '.atpeaks'
+    MAGIC = b'ATPK'
+    VERSION = 1
+
+    def __init__(self, path):
+        self.path = path
+
+        self.rate = 0                   # samples per second
+        self.duration = 0               # ms
+        self.levels = list()            # list of (mins, maxs) arrays, 16 bits samples
+
+    @classmethod
+    def open(cls, path, interrupted=None):
+        """
+        Peaks of a WAV, from its cache when up to date.
+        :return: ATWaveform
+        """
+        waveform = cls(path)
+
+        if not waveform.load():
+            waveform.build(interrupted)
+            if not (interrupted and interrupted()):
+                waveform.save()
+
+        return waveform
+
+    def cache_path(self):
+        return self.path + ATWaveform.EXTENSION
+
+    # ---
+
+    def build(self, interrupted=None):
+        """
+        Read the WAV by chunks and compute every level.
+        :return: void
+        """
+        if audioop is None:
+            raise RuntimeError("Audio analysis needs the audioop module.")
+
+        mins = array('h')
+        maxs = array('h')
+
+        with closing(wave.open(self.path, 'rb')) as wav:
+            channels = wav.getnchannels()
+            width = wav.getsampwidth()
+
+            self.rate = wav.getframerate()
+            self.duration = wav.getnframes() * 1000 // self.rate
+
+            while not (interrupted and interrupted()):
+                data = wav.readframes(ATWaveform.BLOCK * 256)
+                if not data:
+                    break
+
+                data, sample_width = mono_samples(data, channels, width)
+                if sample_width == 1:
+                    data = audioop.lin2lin(data, 1, 2)
+
+                step = ATWaveform.BLOCK * 2
+                for i in range(0, len(data), step):
+                    low, high = audioop.minmax(data[i:i + step], 2)
+                    mins.append(low)
+                    maxs.append(high)
+
+        self.levels = [(mins, maxs)]
+
+        factor = ATWaveform.FACTOR
+        while len(mins) > 1:
+            indexes = range(0, len(mins), factor)
+            mins = array('h', [min(mins[i:i + factor]) for i in indexes])
+            maxs = array('h', [max(maxs[i:i + factor]) for i in indexes])
+            self.levels.append((mins, maxs))
+
+    def load(self):
+        """
+        Read the cache if it matches the WAV.
+        :return: bool
+        """
+        try:
+            with open(self.cache_path(), 'rb') as f:
+                buf = f.read()
+
+            if buf[:4] != ATWaveform.MAGIC:
+                return False
+
+            version, size, mtime, rate, duration, block, factor, count = struct.unpack_from('<HqdIqIII', buf, 4)
+            source = os.stat(self.path)
+
+            if (version, size, mtime, block, factor) != (ATWaveform.VERSION, source.st_size, source.st_mtime,
+                                                         ATWaveform.BLOCK, ATWaveform.FACTOR):
+                return False
+
+            pos = 4 + struct.calcsize('<HqdIqIII')
+            levels = list()
+            for _ in range(count):
+                length, = struct.unpack_from('<I', buf, pos)
+                pos += 4
+                values = struct.unpack_from('<%dh' % (length * 2), buf, pos)
+                pos += length * 4
+                levels.append((array('h', values[:length]), array('h', values[length:])))
+
+        except (IOError, OSError, struct.error):
+            return False
+
+        self.rate = rate
+        self.duration = duration
+        self.levels = levels
+
+        return True
+
+    def save(self):
+        """
+        Write the cache. A read-only directory only means no cache.
+        :return: bool
+        """
+        try:
+            source = os.stat(self.path)
+
+            chunks = [ATWaveform.MAGIC,
+                      struct.pack('<HqdIqIII', ATWaveform.VERSION, source.st_size, source.st_mtime, self.rate,
+                                  self.duration, ATWaveform.BLOCK, ATWaveform.FACTOR, len(self.levels))]
+
+            for mins, maxs in self.levels:
+                chunks.append(struct.pack('<I%dh%dh' % (len(mins), len(maxs)), len(mins), *(mins + maxs)))
+
+            with open(self.cache_path(), 'wb') as f:
+                f.write(b''.join(chunks))
+
+        except (IOError, OSError):
+            return False
+
+        return True
+
+    # ---
+
+    def peaks(self, start, end, width):
+        """
+        Lowest and highest sample shown by each pixel of a range.
+        :param start: ms at the left edge
+        :param end: ms at the right edge
+        :param width: int pixels
+        :return: list of (low, high) from -1.0 to 1.0, None outside of the sound
+        """
+        if not self.levels or width < 1 or end <= start:
+            return [None] * max(width, 0)
+
+        blocks_per_ms = self.rate / 1000.0 / ATWaveform.BLOCK
+        per_pixel = (end - start) * blocks_per_ms / width
+
+        # Coarsest level still having a block per pixel
+        level = 0
+        while level + 1 < len(self.levels) and ATWaveform.FACTOR ** (level + 1) <= per_pixel:
+            level += 1
+
+        mins, maxs = self.levels[level]
+        scale = blocks_per_ms / ATWaveform.FACTOR ** level
+        count = len(mins)
+
+        peaks = list()
+        for x in range(width):
+            first = int((start + (end - start) * x / float(width)) * scale)
+            last = max(first + 1, int((start + (end - start) * (x + 1) / float(width)) * scale))
+
+            if first < 0 or first >= count:
+                peaks.append(None)
+            else:
+                peaks.append((min(mins[first:last]) / 32768.0, max(maxs[first:last]) / 32768.0))
+
+        return peaks
+
+
+class ATClickTrack(object):
+    """
+    Click track rendered as a WAV file, to be put on the timeline.
+    ---
+    The first sample of the file is the start of start_frame. A click on
+    a frame starts on the sample where the frame starts, calculated with
+    the exact rate so it never drifts, even with NTSC rates. Clicks are
+    rendered once per kind and copied by slices into a silent buffer,
+    so the cost follows the number of clicks, not the length. Only the
+    clicks that overlap the one before are summed into the buffer.
+    """
+    RATE = 48000
+    LENGTH = 0.025  # sec, length of a click
+    VOLUME = 0.8
+
+    # Kinds of clicks and their pitch (Hz)
+    ACCENT, BEAT = 0, 1
+    FREQUENCIES = (2000.0, 1000.0, 1500.0, 750.0, 1250.0)
+
+    def __init__(self, fps=24, start_frame=0, rate=RATE):
+        self.timebase = ATTimebase.get(fps)
+        self.start_frame = start_frame
+        self.rate = rate
+
+        self.clicks = list()  # (sample, kind)
+
+    def __len__(self):
+        return len(self.clicks)
+
+    @property
+    def start_ms(self):
+        return Fraction(self.start_frame * 1000) / self.timebase.rate
+
+    def sample(self, frame):
+        """
+        Sample where a frame starts, the nearest one.
+        :return: int
+        """
+        return ATClickTrack._round(Fraction((frame - self.start_frame) * self.rate) / self.timebase.rate)
+
+    def sample_ms(self, ms):
+        """
+        Sample of a time, offset included.
+        :return: int
+        """
+        return ATClickTrack._round((Fraction(ms) - self.start_ms) * self.rate / 1000)
+
+    def add_frames(self, frames, kinds=None):
+        """
+        :param frames: list of int
+        :param kinds: list of int, one per frame, BEAT by default
+        """
+        kinds = kinds if kinds is not None else [ATClickTrack.BEAT] * len(frames)
+        self.clicks.extend((self.sample(frame), kind) for frame, kind in zip(frames, kinds))
+
+    def add_times(self, times, kinds=None):
+        """
+        :param times: list of int ms, offset included
+        """
+        kinds = kinds if kinds is not None else [ATClickTrack.BEAT] * len(times)
+        self.clicks.extend((self.sample_ms(ms), kind) for ms, kind in zip(times, kinds))
+
+    def add_tempo(self, tempo, beats, first=0, beats_per_bar=0, kind=BEAT):
+        """
+        Clicks every beat of a tempo, downbeats accented.
+        :param tempo: float BPM
+        :param beats: int number of clicks
+        :param first: ms of the first beat, offset included
+        :param beats_per_bar: int, 0 for no accent
+        """
+        period = Fraction(60000) / Fraction(str(tempo))
+
+        for beat in range(beats):
+            accent = beats_per_bar and beat % beats_per_bar == 0
+            self.clicks.append((self.sample_ms(first + beat * period), ATClickTrack.ACCENT if accent else kind))
+
+    @classmethod
+    def from_take(cls, take, snap=True, count_in=0, rate=RATE):
+        """
+        One click per capture, a pitch per track, after count_in accented
+        clicks at the pace of the first interval.
+        :param snap: bool click on the start of the frame of the captures
+                     rather than on their exact time
+        :return: ATClickTrack
+        """
+        times = [take.time(row) for row in range(len(take))]
+        kinds = [ATClickTrack.BEAT + take.channel(row) % (len(cls.FREQUENCIES) - 1) for row in range(len(take))]
+
+        period = times[1] - times[0] if len(times) > 1 and times[1] > times[0] else 500
+        first = (times[0] if times else 0) - count_in * period
+
+        track = cls(take.fps, ATTimebase.get(take.fps).frame(first), rate)
+        track.add_tempo(60000.0 / period, count_in, first, 0, ATClickTrack.ACCENT)
+
+        if snap:
+            track.add_frames(list(take.frames), kinds)
+        else:
+            track.add_times(times, kinds)
+
+        return track
+
+    @classmethod
+    def from_tempo(cls, tempo, beats, fps=24, start_frame=0, beats_per_bar=4, count_in=0, rate=RATE):
+        """
+        A metronome from start_frame. The count_in accented clicks come
+        before, the file starts earlier for them.
+        :return: ATClickTrack
+        """
+        track = cls(fps, start_frame, rate)
+
+        start = track.start_ms
+        first = start - count_in * Fraction(60000) / Fraction(str(tempo))
+        track.start_frame = track.timebase.frame(int(floor(first)))
+
+        track.add_tempo(tempo, count_in, first, 0, ATClickTrack.ACCENT)
+        track.add_tempo(tempo, beats, start, beats_per_bar)
+
+        return track
+
+    # ---
+
+    def render(self):
+        """
+        Clicks closer than their length are mixed, clipped to 16 bits.
+        :return: array of 16 bits samples
+        """
+        sounds = dict()
+        length = int(self.rate * ATClickTrack.LENGTH)
+        clicks = [(sample, kind) for sample, kind in self.clicks if sample > -length]
+
+        size = max([sample for sample, _ in clicks] or [0]) + length
+        samples = array('h', [0]) * size
+        end = 0  # Past the last click written
+
+        for sample, kind in sorted(clicks):
+            sound = sounds.get(kind)
+            if sound is None:
+                sound = sounds[kind] = self._click(ATClickTrack.FREQUENCIES[kind % len(ATClickTrack.FREQUENCIES)],
+                                                   length)
+
+            if sample < 0:
+                sample, sound = 0, sound[-sample:]
+            if sample < end:
+                sound = ATClickTrack._add(samples[sample:sample + len(sound)], sound)
+
+            samples[sample:sample + len(sound)] = sound
+            end = max(end, sample + len(sound))
+
+        return samples
+
+    def write(self, path):
+        """
+        Write a mono 16 bits WAV file.
+        :return: int number of samples
+        """
+        samples = self.render()
+        if sys.byteorder == 'big':
+            samples.byteswap()
+
+        output = wave.open(path, 'wb')
+        try:
+            output.setnchannels(1)
+            output.setsampwidth(2)
+            output.setframerate(self.rate)
+            output.writeframes(samples.tostring() if sys.version_info[0] < 3 else samples.tobytes())
+        finally:
+            output.close()
+
+        return len(samples)
+
+    # ---
+
+    def _click(self, frequency, length):
+        """
+        Short sine with a fast decay.
+        """
+        amplitude = 32767 * ATClickTrack.VOLUME
+        decay = -5.0 / length
+
+        return array('h', [int(amplitude * exp(decay * i) * sin(2 * pi * frequency * i / self.rate))
+                           for i in range(length)])
+
+    @staticmethod
+    def _add(first, second):
+        """
+        Sum of two arrays of 16 bits samples of the same length, clipped.
+        """
+        if audioop is not None:
+            if sys.version_info[0] < 3:
+                return array('h', audioop.add(first.tostring(), second.tostring(), 2))
+            return array('h', audioop.add(first.tobytes(), second.tobytes(), 2))
+
+        return array('h', [max(-32768, min(32767, a + b)) for a, b in zip(first, second)])
+
+    @staticmethod
+    def _round(value):
+        """
+        Nearest integer of a Fraction, halves up.
+        """
+        return int(floor(value + Fraction(1, 2)))
+
+
+class ATTimingFile(object):
+    """
+    Read and write timing files.
+    ---
+    Every format holds the same content, the dict written by Animation Timer:
+    - 'infos' : header (plugin, version, fps, offsets, date)
+    - 'data'  : rows of the current take, as exported by the Center List
+    - 'takes' : all the takes, see ATSession.to_dict. Times are stored in
+                millisec since Start, the offset of the header not included.
+                Multi-track takes add the names of their 'tracks' and the
+                'channels' of the captures. Recorded takes add the 'stats'
+                of their taps, see ATTapStats, takes made by the tool their
+                'origin'.
+
+    Formats:
+    - json   : .timing / .json, what Animation Timer saves.
+    - binary : .timingb, compact little endian arrays.
+    - csv    : .csv, one capture per line for spreadsheets.
+    """
+    FORMATS = {'json': '.timing', 'binary': '.timingb', 'csv': '.csv'}
+    EXTENSIONS = ('.timing', '.json', '.timingb', '.csv')
+
+    BINARY_MAGIC = b'ATTB'
+    BINARY_VERSION = 4
+
+    CSV_INFOS = '#infos'
+    CSV_HEADER = ['take', 'time', 'ms', 'frame', 'interval', 'note', 'track']
+    CSV_HEADER_V1 = CSV_HEADER[:-1]
+
+    @classmethod
+    def format_of(cls, path):
+        extension = os.path.splitext(path)[1].lower()
+
+        for fmt, ext in cls.FORMATS.items():
+            if ext == extension:
+                return fmt
+
+        return 'json'
+
+    @classmethod
+    def read(cls, path):
+        """
+        Read a timing file, whatever its format.
+        :return: dict
+        :raise ValueError: if the file is not a timing.
+        """
+        fmt = cls.format_of(path)
+
+        if fmt == 'binary':
+            data = cls._read_binary(path)
+        elif fmt == 'csv':
+            data = cls._read_csv(path)
+        else:
+            with open(path, 'r') as f:
+                data = json.load(f)
+
+        return cls.normalize(data)
+
+    @classmethod
+    def write(cls, path, data, fmt=None):
+        """
+        Write a timing file. The format follows the extension unless given.
+        :return: void
+        """
+        fmt = fmt or cls.format_of(path)
+
+        if fmt == 'binary':
+            cls._write_binary(path, data)
+        elif fmt == 'csv':
+            cls._write_csv(path, data)
+        else:
+            with open(path, 'w') as f:
+                json.dump(data, f, indent=4, separators=(',', ': '))
+
+    # ---
+
+    @classmethod
+    def normalize(cls, data):
+        """
+        Make sure data has a header, takes and rows.
+        Older files only have the rows of one take.
+        :return: dict
+        """
+        if not isinstance(data, dict) or not isinstance(data.get('infos'), dict):
+            raise ValueError("Timing header not found.")
+
+        if not data.get('takes'):
+            rows = data.get('data') or []
+            offset = cls.offset(data['infos'])
+            take = {
+                'name': u'Take 1',
+                'times': [parse_time(row['time']) - offset for row in rows],
+                'frames': [int(row['frame']) for row in rows],
+                'notes': dict((str(i), row['note']) for i, row in enumerate(rows) if row.get('note')),
+            }
+            data['takes'] = {'current': 0, 'takes': [take] if rows else []}
+
+        if 'data' not in data:
+            data['data'] = cls.rows(cls.current_take(data), cls.offset(data['infos']))
+
+        return data
+
+    @classmethod
+    def fps(cls, infos):
+        """
+        :return: ATTimebase
+        """
+        return ATTimebase.get(infos.get('fps') or 24)
+
+    @classmethod
+    def offset(cls, infos):
+        """
+        Total offset of a header, as used by the timer.
+        :return: int ms
+        """
+        return int(infos.get('offset_time') or 0) + calculate_time_ms(int(infos.get('offset_frame') or 0),
+                                                                      cls.fps(infos))
+
+    @classmethod
+    def current_take(cls, data):
+        takes = data['takes']['takes']
+
+        if not takes:
+            return None
+
+        return takes[max(0, min(int(data['takes'].get('current', 0)), len(takes) - 1))]
+
+    @classmethod
+    def rows(cls, take, offset=0):
+        """
+        Rows of a take, as exported by the Center List.
+        :param take: dict
+        :param offset: int ms added to the times
+        :return: list of dict
+        """
+        if take is None:
+            return []
+
+        frames = take['frames']
+        notes = take.get('notes', {})
+        tracks = take.get('tracks') or []
+        channels = take.get('channels') or [0] * len(frames)
+
+        rows = list()
+        last = dict()  # channel -> frame of its previous capture
+
+        for i, ms in enumerate(take['times']):
+            channel = channels[i]
+            row = {
+                'time': format_time(ms + offset),
+                'frame': str(frames[i]),
+                'interval': str(frames[i] - last[channel]) if channel in last else u'-',
+                'note': notes.get(str(i), u''),
+            }
+            if tracks:
+                row['track'] = tracks[channel] if channel < len(tracks) else u''
+
+            last[channel] = frames[i]
+            rows.append(row)
+
+        return rows
+
+    @classmethod
+    def retime(cls, data, fps=None, offset_time=None, offset_frame=None):
+        """
+        Change fps and/or offsets of a timing.
+        Frames are calculated again from the captured times, like the
+        Center List does when fps or offsets change.
+        :return: dict
+        """
+        infos = data['infos']
+
+        infos['fps'] = str(ATTimebase.get(fps or cls.fps(infos)))
+        if offset_time is not None:
+            infos['offset_time'] = int(offset_time)
+        if offset_frame is not None:
+            infos['offset_frame'] = int(offset_frame)
+
+        fps = cls.fps(infos)
+        offset = cls.offset(infos)
+
+        for take in data['takes']['takes']:
+            take['frames'] = [fps.frame(ms + offset) for ms in take['times']]
+
+        infos['duration'] = max([take['times'][-1] + offset for take in data['takes']['takes'] if take['times']] or [0])
+
+        data['data'] = cls.rows(cls.current_take(data), offset)
+
+        return data
+
+    # ---
+
+    @classmethod
+    def _write_binary(cls, path, data):
+        def text(value):
+            value = json.dumps(value).encode('utf-8')
+            return struct.pack('<I', len(value)) + value
+
+        takes = data['takes']['takes']
+
+        chunks = [cls.BINARY_MAGIC,
+                  struct.pack('<H', cls.BINARY_VERSION),
+                  text(data['infos']),
+                  struct.pack('<iI', int(data['takes'].get('current', 0)), len(takes))]
+
+        for take in takes:
+            count = len(take['times'])
+            chunks.append(text(take['name']))
+            chunks.append(struct.pack('<I%dq%dq' % (count, count), count, *(take['times'] + take['frames'])))
+            chunks.append(text(take.get('notes', {})))
+
+            # Version 2: tracks, and one byte per capture when multi-track
+            channels = take.get('channels') or []
+            chunks.append(text(take.get('tracks') or []))
+            chunks.append(struct.pack('<I%dB' % len(channels), len(channels), *channels))
+
+            # Version 3: tap stats
+            chunks.append(text(take.get('stats') or []))
+
+            # Version 4: origin
+            chunks.append(text(take.get('origin')))
+
+        with open(path, 'wb') as f:
+            f.write(b''.join(chunks))
+
+    @classmethod
+    def _read_binary(cls, path):
+        with open(path, 'rb') as f:
+            buf = f.read()
+
+        if buf[:4] != cls.BINARY_MAGIC:
+            raise ValueError("Not a binary timing file.")
+
+        version, = struct.unpack_from('<H', buf, 4)
+        if version > cls.BINARY_VERSION:
+            raise ValueError("Binary timing file version %d is not supported." % version)
+
+        pos = [6]
+
+        def unpack(fmt):
+            values = struct.unpack_from(fmt, buf, pos[0])
+            pos[0] += struct.calcsize(fmt)
+            return values
+
+        def text():
+            size, = unpack('<I')
+            value = buf[pos[0]:pos[0] + size]
+            pos[0] += size
+            return json.loads(value.decode('utf-8'))
+
+        try:
+            infos = text()
+            current, count = unpack('<iI')
+
+            takes = list()
+            for _ in range(count):
+                name = text()
+                size, = unpack('<I')
+                values = unpack('<%dq' % (size * 2))
+                take = {'name': name,
+                        'times': list(values[:size]),
+                        'frames': list(values[size:]),
+                        'notes': text()}
+
+                if version >= 2:
+                    take['tracks'] = text()
+                    size, = unpack('<I')
+                    take['channels'] = list(unpack('<%dB' % size))
+                if version >= 3:
+                    take['stats'] = text()
+                if version >= 4:
+                    take['origin'] = text()
+
+                takes.append(take)
+        except struct.error:
+            raise ValueError("Binary timing file is truncated.")
+
+        return {'infos': infos, 'takes': {'current': current, 'takes': takes}}
+
+    @classmethod
+    def _write_csv(cls, path, data):
+        with cls._open_csv(path, 'w') as f:
+            writer = csv.writer(f)
+            takes = data['takes']['takes']
+            writer.writerow(cls._csv_row([cls.CSV_INFOS, json.dumps({'infos': data['infos'],
+                                                                      'current': data['takes'].get('current', 0),
+                                                                      'tracks': [t.get('tracks') or [] for t in takes],
+                                                                      'stats': [t.get('stats') or [] for t in takes],
+                                                                      'origins': [t.get('origin') for t in takes]})]))
+            writer.writerow(cls.CSV_HEADER)
+
+            for take in takes:
+                for row, ms in zip(cls.rows(take, cls.offset(data['infos'])), take['times']):
+                    writer.writerow(cls._csv_row([take['name'], row['time'], ms, row['frame'],
+                                                  row['interval'], row['note'], row.get('track', u'')]))
+
+    @classmethod
+    def _read_csv(cls, path):
+        with cls._open_csv(path, 'r') as f:
+            reader = csv.reader(f)
+
+            try:
+                first = cls._csv_row(next(reader), decode=True)
+                header = next(reader)
+            except (StopIteration, csv.Error):
+                raise ValueError("Empty CSV file.")
+
+            if len(first) < 2 or first[0] != cls.CSV_INFOS or header not in (cls.CSV_HEADER, cls.CSV_HEADER_V1):
+                raise ValueError("Not a timing CSV file.")
+
+            head = json.loads(first[1])
+            tracks = head.get('tracks') or []
+            stats = head.get('stats') or []
+            origins = head.get('origins') or []
+
+            takes = list()
+            for line in reader:
+                name, _, ms, frame, _, note = cls._csv_row(line, decode=True)[:6]
+                track = line[6] if len(line) > 6 else u''
+
+                if not takes or takes[-1]['name'] != name:
+                    names = tracks[len(takes)] if len(takes) < len(tracks) else []
+                    takes.append({'name': name, 'times': [], 'frames': [], 'notes': {},
+                                  'tracks': names, 'channels': []})
+
+                take = takes[-1]
+                if note:
+                    take['notes'][str(len(take['times']))] = note
+                take['times'].append(int(ms))
+                take['frames'].append(int(frame))
+
+                if take['tracks']:
+                    track = cls._csv_row([track], decode=True)[0]
+                    take['channels'].append(take['tracks'].index(track) if track in take['tracks'] else 0)
+
+            for index, take in enumerate(takes):
+                if not any(take['channels']):
+                    del take['channels']
+                if index < len(stats) and stats[index]:
+                    take['stats'] = stats[index]
+                if index < len(origins) and origins[index]:
+                    take['origin'] = origins[index]
+
+        return {'infos': head['infos'], 'takes': {'current': head.get('current', 0), 'takes': takes}}
+
+    @staticmethod
+    def _open_csv(path, mode):
+        if sys.version_info[0] < 3:
+            return open(path, mode + 'b')
+
+        return open(path, mode, newline='', encoding='utf-8')
+
+    @staticmethod
+    def _csv_row(values, decode=False):
+        """
+        The Python 2 csv module only handles utf-8 bytes.
+        """
+        if sys.version_info[0] >= 3:
+            return list(values)
+
+        if decode:
+            return [value.decode('utf-8') for value in values]
+
+        return [value.encode('utf-8') if isinstance(value, unicode) else value for value in values]
+
+
+class ATTimingDiff(object):
+    """
+    Beats of two timings of the same shot, aligned.
+    ---
+    Captures are compared in scene time, offsets included, and in frames
+    of the first timing. A capture is paired with the nearest capture of
+    the other timing when it is its nearest too and within tolerance:
+    one binary search per capture, so aligning is n log n. Paired beats
+    are the same or shifted by some frames, the others are missing (only
+    in the first timing) or inserted (only in the second). Multi-track
+    timings are aligned track by track, tracks matched by name: a beat is
+    only paired with a beat of its own track.
+    ---
+    A merge starts from the first timing and takes the chosen entries from
+    the second: a shifted beat moves to its time there, an inserted beat
+    is added and a missing beat is removed.
+    """
+    SAME = 'same'
+    SHIFTED = 'shifted'
+    MISSING = 'missing'
+    INSERTED = 'inserted'
+
+    KINDS = (SAME, SHIFTED, MISSING, INSERTED)
+
+    def __init__(self, first, second, fps=24, tolerance=None):
+        """
+        :param first: list of tuple (scene ms, note) or (scene ms, note, channel) in time order
+        :param second: same
+        :param tolerance: int ms, half the median interval of each track of the first timing by default
+        """
+        self.fps = ATTimebase.get(fps)
+        self.tolerance = tolerance or None
+
+        self.infos = None     # Header of the first timing, when read from a file
+        self.tracks = list()  # Names of the tracks of both timings, empty for single track timings
+        self.entries = self._align(first, second)
+
+    @classmethod
+    def from_files(cls, first, second, tolerance=None):
+        """
+        Compare the current takes of two timing files.
+        :raise ValueError, IOError: if a file cannot be read.
+        """
+        captures = list()
+        tracks = list()
+        infos = None
+
+        for path in (first, second):
+            data = ATTimingFile.read(path)
+            take = ATTimingFile.current_take(data) or {'times': [], 'notes': {}}
+            offset = ATTimingFile.offset(data['infos'])
+            notes = take.get('notes', {})
+            channels = take.get('channels') or [0] * len(take['times'])
+
+            # Channels renumbered in the tracks of both timings, the first one's kept
+            names = take.get('tracks') or []
+            tracks.extend(name for name in names if name not in tracks)
+            numbers = [tracks.index(name) for name in names]
+
+            captures.append([(ms + offset, notes.get(str(i), u''),
+                              numbers[channel] if channel < len(numbers) else channel)
+                             for i, (ms, channel) in enumerate(zip(take['times'], channels))])
+            infos = infos or data['infos']
+
+        diff = cls(captures[0], captures[1], ATTimingFile.fps(infos), tolerance)
+        diff.infos = infos
+        diff.tracks = tracks
+
+        return diff
+
+    @classmethod
+    def default_tolerance(cls, times):
+        """
+        Half the median interval: a beat may move up to half way to the next.
+        :return: int ms
+        """
+        intervals = sorted(times[i + 1] - times[i] for i in range(len(times) - 1))
+        return max(intervals[len(intervals) // 2] // 2, 1) if intervals else 1000
+
+    def __len__(self):
+        return len(self.entries)
+
+    def counts(self):
+        """
+        :return: dict kind -> number of entries
+        """
+        counts = dict((kind, 0) for kind in ATTimingDiff.KINDS)
+        for entry in self.entries:
+            counts[entry['kind']] += 1
+
+        return counts
+
+    def changes(self):
+        """
+        :return: list of int index of the entries that differ
+        """
+        return [i for i, entry in enumerate(self.entries) if entry['kind'] != ATTimingDiff.SAME]
+
+    def summary(self):
+        counts = self.counts()
+        return u"%d same, %d shifted, %d missing, %d inserted" % tuple(counts[kind] for kind in ATTimingDiff.KINDS)
+
+    def track(self, entry):
+        """
+        :return: str name of the track of an entry, empty for single track timings
+        """
+        return self.tracks[entry['channel']] if entry['channel'] < len(self.tracks) else u''
+
+    def merge(self, chosen=()):
+        """
+        :param chosen: indexes of the entries taken from the second timing
+        :return: list of tuple (scene ms, note, channel) in time order
+        """
+        chosen = set(chosen)
+        captures = list()
+
+        for i, entry in enumerate(self.entries):
+            kind = entry['kind']
+            channel = entry['channel']
+            second = i in chosen
+
+            if kind == ATTimingDiff.SAME:
+                captures.append((entry['first'], entry['note'] or entry['second_note'], channel))
+            elif kind == ATTimingDiff.SHIFTED:
+                captures.append((entry['second'], entry['second_note'], channel) if second
+                                else (entry['first'], entry['note'], channel))
+            elif kind == ATTimingDiff.MISSING and not second:
+                captures.append((entry['first'], entry['note'], channel))
+            elif kind == ATTimingDiff.INSERTED and second:
+                captures.append((entry['second'], entry['second_note'], channel))
+
+        captures.sort(key=lambda capture: capture[0])
+        return captures
+
+    def merged_data(self, chosen=(), name=u'Merge'):
+        """
+        Timing of a merge, with the header of the first timing.
+        :return: dict to write with ATTimingFile.write
+        """
+        infos = dict(self.infos or {'fps': str(self.fps)})
+        offset = ATTimingFile.offset(infos)
+        captures = self.merge(chosen)
+
+        take = {'name': name,
+                'origin': ATTake.MERGE,
+                'times': [ms - offset for ms, _, _ in captures],
+                'frames': [self.fps.frame(ms) for ms, _, _ in captures],
+                'notes': dict((str(i), note) for i, (_, note, _) in enumerate(captures) if note)}
+
+        # Single track merges are written as before
+        if self.tracks:
+            take['tracks'] = list(self.tracks)
+        if any(channel for _, _, channel in captures):
+            take['channels'] = [channel for _, _, channel in captures]
+
+        infos['duration'] = captures[-1][0] if captures else 0
+
+        return ATTimingFile.normalize({'infos': infos, 'takes': {'current': 0, 'takes': [take]}})
+
+    # ---
+
+    def _align(self, first, second):
+        tracks = dict()
+        for side, captures in enumerate((first, second)):
+            for capture in captures:
+                channel = capture[2] if len(capture) > 2 else 0
+                tracks.setdefault(channel, ([], []))[side].append((capture[0], capture[1]))
+
+        # Tracks aligned on their own then interleaved, each one kept in its order
+        keyed = list()
+        for channel, (firsts, seconds) in sorted(tracks.items()):
+            tolerance = self.tolerance or ATTimingDiff.default_tolerance([ms for ms, _ in firsts])
+            entries = self._align_track(firsts, seconds, channel, tolerance)
+            keyed.append([(entry['first'] if entry['first'] is not None else entry['second'], channel, n, entry)
+                          for n, entry in enumerate(entries)])
+
+        return [entry for _, _, _, entry in heapq.merge(*keyed)]
+
+    def _align_track(self, first, second, channel, tolerance):
+        firsts = [ms for ms, _ in first]
+        seconds = [ms for ms, _ in second]
+
+        # Mutual nearest captures within tolerance, in order
+        towards = [ATTimingDiff._nearest(seconds, ms) for ms in firsts]
+        backwards = [ATTimingDiff._nearest(firsts, ms) for ms in seconds]
+
+        pairs = list()
+        for i, j in enumerate(towards):
+            if j is None or backwards[j] != i or abs(firsts[i] - seconds[j]) > tolerance:
+                continue
+            if pairs and j <= pairs[-1][1]:
+                continue
+            pairs.append((i, j))
+
+        frame = self.fps.frame
+        entries = list()
+
+        def single(kind, ms, note):
+            entries.append({'kind': kind,
+                            'first': ms if kind == ATTimingDiff.MISSING else None,
+                            'second': ms if kind == ATTimingDiff.INSERTED else None,
+                            'first_frame': frame(ms) if kind == ATTimingDiff.MISSING else None,
+                            'second_frame': frame(ms) if kind == ATTimingDiff.INSERTED else None,
+                            'delta': None,
+                            'note': note if kind == ATTimingDiff.MISSING else u'',
+                            'second_note': note if kind == ATTimingDiff.INSERTED else u'',
+                            'channel': channel})
+
+        def unpaired(i_end, j_end):
+            # Captures of both timings between two pairs, in time order
+            while i[0] < i_end or j[0] < j_end:
+                if j[0] >= j_end or (i[0] < i_end and firsts[i[0]] <= seconds[j[0]]):
+                    single(ATTimingDiff.MISSING, *first[i[0]])
+                    i[0] += 1
+                else:
+                    single(ATTimingDiff.INSERTED, *second[j[0]])
+                    j[0] += 1
+
+        i, j = [0], [0]
+        for a, b in pairs:
+            unpaired(a, b)
+
+            first_frame, second_frame = frame(firsts[a]), frame(seconds[b])
+            entries.append({'kind': ATTimingDiff.SAME if first_frame == second_frame else ATTimingDiff.SHIFTED,
+                            'first': firsts[a],
+                            'second': seconds[b],
+                            'first_frame': first_frame,
+                            'second_frame': second_frame,
+                            'delta': second_frame - first_frame,
+                            'note': first[a][1],
+                            'second_note': second[b][1],
+                            'channel': channel})
+            i[0], j[0] = a + 1, b + 1
+
+        unpaired(len(first), len(second))
+
+        return entries
+
+    @staticmethod
+    def _nearest(times, ms):
+        """
+        :return: int index of the time nearest to ms, the earlier on a tie, or None
+        """
+        if not times:
+            return None
+
+        index = bisect_left(times, ms)
+        if index == 0:
+            return 0
+        if index == len(times):
+            return index - 1
+
+        return index - 1 if ms - times[index - 1] <= times[index] - ms else index
+
+
+class ATTimingIndex(object):
+    """
+    SQLite index of the timing files found in a list of directories.
+    ---
+    Only files modified since the last scan are read again.
+    A connection is opened per call so the index can be used from any thread.
+    ---
+    Names, directories and notes are searched through a full text table
+    (FTS4, or FTS3), each word of a search as the start of a word. Without
+    FTS in the SQLite build, a table of the words of each timing, indexed,
+    is searched the same way. Both follow the timings in the transaction
+    of the scan.
+    """
+    FILENAME = 'animationtimer_index.db'
+
+    WORD = re.compile(r'[^\W_]+', re.UNICODE)  # As the simple tokenizer of FTS
+
+    def __init__(self, path, full_text=True):
+        """
+        :param full_text: bool False to search the table of words even with FTS
+        """
+        self.path = path
+        self.fts = None  # Module of the full text table, None for the table of words
+
+        with closing(self._connect()) as db:
+            db.execute("""
+                       CREATE TABLE IF NOT EXISTS timings (
+                           path TEXT PRIMARY KEY,
+                           name TEXT,
+                           mtime REAL,
+                           fps TEXT,
+                           offset_time INTEGER,
+                           offset_frame INTEGER,
+                           version TEXT,
+                           date TEXT,
+                           rows INTEGER,
+                           takes INTEGER,
+                           duration INTEGER,
+                           notes TEXT
+                       )
+                       """)
+
+            tables = set(row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'"))
+
+            if full_text and 'timing_words' not in tables:
+                for module in ('fts4', 'fts3'):
+                    try:
+                        db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS timings_text USING %s(name, directory, notes)"
+                                   % module)
+                        self.fts = module
+                        break
+                    except sqlite3.OperationalError:
+                        continue
+
+            if self.fts is None:
+                db.execute("CREATE TABLE IF NOT EXISTS timing_words (word TEXT, id INTEGER)")
+                db.execute("CREATE INDEX IF NOT EXISTS timing_words_word ON timing_words (word)")
+                db.execute("CREATE INDEX IF NOT EXISTS timing_words_id ON timing_words (id)")
+
+            # Timings indexed before the search table
+            if ('timings_text' if self.fts else 'timing_words') not in tables:
+                for row in db.execute("SELECT rowid, path, notes FROM timings").fetchall():
+                    self._add_text(db, *row)
+
+            db.commit()
+
+    def scan(self, roots, interrupted=None):
+        """
+        Update the index with the timing files found under roots.
+        Files removed from the disk are removed from the index.
+        :param roots: list of directories
+        :param interrupted: callable returning True to stop the scan
+        :return: int number of files (re)indexed
+        """
+        count = 0
+
+        with closing(self._connect()) as db:
+            known = dict(db.execute("SELECT path, mtime FROM timings").fetchall())
+            seen = set()
+
+            for path in self._walk(roots):
+                if interrupted and interrupted():
+                    break
+
+                seen.add(path)
+
+                try:
+                    mtime = os.path.getmtime(path)
+                except OSError:
+                    continue
+
+                if known.get(path) == mtime:
+                    continue
+
+                record = ATTimingIndex.read(path)
+                if record is None:
+                    continue
+
+                record['mtime'] = mtime
+                if path in known:
+                    self._remove(db, path)
+                cursor = db.execute("INSERT INTO timings VALUES (:path, :name, :mtime, :fps, :offset_time, "
+                                    ":offset_frame, :version, :date, :rows, :takes, :duration, :notes)", record)
+                self._add_text(db, cursor.lastrowid, path, record['notes'])
+                count += 1
+
+            else:
+                # Forget files which are not there anymore, only after a complete scan
+                for path in known:
+                    if path not in seen and self._is_under(path, roots):
+                        self._remove(db, path)
+
+            db.commit()
+
+        return count
+
+    def search(self, text=u'', limit=500):
+        """
+        Find timings whose name, directory or notes have a word starting
+        with each word of text.
+        :return: list of dict
+        """
+        query = "SELECT path, name, fps, rows, takes, duration, date, notes FROM timings"
+        words = ATTimingIndex.WORD.findall(text.lower())
+        values = list()
+
+        if words and self.fts:
+            query += " WHERE rowid IN (SELECT docid FROM timings_text WHERE timings_text MATCH ?)"
+            values.append(u' '.join(word + u'*' for word in words))
+        elif words:
+            # Words starting with word sort from word to word + the last character
+            query += " WHERE " + " AND ".join(["rowid IN (SELECT id FROM timing_words WHERE word >= ? AND word < ?)"]
+                                              * len(words))
+            for word in words:
+                values.extend([word, word + u'\uffff'])
+
+        query += " ORDER BY mtime DESC LIMIT %d" % int(limit)
+
+        with closing(self._connect()) as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute(query, values).fetchall()
+
+        return [dict(zip(row.keys(), row)) for row in rows]
+
+    def count(self):
+        with closing(self._connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM timings").fetchone()[0]
+
+    # ---
+
+    @classmethod
+    def read(cls, path):
+        """
+        Read the information of a timing file to index.
+        :return: dict or None if the file is not a timing.
+        """
+        # Any JSON file of a project is read: one that is not a timing is skipped
+        try:
+            data = ATTimingFile.read(path)
+
+            infos = data['infos']
+            takes = data['takes']['takes']
+
+            # Offset included, as in the header
+            duration = infos.get('duration')
+            if duration is None:
+                duration = max([take['times'][-1] for take in takes if take['times']] or [0]) + \
+                    ATTimingFile.offset(infos)
+
+            return {
+                'path': path,
+                'name': os.path.basename(path),
+                'fps': str(infos.get('fps', u'')),
+                'offset_time': infos.get('offset_time', 0),
+                'offset_frame': infos.get('offset_frame', 0),
+                'version': infos.get('plugin_version', u''),
+                'date': infos.get('date', u''),
+                'rows': sum(len(take['times']) for take in takes),
+                'takes': len(takes),
+                'duration': int(duration),
+                'notes': u'\n'.join(note for take in takes for note in take['notes'].values() if note),
+            }
+        except (IOError, OSError, ValueError, KeyError, TypeError, AttributeError):
+            return None
+
+    # ---
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _add_text(self, db, rowid, path, notes):
+        name = os.path.basename(path)
+        directory = os.path.dirname(path)
+
+        if self.fts:
+            db.execute("INSERT INTO timings_text (docid, name, directory, notes) VALUES (?, ?, ?, ?)",
+                       (rowid, name, directory, notes or u''))
+        else:
+            words = set(ATTimingIndex.WORD.findall(u'\n'.join([name, directory, notes or u'']).lower()))
+            db.executemany("INSERT INTO timing_words VALUES (?, ?)", [(word, rowid) for word in words])
+
+    def _remove(self, db, path):
+        for rowid, in db.execute("SELECT rowid FROM timings WHERE path = ?", (path,)).fetchall():
+            if self.fts:
+                db.execute("DELETE FROM timings_text WHERE docid = ?", (rowid,))
+            else:
+                db.execute("DELETE FROM timing_words WHERE id = ?", (rowid,))
+            db.execute("DELETE FROM timings WHERE rowid = ?", (rowid,))
+
+    def _walk(self, roots):
+        for root in roots:
+            for directory, _, files in os.walk(root):
+                for name in files:
+                    if os.path.splitext(name)[1].lower() in ATTimingFile.EXTENSIONS:
+                        yield os.path.normpath(os.path.join(directory, name))
+
+    @staticmethod
+    def _is_under(path, roots):
+        return any(path.startswith(os.path.normpath(root) + os.sep) for root in roots)
+
+
+class ATTemplateLibrary(object):
+    """
+    SQLite library of named timing templates, searched by similarity.
+    ---
+    A template is compared by its rhythm only: its intervals divided by
+    their mean, so the tempo does not count, resampled to LENGTH values.
+    The distance is a dynamic time warping within BAND values, so a beat
+    a bit early or late still matches.
+    ---
+    A search reads only the templates of a similar number of captures,
+    through the index on count. Each candidate is first bounded below by
+    its distance to the envelope of the query (LB_Keogh), in the order of
+    that bound, and the warping is computed only while the bound can still
+    beat the results found. It is given up as soon as it cannot.
+    A connection is opened per call, as ATTimingIndex.
+    """
+    FILENAME = 'animationtimer_templates.db'
+
+    LENGTH = 32    # values of a signature
+    BAND = 4       # values a point can be warped by
+    SPREAD = 2.0   # templates searched have count / SPREAD to count * SPREAD captures
+
+    def __init__(self, path):
+        self.path = path
+
+        with closing(self._connect()) as db:
+            db.execute("""
+                       CREATE TABLE IF NOT EXISTS templates (
+                           id INTEGER PRIMARY KEY,
+                           name TEXT UNIQUE,
+                           count INTEGER,
+                           duration INTEGER,
+                           times TEXT,
+                           notes TEXT,
+                           signature BLOB
+                       )
+                       """)
+            db.execute("CREATE INDEX IF NOT EXISTS templates_count ON templates (count)")
+            db.commit()
+
+    def add(self, name, times, notes=None):
+        """
+        Store a template, replacing the one of the same name.
+        :param times: list of int ms, in time order
+        :param notes: dict capture index -> text
+        :return: int id
+        """
+        first = times[0] if times else 0
+        relative = [int(ms - first) for ms in times]
+        signature = ATTemplateLibrary.signature(times)
+
+        with closing(self._connect()) as db:
+            db.execute("DELETE FROM templates WHERE name = ?", (name,))
+            cursor = db.execute("INSERT INTO templates (name, count, duration, times, notes, signature) "
+                                "VALUES (?, ?, ?, ?, ?, ?)",
+                                (name, len(relative), relative[-1] if relative else 0, json.dumps(relative),
+                                 json.dumps(dict((str(k), v) for k, v in (notes or {}).items() if v)),
+                                 ATTemplateLibrary._blob(signature) if signature is not None else None))
+            db.commit()
+
+            return cursor.lastrowid
+
+    def remove(self, template_id):
+        with closing(self._connect()) as db:
+            db.execute("DELETE FROM templates WHERE id = ?", (template_id,))
+            db.commit()
+
+    def get(self, template_id):
+        """
+        :return: dict with name, times (list of int ms from 0) and notes, or None
+        """
+        with closing(self._connect()) as db:
+            row = db.execute("SELECT name, times, notes FROM templates WHERE id = ?", (template_id,)).fetchone()
+
+        if row is None:
+            return None
+
+        return {'name': row[0],
+                'times': json.loads(row[1]),
+                'notes': dict((int(k), v) for k, v in json.loads(row[2] or '{}').items())}
+
+    def count(self):
+        with closing(self._connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM templates").fetchone()[0]
+
+    def search(self, times=None, text=u'', limit=20):
+        """
+        Templates most similar to times, or all of them by name without
+        times. Both filtered by the words of text in their names.
+        :param times: list of int ms of at least 3 captures, or None
+        :return: list of dict (id, name, count, duration, distance), the closest first
+        """
+        words = text.split()
+        where = " AND ".join(["name LIKE ?"] * len(words))
+        params = [u'%' + word + u'%' for word in words]
+
+        query = ATTemplateLibrary.signature(times) if times is not None else None
+
+        with closing(self._connect()) as db:
+            if query is None:
+                rows = db.execute("SELECT id, name, count, duration FROM templates%s ORDER BY name LIMIT %d" %
+                                  (" WHERE " + where if where else "", int(limit)), params).fetchall()
+                return [{'id': row[0], 'name': row[1], 'count': row[2], 'duration': row[3], 'distance': None}
+                        for row in rows]
+
+            count = len(times)
+            rows = db.execute("SELECT id, name, count, duration, signature FROM templates "
+                              "WHERE count BETWEEN ? AND ? AND signature IS NOT NULL%s" %
+                              (" AND " + where if where else ""),
+                              [int(count / ATTemplateLibrary.SPREAD), int(count * ATTemplateLibrary.SPREAD) + 1] +
+                              params).fetchall()
+
+        lower, upper = ATTemplateLibrary.envelope(query)
+        bounded = list()
+        for row in rows:
+            signature = ATTemplateLibrary._array(row[4])
+            bounded.append((ATTemplateLibrary.lower_bound(lower, upper, signature), row, signature))
+        bounded.sort(key=lambda candidate: candidate[0])
+
+        # Closest (distance, row), worst last
+        found = list()
+        for bound, row, signature in bounded:
+            worst = found[-1][0] if len(found) >= limit else None
+            if worst is not None and bound >= worst:
+                break  # Sorted by bound, nothing after can do better
+
+            distance = ATTemplateLibrary.dtw(query, signature, worst)
+            if distance is None:
+                continue
+
+            found.insert(bisect_right([d for d, _ in found], distance), (distance, row))
+            del found[limit:]
+
+        return [{'id': row[0], 'name': row[1], 'count': row[2], 'duration': row[3], 'distance': distance}
+                for distance, row in found]
+
+    # ---
+
+    @classmethod
+    def signature(cls, times):
+        """
+        Intervals divided by their mean, resampled to LENGTH values.
+        :return: array of float or None under 3 captures
+        """
+        if times is None or len(times) < 3:
+            return None
+
+        intervals = [times[i + 1] - times[i] for i in range(len(times) - 1)]
+        mean = float(sum(intervals)) / len(intervals)
+        if mean <= 0:
+            return None
+
+        last = len(intervals) - 1
+        step = float(last) / (cls.LENGTH - 1)
+
+        values = array('f', [0.0]) * cls.LENGTH
+        for i in range(cls.LENGTH):
+            position = i * step
+            low = int(position)
+            high = min(low + 1, last)
+            values[i] = (intervals[low] + (position - low) * (intervals[high] - intervals[low])) / mean
+
+        return values
+
+    @classmethod
+    def envelope(cls, values):
+        """
+        Lowest and highest value within BAND of each value.
+        :return: tuple (list, list)
+        """
+        count = len(values)
+        lower = [min(values[max(i - cls.BAND, 0):i + cls.BAND + 1]) for i in range(count)]
+        upper = [max(values[max(i - cls.BAND, 0):i + cls.BAND + 1]) for i in range(count)]
+
+        return lower, upper
+
+    @classmethod
+    def lower_bound(cls, lower, upper, values):
+        """
+        LB_Keogh: never more than the warping distance to the values
+        the envelope is made of.
+        """
+        total = 0.0
+        for low, high, value in zip(lower, upper, values):
+            if value > high:
+                total += (value - high) ** 2
+            elif value < low:
+                total += (low - value) ** 2
+
+        return total
+
+    @classmethod
+    def dtw(cls, a, b, best=None):
+        """
+        Squared dynamic time warping distance within BAND.
+        :param best: float, give up once the distance cannot be under it
+        :return: float or None if given up
+        """
+        count = len(a)
+        band = cls.BAND
+        infinity = float('inf')
+
+        previous = [infinity] * (count + 1)
+        previous[0] = 0.0
+
+        for i in range(1, count + 1):
+            current = [infinity] * (count + 1)
+            ai = a[i - 1]
+            lowest = infinity
+
+            for j in range(max(1, i - band), min(count, i + band) + 1):
+                step = previous[j - 1]
+                if previous[j] < step:
+                    step = previous[j]
+                if current[j - 1] < step:
+                    step = current[j - 1]
+
+                value = current[j] = step + (ai - b[j - 1]) * (ai - b[j - 1])
+                if value < lowest:
+                    lowest = value
+
+            if best is not None and lowest >= best:
+                return None
+            previous = current
+
+        return previous[count]
+
+    # ---
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def _blob(values):
+        return sqlite3.Binary(values.tobytes() if hasattr(values, 'tobytes') else values.tostring())
+
+    @staticmethod
+    def _array(blob):
+        values = array('f')
+
+        if hasattr(values, 'frombytes'):
+            values.frombytes(bytes(blob))
+        else:
+            values.fromstring(bytes(blob))
+
+        return values
+
+
+class ATConverter(object):
+    """
+    Convert and retime all the timing files of a directory tree.
+    ---
+    Files are processed by a pool of processes. The destination tree
+    mirrors the source tree.
+    """
+    def __init__(self, fps=None, offset_time=None, offset_frame=None, fmt=None, jobs=None):
+        self.fps = fps
+        self.offset_time = offset_time
+        self.offset_frame = offset_frame
+        self.fmt = fmt
+        self.jobs = jobs or multiprocessing.cpu_count()
+
+    def tasks(self, source, destination):
+        """
+        List what has to be converted.
+        :return: list of tuple (source file, destination file, options)
+        """
+        options = {'fps': self.fps, 'offset_time': self.offset_time, 'offset_frame': self.offset_frame,
+                   'fmt': self.fmt}
+
+        if os.path.isfile(source):
+            files = [(source, os.path.basename(source))]
+        else:
+            files = list()
+            for directory, _, names in os.walk(source):
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in ATTimingFile.EXTENSIONS:
+                        path = os.path.join(directory, name)
+                        files.append((path, os.path.relpath(path, source)))
+
+        tasks = list()
+        for path, relative in files:
+            target = os.path.join(destination, relative)
+            if self.fmt:
+                target = os.path.splitext(target)[0] + ATTimingFile.FORMATS[self.fmt]
+            tasks.append((path, target, options))
+
+        return tasks
+
+    def run(self, source, destination):
+        """
+        :return: ATConverterReport
+        """
+        report = ATConverterReport()
+        tasks = self.tasks(source, destination)
+
+        if self.jobs > 1 and len(tasks) > 1:
+            pool = multiprocessing.Pool(min(self.jobs, len(tasks)))
+            try:
+                for result in pool.imap_unordered(_convert_file, tasks, chunksize=8):
+                    report.add(*result)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for task in tasks:
+                report.add(*_convert_file(task))
+
+        report.stop()
+
+        return report
+
+
+class ATConverterReport(object):
+    """
+    Summary of an ATConverter run.
+    """
+    def __init__(self):
+        self.converted = list()
+        self.failed = list()  # (path, reason)
+        self.captures = 0
+
+        self._start = time.time()
+        self.elapsed = 0.0
+
+    def add(self, source, target, captures, error):
+        if error:
+            self.failed.append((source, error))
+        else:
+            self.converted.append(target)
+            self.captures += captures
+
+    def stop(self):
+        self.elapsed = time.time() - self._start
+
+    def summary(self):
+        lines = [u"Converted: %d file(s), %d capture(s) in %.2fs" % (len(self.converted), self.captures, self.elapsed),
+                 u"Failed: %d file(s)" % len(self.failed)]
+
+        for path, reason in sorted(self.failed):
+            lines.append(u"  %s: %s" % (path, reason))
+
+        return u"\n".join(lines)
+
+
+def _convert_file(task):
+    """
+    Convert one file. Runs inside the pool processes.
+    :return: tuple (source, target, captures, error)
+    """
+    source, target, options = task
+
+    try:
+        data = ATTimingFile.read(source)
+
+        if options['fps'] or options['offset_time'] is not None or options['offset_frame'] is not None:
+            ATTimingFile.retime(data, options['fps'], options['offset_time'], options['offset_frame'])
+
+        directory = os.path.dirname(target)
+        if directory and not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Created by another process meanwhile
+                if not os.path.isdir(directory):
+                    raise
+
+        ATTimingFile.write(target, data, options['fmt'])
+    except (IOError, OSError, ValueError, KeyError, TypeError) as e:
+        return source, target, 0, str(e) or e.__class__.__name__
+
+    return source, target, sum(len(take['times']) for take in data['takes']['takes']), None
+
+
+# ---
+# Network
+
+# A tap is one datagram, OSC or plain text:
+#   /tap [channel]   "tap [channel]"    capture, on a track (default 0)
+#   /start           "start"
+#   /stop            "stop"
+#   /ping id         "ping id"          answered at once with /pong id
+# A raw MIDI note on (3 bytes) is a tap on the track of its MIDI channel.
+TAP_PORT = 7401
+TAP_COMMANDS = ('tap', 'start', 'stop')
+
+
+def osc_message(address, *args):
+    """
+    Encode an OSC message. Arguments are int, float or str.
+    :return: bytes
+    """
+    def padded(value):
+        value += b'\0'
+        return value + b'\0' * (-len(value) % 4)
+
+    tags, payload = ',', b''
+    for arg in args:
+        if isinstance(arg, bool) or not isinstance(arg, (int, float)):
+            tags += 's'
+            payload += padded(str(arg).encode('utf-8'))
+        elif isinstance(arg, float):
+            tags += 'f'
+            payload += struct.pack('>f', arg)
+        else:
+            tags += 'i'
+            payload += struct.pack('>i', arg)
+
+    return padded(address.encode('ascii')) + padded(tags.encode('ascii')) + payload
+
+
+def parse_osc(data):
+    """
+    Decode an OSC message, bundles are not handled.
+    :return: tuple (address, list of args)
+    :raise ValueError: if data is not an OSC message.
+    """
+    def string(pos):
+        end = data.find(b'\0', pos)
+        if end < 0:
+            end = len(data)  # Some senders do not pad the last string
+        return data[pos:end].decode('utf-8'), end + 4 - (end % 4)
+
+    if data[:1] != b'/':
+        raise ValueError("Not an OSC message.")
+
+    address, pos = string(0)
+    if pos >= len(data):
+        return address, []
+
+    tags, pos = string(pos)
+    args = list()
+
+    try:
+        for tag in tags[1:]:
+            if tag == 'i':
+                args.append(struct.unpack_from('>i', data, pos)[0])
+                pos += 4
+            elif tag == 'f':
+                args.append(struct.unpack_from('>f', data, pos)[0])
+                pos += 4
+            elif tag == 's':
+                value, pos = string(pos)
+                args.append(value)
+            else:
+                raise ValueError("OSC type '%s' is not handled." % tag)
+    except struct.error:
+        raise ValueError("OSC message is truncated.")
+
+    return address, args
+
+
+def parse_tap(data):
+    """
+    Read a tap datagram, whatever its encoding.
+    :return: tuple (command, channel or ping id) or None if not understood
+    """
+    if len(data) == 3 and 0x90 <= ord(data[:1]) <= 0x9F:
+        # MIDI note on, a velocity of 0 is a note off
+        return ('tap', ord(data[:1]) & 0x0F) if ord(data[2:3]) else None
+
+    try:
+        if data[:1] == b'/':
+            address, args = parse_osc(data)
+            command = address.strip('/').lower()
+        else:
+            words = data.decode('utf-8').split()
+            command, args = words[0].lower(), words[1:]
+        value = int(args[0]) if args else 0
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None
+
+    if command in TAP_COMMANDS or command == 'ping':
+        return command, value
+
+    return None
+
+
+class ATTapServer(object):
+    """
+    Receive taps over UDP.
+    ---
+    serve() blocks on select, so it runs on a thread of its own. Each tap
+    is timestamped by the clock as soon as it is read, before anything
+    else, and handed to a callback. Pings are answered from the same
+    loop, so a client measures the round trip up to the timestamp.
+    """
+    TIMEOUT = 0.1  # sec, how often interrupted is checked
+
+    def __init__(self, port=TAP_PORT, host='127.0.0.1'):
+        self.port = port
+        self.host = host
+
+        self.received = 0  # Taps received since open
+        self._socket = None
+
+    def open(self):
+        """
+        :raise socket.error: if the port cannot be used.
+        """
+        self.close()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.setblocking(False)
+
+        self._socket = sock
+        self.port = sock.getsockname()[1]  # Port 0 picks a free one
+        self.received = 0
+
+        return self
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def serve(self, on_tap, clock, interrupted=None):
+        """
+        Receive taps until interrupted.
+        :param on_tap: callable(command, channel, ms)
+        :param clock: callable returning the capture time in ms, or None
+        :param interrupted: callable returning True to stop
+        :return: void
+        """
+        sock = self._socket
+
+        while sock is not None and not (interrupted and interrupted()):
+            try:
+                readable = select.select([sock], [], [], ATTapServer.TIMEOUT)[0]
+            except (select.error, ValueError):
+                break  # Closed meanwhile
+
+            while readable:
+                try:
+                    data, address = sock.recvfrom(512)
+                except socket.error:
+                    break  # Nothing left to read
+
+                ms = clock()
+                tap = parse_tap(data)
+
+                if tap is None:
+                    continue
+
+                command, value = tap
+                if command == 'ping':
+                    try:
+                        sock.sendto(osc_message('/pong', value), address)
+                    except socket.error:
+                        pass
+                else:
+                    self.received += 1
+                    on_tap(command, value, ms)
+
+
+class ATTapClient(object):
+    """
+    Send taps to an ATTapServer, to test it or drive it from a script.
+    """
+    def __init__(self, host='127.0.0.1', port=TAP_PORT):
+        self.address = (host, port)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, command, channel=0):
+        self._socket.sendto(osc_message('/' + command, channel), self.address)
+
+    def ping(self, timeout=1.0):
+        """
+        Round trip to the server.
+        :return: float ms or None if no answer
+        """
+        token = int(time.time() * 1000) & 0x7FFFFFFF
+        start = default_timer()
+
+        self._socket.sendto(osc_message('/ping', token), self.address)
+
+        while True:
+            left = timeout - (default_timer() - start)
+            if left <= 0 or not select.select([self._socket], [], [], left)[0]:
+                return None
+
+            try:
+                address, args = parse_osc(self._socket.recv(512))
+            except (socket.error, ValueError):
+                continue
+
+            if address == '/pong' and args == [token]:
+                return (default_timer() - start) * 1000.0
+
+    def close(self):
+        self._socket.close()
+
+
+class ATLiveMessage(object):
+    """
+    Binary messages of a live broadcast, one per UDP datagram.
+    ---
+    Header, little endian: magic 'AT', version, kind, publisher id and
+    sequence number (12 bytes). Then, by kind:
+    - START    : offset (int64) and "fps\0take\0track\0track..." in utf-8
+    - CAPTURES : index of the first capture (uint32), count (uint8), then
+                 time (int32 ms) and track (uint8) of each capture
+    - STOP     : time (int32 ms)
+    Each CAPTURES repeats the last captures sent, so losing a few
+    datagrams in a row loses nothing.
+    """
+    MAGIC = b'AT'
+    VERSION = 1
+
+    START, CAPTURES, STOP = 1, 2, 3
+
+    HEADER = struct.Struct('<2sBBII')
+    OFFSET = struct.Struct('<q')
+    RANGE = struct.Struct('<IB')
+    CAPTURE = struct.Struct('<iB')
+    TIME = struct.Struct('<i')
+
+    @classmethod
+    def pack(cls, kind, publisher, sequence, payload):
+        return cls.HEADER.pack(cls.MAGIC, cls.VERSION, kind, publisher, sequence & 0xFFFFFFFF) + payload
+
+    @classmethod
+    def start(cls, fps, offset, name=u'', tracks=None):
+        text = u'\0'.join([u'%s' % fps, name or u''] + list(tracks or []))
+        return cls.OFFSET.pack(int(offset)) + text.encode('utf-8')
+
+    @classmethod
+    def captures(cls, first, captures):
+        """
+        :param captures: list of tuple (ms, channel)
+        """
+        return cls.RANGE.pack(first, len(captures)) + b''.join(cls.CAPTURE.pack(int(ms), channel)
+                                                                 for ms, channel in captures)
+
+    @classmethod
+    def stop(cls, ms):
+        return cls.TIME.pack(int(ms or 0))
+
+    @classmethod
+    def unpack(cls, data):
+        """
+        :return: tuple (kind, publisher, sequence, values)
+        :raise ValueError: if data is not a live message.
+        """
+        try:
+            magic, version, kind, publisher, sequence = cls.HEADER.unpack_from(data)
+            if magic != cls.MAGIC or version != cls.VERSION:
+                raise ValueError("Not a live message.")
+
+            pos = cls.HEADER.size
+
+            if kind == cls.START:
+                offset, = cls.OFFSET.unpack_from(data, pos)
+                texts = data[pos + cls.OFFSET.size:].decode('utf-8').split(u'\0')
+                values = {'fps': texts[0], 'offset': offset, 'name': texts[1] if len(texts) > 1 else u'',
+                          'tracks': texts[2:]}
+            elif kind == cls.CAPTURES:
+                first, count = cls.RANGE.unpack_from(data, pos)
+                pos += cls.RANGE.size
+                values = (first, [cls.CAPTURE.unpack_from(data, pos + i * cls.CAPTURE.size) for i in range(count)])
+            elif kind == cls.STOP:
+                values = cls.TIME.unpack_from(data, pos)[0]
+            else:
+                raise ValueError("Unknown live message %d." % kind)
+        except (struct.error, UnicodeDecodeError):
+            raise ValueError("Live message is truncated.")
+
+        return kind, publisher, sequence, values
+
+
+class ATLivePublisher(object):
+    """
+    Send start, stop and captures to whoever listens.
+    ---
+    Datagrams go to a multicast group (or any host) from a non blocking
+    socket: nobody has to be listening, and a datagram that cannot be
+    sent at once is dropped rather than waited for. The capture path is
+    never slowed down by the viewers.
+    """
+    GROUP = '239.255.74.1'
+    PORT = 7402
+    REDUNDANCY = 4  # Captures repeated in each datagram
+
+    def __init__(self, host=GROUP, port=PORT):
+        self.address = (host, port)
+        self.publisher = struct.unpack('<I', os.urandom(4))[0]
+
+        self.sequence = 0
+        self.dropped = 0  # Datagrams that could not be sent
+
+        self._recent = list()  # Last captures sent, (ms, channel)
+        self._count = 0        # Captures of the current recording
+        self._socket = None
+
+    def open(self):
+        """
+        :raise socket.error: if no socket can be created.
+        """
+        self.close()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 1)  # Stay on the LAN
+        sock.setblocking(False)
+
+        self._socket = sock
+        return self
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def start(self, fps, offset, name=u'', tracks=None):
+        self._recent = list()
+        self._count = 0
+        self._send(ATLiveMessage.START, ATLiveMessage.start(fps, offset, name, tracks))
+
+    def capture(self, ms, channel=0):
+        self._recent.append((ms, channel))
+        if len(self._recent) > ATLivePublisher.REDUNDANCY:
+            del self._recent[0]
+
+        self._count += 1
+        self._send(ATLiveMessage.CAPTURES, ATLiveMessage.captures(self._count - len(self._recent), self._recent))
+
+    def stop(self, ms):
+        self._send(ATLiveMessage.STOP, ATLiveMessage.stop(ms))
+
+    def _send(self, kind, payload):
+        if self._socket is None:
+            return
+
+        self.sequence += 1
+
+        try:
+            self._socket.sendto(ATLiveMessage.pack(kind, self.publisher, self.sequence, payload), self.address)
+        except socket.error:
+            self.dropped += 1
+
+
+class ATLiveSubscriber(object):
+    """
+    Receive a live broadcast.
+    ---
+    Captures repeated by the publisher are only given once. Captures
+    lost despite the repetition are counted.
+    """
+    def __init__(self, host=ATLivePublisher.GROUP, port=ATLivePublisher.PORT, ignore=None):
+        self.host = host
+        self.port = port
+        self.ignore = ignore  # Publisher id of our own broadcast
+
+        self.lost = 0
+        self._publisher = None
+        self._next = 0  # Index of the next capture expected
+        self._socket = None
+
+    def open(self):
+        """
+        :raise socket.error: if the port cannot be used.
+        """
+        self.close()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('', self.port))
+
+        first = int(self.host.split('.')[0]) if self.host[:1].isdigit() else 0
+        if 224 <= first <= 239:
+            membership = struct.pack('4s4s', socket.inet_aton(self.host), socket.inet_aton('0.0.0.0'))
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+
+        sock.setblocking(False)
+
+        self._socket = sock
+        self.port = sock.getsockname()[1]
+        return self
+
+    def close(self):
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+
+    def serve(self, on_event, interrupted=None):
+        """
+        Receive until interrupted.
+        :param on_event: callable(kind, values). START gives a dict,
+                         CAPTURES a list of (ms, channel), STOP an int ms.
+        :param interrupted: callable returning True to stop
+        :return: void
+        """
+        sock = self._socket
+
+        while sock is not None and not (interrupted and interrupted()):
+            try:
+                readable = select.select([sock], [], [], ATTapServer.TIMEOUT)[0]
+            except (select.error, ValueError):
+                break
+
+            while readable:
+                try:
+                    data = sock.recv(2048)
+                except socket.error:
+                    break
+
+                try:
+                    event = self.read(data)
+                except ValueError:
+                    continue
+
+                if event is not None:
+                    on_event(*event)
+
+    def read(self, data):
+        """
+        :return: tuple (kind, values) or None if there is nothing new
+        :raise ValueError: if data is not a live message.
+        """
+        kind, publisher, _, values = ATLiveMessage.unpack(data)
+
+        if publisher == self.ignore:
+            return None
+
+        if kind == ATLiveMessage.START:
+            self._publisher, self._next = publisher, 0
+            return kind, values
+
+        if publisher != self._publisher:
+            # Joined during a recording: follow it from here
+            self._publisher = publisher
+            self._next = values[0] if kind == ATLiveMessage.CAPTURES else 0
+
+        if kind == ATLiveMessage.CAPTURES:
+            first, captures = values
+
+            if first > self._next:
+                self.lost += first - self._next
+                self._next = first
+
+            captures = captures[self._next - first:]
+            self._next += len(captures)
+
+            return (kind, captures) if captures else None
+
+        return kind, values
+
+
+class ATLatency(object):
+    """
+    Running summary of delays, in ms.
+    """
+    def __init__(self):
+        self.reset()
+
+    def __len__(self):
+        return self.count
+
+    def reset(self):
+        self.count = 0
+        self.total = 0.0
+        self.lowest = None
+        self.highest = None
+
+    def add(self, ms):
+        self.count += 1
+        self.total += ms
+        self.lowest = ms if self.lowest is None else min(self.lowest, ms)
+        self.highest = ms if self.highest is None else max(self.highest, ms)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def summary(self):
+        if not self.count:
+            return u"no sample"
+
+        return u"%d sample(s), min %.2f ms, mean %.2f ms, max %.2f ms" % (self.count, self.lowest, self.mean,
+                                                                           self.highest)
+
+
+# ---
+# Command line
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='animationtimer_core',
+                                     description=u"Animation Timer command line tools.")
+    commands = parser.add_subparsers(dest='command')
+
+    convert = commands.add_parser('convert', help=u"Convert and retime timing files.")
+    convert.add_argument('source', help=u"Timing file or directory")
+    convert.add_argument('destination', help=u"Output directory, the source tree is mirrored")
+    convert.add_argument('--fps', help=u"New frame rate: 24, 29.97, 30000/1001...")
+    convert.add_argument('--offset-time', type=int, help=u"New time offset, in millisec")
+    convert.add_argument('--offset-frame', type=int, help=u"New frame offset")
+    convert.add_argument('--format', choices=sorted(ATTimingFile.FORMATS), help=u"Output format")
+    convert.add_argument('--jobs', type=int, help=u"Number of processes (default: one per CPU)")
+
+    tap = commands.add_parser('tap', help=u"Send taps to Animation Timer, or measure the latency.")
+    tap.add_argument('action', nargs='?', default='tap', choices=TAP_COMMANDS, help=u"What to send")
+    tap.add_argument('--channel', type=int, default=0, help=u"Track of the tap")
+    tap.add_argument('--host', default='127.0.0.1')
+    tap.add_argument('--port', type=int, default=TAP_PORT)
+    tap.add_argument('--ping', type=int, metavar='COUNT', help=u"Measure the round trip COUNT times instead")
+
+    replay = commands.add_parser('replay', help=u"Replay a timing through the capture path and time it.")
+    replay.add_argument('timing', help=u"Timing file")
+    replay.add_argument('--take', type=int, help=u"Index of the take (default: the current one)")
+    replay.add_argument('--speed', type=float, default=0,
+                        help=u"Times real time, 0 replays on a virtual clock at once (default)")
+
+    diff = commands.add_parser('diff', help=u"Compare two timings of a shot beat by beat, and merge them.")
+    diff.add_argument('first', help=u"Timing file")
+    diff.add_argument('second', help=u"Timing file compared to the first one")
+    diff.add_argument('--tolerance', type=int, help=u"Millisec a beat can move and still be the same beat "
+                                                    u"(default: half the median interval)")
+    diff.add_argument('--merge', metavar='OUTPUT', help=u"Write the first timing with changes of the second")
+    diff.add_argument('--take', default=u'', help=u"Changes taken from the second timing in the merge: "
+                                                 u"comma separated shifted, missing, inserted")
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'diff':
+        return _diff(args)
+
+    if args.command == 'tap':
+        return _tap(args)
+
+    if args.command == 'replay':
+        return _replay(args)
+
+    if args.command != 'convert':
+        parser.print_help()
+        return 2
+
+    if args.fps is not None:
+        try:
+            args.fps = str(ATTimebase.get(args.fps))
+        except (ValueError, ZeroDivisionError):
+            parser.error(u"--fps must be a positive frame rate")
+
+    converter = ATConverter(args.fps, args.offset_time, args.offset_frame, args.format, args.jobs)
+    report = converter.run(args.source, args.destination)
+
+    print(report.summary())
+
+    return 1 if report.failed else 0
+
+
+def _diff(args):
+    try:
+        diff = ATTimingDiff.from_files(args.first, args.second, args.tolerance)
+    except (IOError, OSError, ValueError) as e:
+        print(u"Cannot compare %s and %s: %s" % (args.first, args.second, e), file=sys.stderr)
+        return 2
+
+    for entry in diff.entries:
+        if entry['kind'] == ATTimingDiff.SAME:
+            continue
+
+        first = u"%s %6s" % (format_time(entry['first']), entry['first_frame']) if entry['first'] is not None else u""
+        second = u"%s %6s" % (format_time(entry['second']), entry['second_frame']) if entry['second'] is not None \
+            else u""
+        delta = u"%+d" % entry['delta'] if entry['delta'] is not None else u""
+        print((u"%-8s %-19s %-19s %-4s %s" % (entry['kind'], first, second, delta, diff.track(entry))).rstrip())
+
+    print(diff.summary())
+
+    if args.merge:
+        kinds = set(kind.strip() for kind in args.take.split(u',') if kind.strip())
+        chosen = [i for i, entry in enumerate(diff.entries) if entry['kind'] in kinds]
+        ATTimingFile.write(args.merge, diff.merged_data(chosen))
+
+    # As diff: 1 when the timings differ
+    return 1 if diff.changes() else 0
+
+
+def _replay(args):
+    try:
+        data = ATTimingFile.read(args.timing)
+    except (IOError, OSError, ValueError) as e:
+        print(u"Cannot read %s: %s" % (args.timing, e), file=sys.stderr)
+        return 1
+
+    session = ATSession.from_dict(data['takes'])
+    if args.take is not None:
+        session.select(args.take)
+
+    if session.current is None:
+        print(u"No take to replay.", file=sys.stderr)
+        return 1
+
+    clock = ATClock(args.speed) if args.speed > 0 else ATVirtualClock()
+    take, report = ATReplay.from_take(session.current, clock).headless()
+
+    print(report.summary())
+
+    # On the virtual clock the replay must give back the recording
+    if args.speed <= 0 and list(take.times) != list(session.current.times):
+        print(u"Replayed times differ from the recording.", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+def _tap(args):
+    client = ATTapClient(args.host, args.port)
+
+    try:
+        if not args.ping:
+            client.send(args.action, args.channel)
+            return 0
+
+        latency = ATLatency()
+        for _ in range(args.ping):
+            ms = client.ping()
+            if ms is not None:
+                latency.add(ms)
+
+        print(u"Round trip: %s, %d lost" % (latency.summary(), args.ping - len(latency)))
+
+        return 0 if len(latency) else 1
+    finally:
+        client.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
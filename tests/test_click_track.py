@@ -0,0 +1,69 @@
+"""
+Click track rendering, see ATClickTrack.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+import animationtimer_core
+from animationtimer_core import ATClickTrack
+
+
+class ATClickTrackTest(unittest.TestCase):
+
+    def setUp(self):
+        self.track = ATClickTrack(24, 0, 8000)
+        self.length = int(self.track.rate * ATClickTrack.LENGTH)
+        self.click = self.track._click(ATClickTrack.FREQUENCIES[ATClickTrack.BEAT], self.length)
+
+    def test_apart(self):
+        self.track.clicks = [(0, ATClickTrack.BEAT), (1000, ATClickTrack.BEAT)]
+        samples = self.track.render()
+
+        self.assertEqual(len(samples), 1000 + self.length)
+        self.assertEqual(samples[:self.length], self.click)
+        self.assertEqual(samples[1000:], self.click)
+        self.assertFalse(any(samples[self.length:1000]))
+
+    def test_overlapping_clicks_are_mixed(self):
+        # The second click starts half way through the first
+        half = self.length // 2
+        self.track.clicks = [(0, ATClickTrack.BEAT), (half, ATClickTrack.BEAT)]
+        samples = self.track.render()
+
+        self.assertEqual(samples[:half], self.click[:half])
+        self.assertEqual(list(samples[half:self.length]),
+                         [max(-32768, min(32767, a + b)) for a, b in zip(self.click[half:], self.click)])
+        self.assertEqual(samples[self.length:], self.click[self.length - half:])
+
+    def test_clipped(self):
+        self.track.clicks = [(0, ATClickTrack.BEAT)] * 2
+        samples = self.track.render()
+
+        self.assertEqual(max(samples), 32767)
+        self.assertEqual(min(samples), -32768)
+        self.assertEqual(samples[1], max(-32768, min(32767, 2 * self.click[1])))
+
+    def test_before_start(self):
+        self.track.clicks = [(-10, ATClickTrack.BEAT), (0, ATClickTrack.ACCENT)]
+        accent = self.track._click(ATClickTrack.FREQUENCIES[ATClickTrack.ACCENT], self.length)
+        samples = self.track.render()
+
+        self.assertEqual(list(samples[:self.length - 10]),
+                         [max(-32768, min(32767, a + b)) for a, b in zip(self.click[10:], accent)])
+
+    def test_without_audioop(self):
+        self.track.clicks = [(0, ATClickTrack.BEAT), (5, ATClickTrack.ACCENT), (5, ATClickTrack.BEAT)]
+        expected = self.track.render()
+
+        audioop, animationtimer_core.audioop = animationtimer_core.audioop, None
+        try:
+            self.assertEqual(self.track.render(), expected)
+        finally:
+            animationtimer_core.audioop = audioop
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+"""
+Consensus of several takes, see ATConsensus.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATConsensus, ATSession, ATTake, ATTimingFile
+
+# Relative times of three takes of the same action, the last one late on beat 2
+TAKES = [[0, 500, 1000, 1500], [0, 510, 990, 1500], [0, 490, 1150, 1500]]
+
+
+def session(starts=(1000, 1020, 980)):
+    result = ATSession()
+    for start, times in zip(starts, TAKES):
+        result.new_take().extend([(start + ms, u'') for ms in times])
+
+    return result
+
+
+class ATConsensusTest(unittest.TestCase):
+
+    def test_alignment(self):
+        consensus = ATConsensus(session())
+
+        self.assertEqual(len(consensus), 4)
+        self.assertEqual(consensus.start, 1000)
+        self.assertEqual(consensus.times(), [1000, 1500, 2000, 2500])
+        self.assertEqual(consensus.count, [3, 3, 3, 3])
+
+    def test_outlier_scores(self):
+        consensus = ATConsensus(session())
+
+        self.assertEqual(consensus.scores[0][0], 0.0)
+        self.assertGreater(consensus.scores[2][2], ATConsensus.OUTLIER_THRESHOLD)
+        self.assertTrue(all(score <= ATConsensus.OUTLIER_THRESHOLD
+                            for i, scores in enumerate(consensus.scores) for row, score in enumerate(scores)
+                            if (i, row) != (2, 2)))
+
+    def test_extra_capture_is_not_scored(self):
+        takes = session()
+        takes[1].insert([2], [(1020 + 700, u'', 0)])
+
+        consensus = ATConsensus(takes)
+        self.assertEqual(consensus.times(), [1000, 1500, 2000, 2500])
+        self.assertIsNone(consensus.scores[1][2])
+
+    def test_takes_made_by_the_tool_do_not_vote(self):
+        takes = session()
+        first = ATConsensus(takes)
+
+        for origin in (ATTake.CONSENSUS, ATTake.SOUND, ATTake.MERGE):
+            take = takes.new_take(u"Take %s" % origin)
+            take.origin = origin
+            take.extend([(ms, u'') for ms in (0, 100, 200, 300)])
+
+        # Named as the tool would, but tapped
+        takes.new_take(u"Sound 2").extend([(1000 + ms, u'') for ms in TAKES[0]])
+
+        consensus = ATConsensus(takes)
+        self.assertEqual(len(consensus.takes), 4)
+        self.assertEqual(consensus.times(), first.times())
+
+    def test_origin_is_saved(self):
+        takes = session()
+        takes.current.origin = ATTake.CONSENSUS
+
+        directory = tempfile.mkdtemp()
+        try:
+            for fmt, extension in ATTimingFile.FORMATS.items():
+                path = os.path.join(directory, 'origin' + extension)
+                ATTimingFile.write(path, {'infos': {'fps': '24'}, 'takes': takes.to_dict()})
+
+                read = ATSession.from_dict(ATTimingFile.read(path)['takes'])
+                self.assertEqual([take.origin for take in read], [None, None, ATTake.CONSENSUS], fmt)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Undo of moved captures kept as differences, see ATDelta.
+"""
+import os
+import sys
+import random
+import unittest
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATDelta
+
+
+class ATDeltaTest(unittest.TestCase):
+
+    def test_apply_and_revert(self):
+        times = array('l', [0, 500, 1000, 1500, 2000])
+        delta = ATDelta([1, 3, 4], [500, 1500, 2000], [520, 1400, 2100])
+
+        self.assertEqual(len(delta), 3)
+        self.assertEqual(delta.rows(), [1, 3, 4])
+
+        rows, moved = delta.apply(times)
+        self.assertEqual((rows, moved), ([1, 3, 4], [520, 1400, 2100]))
+
+        for row, ms in zip(rows, moved):
+            times[row] = ms
+
+        self.assertEqual(delta.apply(times, reverse=True), ([1, 3, 4], [500, 1500, 2000]))
+
+    def test_empty(self):
+        delta = ATDelta([], [], [])
+
+        self.assertEqual(len(delta), 0)
+        self.assertEqual(delta.apply([0, 500]), ([], []))
+
+    def test_large_values(self):
+        # Rows and differences past 16 bits
+        rows = [0, 70000, 140000]
+        before = [0, 5000000, 10000000]
+        after = [-100000, 5000001, 13000000]
+        values = dict(zip(rows, before))
+
+        delta = ATDelta(rows, before, after)
+        self.assertEqual(delta.apply(values), (rows, after))
+        self.assertEqual(delta.apply(dict(zip(rows, after)), reverse=True), (rows, before))
+
+    def test_random_moves(self):
+        generator = random.Random(3)
+        times = [i * 40 for i in range(2000)]
+        original = list(times)
+        history = list()
+
+        for _ in range(50):
+            rows = sorted(generator.sample(range(len(times)), generator.randint(1, 200)))
+            shift = generator.randint(-300, 300)
+            delta = ATDelta(rows, [times[row] for row in rows], [times[row] + shift for row in rows])
+
+            rows, moved = delta.apply(times)
+            for row, ms in zip(rows, moved):
+                times[row] = ms
+            history.append(delta)
+
+        for delta in reversed(history):
+            rows, moved = delta.apply(times, reverse=True)
+            for row, ms in zip(rows, moved):
+                times[row] = ms
+
+        self.assertEqual(times, original)
+
+    def test_size(self):
+        # A contiguous selection moved by the same time packs to a few bytes
+        count = 10000
+        rows = list(range(count))
+        delta = ATDelta(rows, [row * 40 for row in rows], [row * 40 + 12 for row in rows])
+
+        self.assertLess(delta.size, count // 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,31 @@
+"""
+Formatting and parsing of capture times, see format_time.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import HOUR, benchmark_format_time, format_time, parse_time
+
+
+class ATFormatTimeTest(unittest.TestCase):
+
+    def test_format(self):
+        self.assertEqual(format_time(0), u"00:00:000")
+        self.assertEqual(format_time(61001), u"01:01:001")
+        self.assertEqual(format_time(HOUR - 1), u"59:59:999")
+        self.assertEqual(format_time(HOUR + 2042), u"01:00:02:042")
+
+    def test_same_as_fields(self):
+        fields, lookup, mismatches = benchmark_format_time(20000)
+        self.assertEqual(mismatches, 0)
+
+    def test_round_trip(self):
+        for ms in range(0, 2 * HOUR, 7919):
+            self.assertEqual(parse_time(format_time(ms)), ms)
+
+
+if __name__ == '__main__':
+    unittest.main()
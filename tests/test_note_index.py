@@ -0,0 +1,88 @@
+"""
+Search of the notes of a take, see ATNoteIndex.
+"""
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATNoteIndex, ATTake
+
+NOTES = [u'Kick #accent', u'', u'snare', u'', u'kick #fix', u'step left', u'', u'#accent #fix hat']
+
+
+def brute(take, query):
+    # Rows of the notes holding a word starting with each term
+    terms = ATNoteIndex.WORD.findall(query.lower())
+    return set(row for row, text in take.notes.items()
+               if all(any(word.startswith(term) for word in ATNoteIndex.tokenize(text)) for term in terms))
+
+
+class ATNoteIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.take = ATTake()
+        self.take.extend([(i * 100, note) for i, note in enumerate(NOTES)])
+        self.index = self.take.note_index
+
+    def test_search(self):
+        self.assertIsNone(self.index.search(u'  '))
+        self.assertEqual(self.index.search(u'kick'), set([0, 4]))
+        self.assertEqual(self.index.search(u'KI'), set([0, 4]))
+        self.assertEqual(self.index.search(u'#acc'), set([0, 7]))
+        self.assertEqual(self.index.search(u'accent'), set([0, 7]))
+        self.assertEqual(self.index.search(u'#fix kick'), set([4]))
+        self.assertEqual(self.index.search(u'#fix zzz'), set())
+
+    def test_tags(self):
+        self.assertEqual(self.index.tags(), [(u'#accent', 2), (u'#fix', 2)])
+
+    def test_set_note(self):
+        self.take.set_note(2, u'snare #fix')
+        self.take.set_note(0, u'')
+
+        self.assertEqual(self.index.search(u'#fix'), set([2, 4, 7]))
+        self.assertEqual(self.index.search(u'kick'), set([4]))
+        self.assertEqual(self.index.tags(), [(u'#accent', 1), (u'#fix', 3)])
+
+    def test_delete_and_insert(self):
+        captures = self.take.delete([0, 3, 4])
+
+        self.assertEqual(self.index.search(u'#fix'), set([4]))
+        self.assertEqual(self.index.search(u'step'), set([2]))
+        self.assertEqual(self.index.search(u'kick'), set())
+        self.assertEqual(self.index.rows, [1, 2, 4])
+
+        self.take.insert([0, 3, 4], captures)
+
+        self.assertEqual(self.index.search(u'kick'), set([0, 4]))
+        self.assertEqual(self.index.search(u'#fix'), set([4, 7]))
+        self.assertEqual(self.index.rows, [0, 2, 4, 5, 7])
+
+    def test_random_edits(self):
+        generator = random.Random(1)
+        words = [u'kick', u'snare', u'#accent', u'#fix', u'step', u'hat']
+        self.take.extend([(1000 + i * 40, u' '.join(generator.sample(words, 2)) if generator.random() < 0.5 else u'')
+                          for i in range(500)])
+
+        for _ in range(200):
+            action = generator.random()
+            if action < 0.3:
+                self.take.set_note(generator.randrange(len(self.take)), generator.choice([u'', u'kick #new']))
+            elif action < 0.7:
+                rows = sorted(generator.sample(range(len(self.take)), generator.randint(1, 4)))
+                captures = self.take.delete(rows)
+                if generator.random() < 0.6:
+                    self.take.insert(rows, captures)
+            else:
+                self.take.extend([(100000 + len(self.take), u'late #fix')])
+
+            self.assertEqual(self.index.rows, sorted(self.take.notes))
+            for query in (u'ki', u'#fix', u'#new kick', u'step'):
+                self.assertEqual(self.index.search(query), brute(self.take, query))
+
+
+if __name__ == '__main__':
+    unittest.main()
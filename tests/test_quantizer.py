@@ -0,0 +1,69 @@
+"""
+Quantize of captures on the frame and tempo grids, see ATQuantizer.
+"""
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATQuantizer, ATTimebase
+
+
+class ATQuantizerTest(unittest.TestCase):
+
+    def test_frames(self):
+        # At 24 fps frames start every 41.67 ms, rounded to 42
+        quantizer = ATQuantizer(ATQuantizer.FRAMES, 24)
+        self.assertEqual(quantizer.quantize([0, 20, 21, 30, 1020, 1030]), [0, 0, 42, 42, 1000, 1042])
+
+    def test_frames_ntsc(self):
+        quantizer = ATQuantizer(ATQuantizer.FRAMES, 29.97)
+        timebase = ATTimebase.get(29.97)
+
+        self.assertEqual(quantizer.quantize([1000, 1017, 1020]), [timebase.time_ms(30), timebase.time_ms(30),
+                                                                  timebase.time_ms(31)])
+
+    def test_offset(self):
+        # Snapped in scene time, returned without the offset
+        quantizer = ATQuantizer(ATQuantizer.FRAMES, 24)
+        self.assertEqual(quantizer.quantize([20], offset=1000), [0])
+        self.assertEqual(quantizer.quantize([0], offset=1030), [12])
+
+    def test_tempo(self):
+        # 120 BPM in eighths: a subdivision every 250 ms
+        quantizer = ATQuantizer(ATQuantizer.TEMPO, tempo=120.0, division=2)
+        self.assertEqual(quantizer.quantize([10, 120, 130, 490, 740, 1010]), [0, 0, 250, 500, 750, 1000])
+
+        quantizer.origin = 100
+        self.assertEqual(quantizer.quantize([10, 240, 480]), [100, 350, 600])
+
+    def test_swing(self):
+        # Every second eighth is delayed to 60% of the pair
+        quantizer = ATQuantizer(ATQuantizer.TEMPO, tempo=120.0, division=2, swing=60.0)
+        self.assertEqual(quantizer.quantize([260, 760, 140, 160]), [300, 800, 0, 300])
+
+    def test_strength(self):
+        quantizer = ATQuantizer(ATQuantizer.TEMPO, tempo=120.0, division=2, strength=0.5)
+        self.assertEqual(quantizer.quantize([40, 260]), [20, 255])
+
+        quantizer.strength = 0.0
+        self.assertEqual(quantizer.quantize([40, 260]), [40, 260])
+
+        # Out of range strengths are clamped
+        quantizer.strength = 2.0
+        self.assertEqual(quantizer.quantize([40, 260]), [0, 250])
+
+    def test_partial_keeps_order(self):
+        generator = random.Random(2)
+        times = sorted(generator.randint(0, 10000) for _ in range(500))
+
+        for grid in (ATQuantizer.FRAMES, ATQuantizer.TEMPO):
+            for strength in (0.25, 0.5, 0.9):
+                quantized = ATQuantizer(grid, 25, 97.0, 4, 58.0, strength, 13).quantize(times)
+                self.assertEqual(quantized, sorted(quantized), (grid, strength))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Headless replay of a recorded take, see ATReplay.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATReplay, ATSession, ATTimingFile, ATVirtualClock
+
+# Captures of a two track take: (ms, note, channel)
+CAPTURES = [(0, u'start', 0), (41, u'', 1), (42, u'', 0), (417, u'', 0), (500, u'#accent', 1),
+            (1000, u'', 0), (1001, u'', 1), (1583, u'', 0), (2042, u'end', 0)]
+
+# Frames of the captures at 24 fps, offset of 10 frames
+FRAMES = [10, 10, 11, 20, 22, 34, 34, 48, 59]
+
+
+class ATReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        session = ATSession(24, 0)
+        take = session.new_take()
+        take.tracks = [u'Left', u'Right']
+        take.extend(CAPTURES)
+
+        self.path = os.path.join(self.directory, 'replay.json')
+        ATTimingFile.write(self.path, {'infos': {'fps': '24', 'offset_frame': 10}, 'takes': session.to_dict()})
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def recorded(self):
+        data = ATTimingFile.read(self.path)
+        offset = ATTimingFile.offset(data['infos'])
+
+        return ATSession.from_dict(data['takes'], 24, offset).current, offset
+
+    def test_replay_gives_back_the_frames(self):
+        recorded, offset = self.recorded()
+        self.assertEqual(list(recorded.frames), FRAMES)
+
+        take, report = ATReplay.from_take(recorded, ATVirtualClock()).headless()
+        take.set_timebase(24, offset)
+
+        self.assertEqual(list(take.times), [capture[0] for capture in CAPTURES])
+        self.assertEqual([take.channel(row) for row in range(len(take))], [capture[2] for capture in CAPTURES])
+        self.assertEqual(list(take.frames), FRAMES)
+
+        self.assertEqual(len(report), len(CAPTURES))
+        self.assertEqual(report.mismatches, 0)
+        self.assertLessEqual(report.latency.highest, ATReplay.FLUSH_INTERVAL)
+
+    def test_replay_flushes_on_the_interval(self):
+        recorded, offset = self.recorded()
+        flushes = list()
+        clock = ATVirtualClock()
+
+        ATReplay.from_take(recorded, clock).run(lambda ms, channel: None, lambda: flushes.append(clock.now))
+
+        self.assertEqual(flushes, [16, 48, 432, 512, 1008, 1584, 2048])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Smoothing of tapped captures, see ATSmoother.
+"""
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATSmoother
+
+
+def beats(intervals):
+    times = [0]
+    for interval in intervals:
+        times.append(times[-1] + interval)
+
+    return times
+
+
+def jittered(times, sigma, seed):
+    generator = random.Random(seed)
+    return [int(round(ms + generator.gauss(0, sigma))) for ms in times]
+
+
+class ATSmootherKalmanTest(unittest.TestCase):
+
+    def smooth(self, times, responsiveness=0.5):
+        return ATSmoother(ATSmoother.KALMAN, responsiveness=responsiveness).smooth(times)
+
+    def test_tempo_change(self):
+        truth = beats([500] * 50 + [300] * 50)
+
+        smoothed, confidence = self.smooth(truth)
+        self.assertEqual(smoothed, truth)
+
+        for seed in range(5):
+            smoothed, confidence = self.smooth(jittered(truth, 5, seed))
+            self.assertLess(max(abs(ms - true) for ms, true in zip(smoothed, truth)), 20)
+
+    def test_ritardando(self):
+        truth = beats([400 + 2 * i for i in range(1, 101)])
+
+        for seed in range(5):
+            times = jittered(truth, 15, seed)
+            smoothed, confidence = self.smooth(times)
+
+            self.assertLess(max(abs(ms - true) for ms, true in zip(smoothed, truth)), 40)
+            self.assertLessEqual(len([score for score in confidence if score < ATSmoother.OUTLIER]), 5)
+
+    def test_responsiveness(self):
+        times = jittered(beats([480] * 200), 8, 0)
+        results = set(tuple(self.smooth(times, responsiveness)[0]) for responsiveness in (0.0, 0.5, 1.0))
+        self.assertEqual(len(results), 3)
+
+    def test_estimates_kept_per_track(self):
+        smoother = ATSmoother(ATSmoother.KALMAN)
+        first = jittered(beats([500] * 20), 10, 1)
+        second = jittered(beats([250] * 40), 10, 2)
+
+        estimates = smoother.estimate(first, 0)
+        smoother.estimate(second, 1)
+        self.assertIs(smoother.estimate(first, 0), estimates)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Loopback round trip of network taps, see ATTapServer and ATTapClient.
+"""
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATTapClient, ATTapServer
+
+
+class ATTapServerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ATTapServer(0).open()
+        self.client = ATTapClient('127.0.0.1', self.server.port)
+
+        # Each datagram read is stamped 10 ms after the one before
+        self.datagrams = 0
+        self.taps = list()
+        self.stopped = False
+
+        self.thread = threading.Thread(target=self.server.serve, args=(self.on_tap, self.clock, lambda: self.stopped))
+        self.thread.start()
+
+    def tearDown(self):
+        self.stopped = True
+        self.thread.join()
+
+        self.client.close()
+        self.server.close()
+
+    def clock(self):
+        self.datagrams += 1
+        return self.datagrams * 10
+
+    def on_tap(self, command, channel, ms):
+        self.taps.append((command, channel, ms))
+
+    def send(self, data):
+        self.client._socket.sendto(data, self.client.address)
+
+    def wait(self, count, timeout=2.0):
+        start = time.time()
+        while len(self.taps) < count and time.time() - start < timeout:
+            time.sleep(0.005)
+
+    def test_encodings(self):
+        self.client.send('tap', 2)        # OSC
+        self.send(b'start 1')             # Text
+        self.send(b'TAP\n')               # Text, no channel
+        self.send(b'\x93\x40\x7f')        # MIDI note on, channel 4
+        self.send(b'\x93\x40\x00')        # MIDI note off: ignored
+        self.send(b'\xff not a tap')      # Ignored
+        self.client.send('stop')
+        self.wait(5)
+
+        self.assertEqual(self.taps, [('tap', 2, 10), ('start', 1, 20), ('tap', 0, 30), ('tap', 3, 40),
+                                     ('stop', 0, 70)])
+        self.assertEqual(self.server.received, 5)
+
+    def test_ping(self):
+        latency = self.client.ping()
+
+        self.assertIsNotNone(latency)
+        self.assertGreaterEqual(latency, 0.0)
+        self.assertEqual(self.taps, [])
+        self.assertEqual(self.server.received, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
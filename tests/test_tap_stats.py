@@ -0,0 +1,57 @@
+"""
+Tap stats saved with a take, see ATTapStats.
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATTake, ATTapStats
+
+CAPTURES = [(0, 0), (250, 1), (480, 0), (500, 1), (1010, 0), (1480, 0), (1500, 1), (2000, 0), (2460, 0)]
+
+
+def recorded():
+    # As the interface records: captures then the stats of their track
+    take = ATTake()
+    for ms, channel in CAPTURES:
+        take.extend([(ms, u'', channel)])
+        take.tap_stats(channel).add(ms)
+
+    return take
+
+
+class ATTapStatsTest(unittest.TestCase):
+
+    def assertStats(self, take, expected):
+        self.assertEqual([stats.to_dict() for stats in take.stats],
+                         [ATTapStats.from_times(times).to_dict() for times in expected])
+
+    def test_recorded(self):
+        self.assertStats(recorded(), [[0, 480, 1010, 1480, 2000, 2460], [250, 500, 1500]])
+
+    def test_delete_and_undo(self):
+        take = recorded()
+        before = [stats.to_dict() for stats in take.stats]
+
+        captures = take.delete([2, 3])
+        self.assertStats(take, [[0, 1010, 1480, 2000, 2460], [250, 1500]])
+
+        take.insert([2, 3], captures)
+        self.assertEqual([stats.to_dict() for stats in take.stats], before)
+
+    def test_move(self):
+        take = recorded()
+        take.set_times([4], [990])
+        self.assertStats(take, [[0, 480, 990, 1480, 2000, 2460], [250, 500, 1500]])
+
+    def test_no_stats(self):
+        take = ATTake()
+        take.extend([(ms, u'', channel) for ms, channel in CAPTURES])
+        take.delete([0])
+        self.assertEqual(take.stats, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Beat by beat comparison of two timings, see ATTimingDiff.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATSession, ATTimingDiff, ATTimingFile
+
+# At 24 fps: 1000 ms is frame 24, 1042 ms frame 25
+FIRST = [(0, u'start'), (500, u''), (1000, u'hit'), (1500, u''), (2000, u'end')]
+SECOND = [(0, u''), (500, u''), (1042, u'hit late'), (1800, u'extra'), (2000, u'')]
+
+
+def kinds(diff):
+    return [entry['kind'] for entry in diff.entries]
+
+
+def write_timing(path, captures, tracks=None, offset=0):
+    session = ATSession(24, offset)
+    take = session.new_take()
+    take.tracks = list(tracks or [])
+    take.extend(captures)
+    ATTimingFile.write(path, {'infos': {'fps': '24', 'offset_time': offset}, 'takes': session.to_dict()})
+
+
+class ATTimingDiffTest(unittest.TestCase):
+
+    def test_classification(self):
+        diff = ATTimingDiff(FIRST, SECOND)
+
+        self.assertEqual(diff.tolerance, None)
+        self.assertEqual(kinds(diff), [ATTimingDiff.SAME, ATTimingDiff.SAME, ATTimingDiff.SHIFTED,
+                                       ATTimingDiff.MISSING, ATTimingDiff.INSERTED, ATTimingDiff.SAME])
+        self.assertEqual(diff.counts(), {ATTimingDiff.SAME: 3, ATTimingDiff.SHIFTED: 1,
+                                         ATTimingDiff.MISSING: 1, ATTimingDiff.INSERTED: 1})
+        self.assertEqual(diff.changes(), [2, 3, 4])
+
+        shifted = diff.entries[2]
+        self.assertEqual((shifted['first_frame'], shifted['second_frame'], shifted['delta']), (24, 25, 1))
+        self.assertEqual((shifted['note'], shifted['second_note']), (u'hit', u'hit late'))
+
+    def test_tolerance(self):
+        # 250 ms is half the median interval of the first timing
+        self.assertEqual(ATTimingDiff.default_tolerance([ms for ms, _ in FIRST]), 250)
+
+        diff = ATTimingDiff(FIRST, SECOND, tolerance=20)
+        self.assertEqual(kinds(diff)[2:4], [ATTimingDiff.MISSING, ATTimingDiff.INSERTED])
+
+    def test_merge(self):
+        diff = ATTimingDiff(FIRST, SECOND)
+
+        self.assertEqual(diff.merge(), [(0, u'start', 0), (500, u'', 0), (1000, u'hit', 0), (1500, u'', 0),
+                                        (2000, u'end', 0)])
+        self.assertEqual(diff.merge(diff.changes()), [(0, u'start', 0), (500, u'', 0), (1042, u'hit late', 0),
+                                                      (1800, u'extra', 0), (2000, u'end', 0)])
+
+    def test_tracks_are_aligned_apart(self):
+        # The kick of the second timing is nearer to the snare of the first
+        first = [(0, u'', 0), (500, u'', 1), (1000, u'', 0)]
+        second = [(0, u'', 0), (480, u'', 0), (1000, u'', 0), (1600, u'', 1)]
+
+        diff = ATTimingDiff(first, second)
+        self.assertEqual([(entry['kind'], entry['channel']) for entry in diff.entries],
+                         [(ATTimingDiff.SAME, 0), (ATTimingDiff.INSERTED, 0), (ATTimingDiff.MISSING, 1),
+                          (ATTimingDiff.SAME, 0), (ATTimingDiff.INSERTED, 1)])
+        self.assertEqual(diff.merge(diff.changes()), [(0, u'', 0), (480, u'', 0), (1000, u'', 0), (1600, u'', 1)])
+
+    def test_files(self):
+        directory = tempfile.mkdtemp()
+        try:
+            first = os.path.join(directory, 'first.timing')
+            second = os.path.join(directory, 'second.timing')
+
+            # Same tracks, numbered the other way round in the second timing
+            write_timing(first, [(0, u'', 0), (500, u'', 1), (1000, u'', 0)], [u'Kick', u'Snare'], 1000)
+            write_timing(second, [(1000, u'', 1), (1542, u'', 0), (2000, u'', 1), (2250, u'', 2)],
+                         [u'Snare', u'Kick', u'Hat'])
+
+            diff = ATTimingDiff.from_files(first, second)
+            self.assertEqual(diff.tracks, [u'Kick', u'Snare', u'Hat'])
+            self.assertEqual([(entry['kind'], diff.track(entry)) for entry in diff.entries],
+                             [(ATTimingDiff.SAME, u'Kick'), (ATTimingDiff.SHIFTED, u'Snare'),
+                              (ATTimingDiff.SAME, u'Kick'), (ATTimingDiff.INSERTED, u'Hat')])
+
+            merged = os.path.join(directory, 'merged.timing')
+            ATTimingFile.write(merged, diff.merged_data(diff.changes()))
+
+            take = ATSession.from_dict(ATTimingFile.read(merged)['takes'])[0]
+            self.assertEqual(list(take.times), [0, 542, 1000, 1250])
+            self.assertEqual(take.tracks, [u'Kick', u'Snare', u'Hat'])
+            self.assertEqual([take.channel(row) for row in range(len(take))], [0, 1, 0, 2])
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Index of the timing files of the search directories, see ATTimingIndex.
+"""
+import os
+import sys
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'dev'))
+
+from animationtimer_core import ATSession, ATTimingFile, ATTimingIndex
+
+
+def write_timing(path, notes, infos=None):
+    session = ATSession()
+    session.new_take().extend([(i * 500, note) for i, note in enumerate(notes)])
+    ATTimingFile.write(path, {'infos': infos or {'fps': '24'}, 'takes': session.to_dict()})
+
+
+class ATTimingIndexTest(unittest.TestCase):
+
+    full_text = True
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.root = os.path.join(self.directory, 'project')
+
+        os.makedirs(os.path.join(self.root, 'walks'))
+        os.makedirs(os.path.join(self.root, 'fights'))
+
+        write_timing(os.path.join(self.root, 'walks', 'walk_cycle.timing'), [u'left foot', u'', u'right foot'])
+        write_timing(os.path.join(self.root, 'fights', 'kick.timing'), [u'', u'Heavy impact'])
+        write_timing(os.path.join(self.root, 'fights', 'punch.csv'), [u'impact left'])
+
+        with open(os.path.join(self.root, 'fights', 'settings.json'), 'w') as f:
+            json.dump({'not': 'a timing'}, f)
+
+        self.index = ATTimingIndex(os.path.join(self.directory, 'index.db'), self.full_text)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def names(self, text):
+        return sorted(row['name'] for row in self.index.search(text))
+
+    def touch(self, path):
+        later = os.path.getmtime(path) + 10
+        os.utime(path, (later, later))
+
+    def test_scan(self):
+        self.assertEqual(self.index.scan([self.root]), 3)
+        self.assertEqual(self.index.count(), 3)
+
+        # Nothing changed, nothing read again
+        self.assertEqual(self.index.scan([self.root]), 0)
+
+    def test_search(self):
+        self.index.scan([self.root])
+
+        self.assertEqual(self.names(u''), ['kick.timing', 'punch.csv', 'walk_cycle.timing'])
+        self.assertEqual(self.names(u'impact'), ['kick.timing', 'punch.csv'])
+        self.assertEqual(self.names(u'IMP le'), ['punch.csv'])
+        self.assertEqual(self.names(u'heavy'), ['kick.timing'])
+        self.assertEqual(self.names(u'fights'), ['kick.timing', 'punch.csv'])
+        self.assertEqual(self.names(u'cycle foot'), ['walk_cycle.timing'])
+        self.assertEqual(self.names(u'walks right'), ['walk_cycle.timing'])
+        self.assertEqual(self.names(u'jump'), [])
+
+    def test_modified_file(self):
+        self.index.scan([self.root])
+
+        path = os.path.join(self.root, 'fights', 'kick.timing')
+        write_timing(path, [u'light tap'])
+        self.touch(path)
+
+        self.assertEqual(self.index.scan([self.root]), 1)
+        self.assertEqual(self.index.count(), 3)
+        self.assertEqual(self.names(u'heavy'), [])
+        self.assertEqual(self.names(u'light'), ['kick.timing'])
+
+    def test_removed_file(self):
+        self.index.scan([self.root])
+        os.remove(os.path.join(self.root, 'fights', 'punch.csv'))
+
+        self.assertEqual(self.index.scan([self.root]), 0)
+        self.assertEqual(self.index.count(), 2)
+        self.assertEqual(self.names(u'impact'), ['kick.timing'])
+
+    def test_interrupted_scan_keeps_files(self):
+        self.index.scan([self.root])
+        os.remove(os.path.join(self.root, 'fights', 'punch.csv'))
+
+        self.index.scan([self.root], lambda: True)
+        self.assertEqual(self.index.count(), 3)
+
+    def test_other_roots_are_kept(self):
+        self.index.scan([self.root])
+        self.index.scan([os.path.join(self.root, 'walks')])
+
+        self.assertEqual(self.index.count(), 3)
+
+    def test_index_made_before_search_table(self):
+        self.index.scan([self.root])
+
+        # As written before names, directories and notes were searchable
+        with sqlite3.connect(self.index.path) as db:
+            db.execute("DROP TABLE IF EXISTS timings_text")
+            db.execute("DROP TABLE IF EXISTS timing_words")
+
+        index = ATTimingIndex(self.index.path, self.full_text)
+        self.assertEqual(sorted(row['name'] for row in index.search(u'impact')), ['kick.timing', 'punch.csv'])
+
+    def test_duration_includes_offset(self):
+        path = os.path.join(self.root, 'walks', 'offset.timing')
+        write_timing(path, [u'', u'', u''], {'fps': '24', 'offset_time': 1000})
+        self.index.scan([self.root])
+
+        session = ATSession(24, 1000)
+        session.new_take().extend([(0, u''), (500, u''), (1000, u'')])
+
+        row = self.index.search(u'offset')[0]
+        self.assertEqual(row['duration'], 2000)
+        self.assertEqual(row['duration'], session.duration())
+
+        # The header of the file is used when there
+        write_timing(path, [u'', u'', u''], {'fps': '24', 'offset_time': 1000, 'duration': 2010})
+        self.touch(path)
+        self.index.scan([self.root])
+        self.assertEqual(self.index.search(u'offset')[0]['duration'], 2010)
+
+
+class ATTimingIndexWordsTest(ATTimingIndexTest):
+
+    full_text = False
+
+    def test_table(self):
+        self.assertIsNone(self.index.fts)
+
+
+if __name__ == '__main__':
+    unittest.main()